@@ -0,0 +1,34 @@
+r"""Performance benchmarks of :func:`iso8583.decode`, :func:`iso8583.encode`
+and :func:`iso8583.pp`.
+
+Run all benchmarks from the repository root:
+
+.. code-block:: console
+
+    $ python -m benchmarks
+
+Each benchmark runs one operation on a representative message of
+a message profile (see :mod:`benchmarks.profiles`) and reports
+messages per second, nanoseconds per field and bytes allocated
+per message.
+
+Save results as a JSON baseline and compare a later run against it.
+The comparison fails when any benchmark is slower than the baseline
+by more than the threshold:
+
+.. code-block:: console
+
+    $ python -m benchmarks --save baseline.json
+    $ python -m benchmarks --compare baseline.json --threshold 10
+
+Plain dict specifications are compiled field by field on first use
+and should perform close to specifications compiled with
+:func:`iso8583.compile_spec`. Compare them within a single run:
+
+.. code-block:: console
+
+    $ python -m benchmarks --versus-compiled --threshold 10
+
+Timings depend on the machine and the Python implementation.
+Compare results produced on the same machine only.
+"""
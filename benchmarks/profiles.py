@@ -0,0 +1,194 @@
+r"""Message profiles used by the benchmarks.
+
+A profile is a specification and a decoded message that is typical
+for that specification. Field values fit both the specification
+and real-world sizes, e.g. field 55 carries ICC data of a chip card
+authorization.
+"""
+
+import copy
+from typing import Any, Callable, Dict, NamedTuple
+
+import iso8583
+import iso8583.specs
+
+__all__ = ["Profile", "PROFILES", "get_profile"]
+
+SpecDict = Dict[str, Dict[str, Any]]
+
+
+class Profile(NamedTuple):
+    r"""Benchmark message profile.
+
+    Attributes
+    ----------
+    name : str
+        Profile name
+    spec : dict
+        ISO8583 specification
+    doc_dec : dict
+        Decoded message that encodes with `spec`
+    """
+
+    name: str
+    spec: SpecDict
+    doc_dec: Dict[str, str]
+
+
+# ICC data of an authorization request: cryptogram, cryptogram information data,
+# issuer application data, unpredictable number, ATC, TVR, transaction date,
+# transaction type, amount, currency code, AIP, terminal country code
+# and amount, other.
+_ICC = (
+    "9F2608A1B2C3D4E5F60718"
+    "9F270180"
+    "9F100706010A03A00000"
+    "9F370412345678"
+    "9F36020001"
+    "950500000000"
+    "9A03251017"
+    "9C0100"
+    "9F02060000000010"
+    "5F2A020840"
+    "82025C00"
+    "9F1A020840"
+    "9F03060000000000"
+)
+
+_AUTH: Dict[str, str] = {
+    "t": "0100",
+    "2": "4761739001010010",
+    "3": "000000",
+    "4": "000000001000",
+    "7": "1017123456",
+    "11": "123456",
+    "12": "123456",
+    "13": "1017",
+    "14": "2512",
+    "18": "5411",
+    "22": "051",
+    "25": "00",
+    "32": "123456",
+    "35": "4761739001010010D25122011758900000",
+    "37": "529012345678",
+    "41": "TERM0001",
+    "42": "MERCHANT0000001",
+    "43": "ACME STORE              SPRINGFIELD   US",
+    "49": "840",
+    "52": "1234567890ABCDEF",
+    "55": _ICC,
+}
+
+# Numeric fields of the authorization request
+_NUMERIC = [
+    "2",
+    "3",
+    "4",
+    "7",
+    "11",
+    "12",
+    "13",
+    "14",
+    "18",
+    "22",
+    "25",
+    "32",
+    "35",
+    "49",
+]
+
+
+def _default() -> Profile:
+    return Profile("default", copy.deepcopy(iso8583.specs.default), dict(_AUTH))
+
+
+def _default_ascii() -> Profile:
+    return Profile(
+        "default_ascii", copy.deepcopy(iso8583.specs.default_ascii), dict(_AUTH)
+    )
+
+
+def _ebcdic() -> Profile:
+    r"""All text data, lengths and bitmaps are EBCDIC encoded."""
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    for field in spec.values():
+        if field["data_enc"] == "ascii":
+            field["data_enc"] = "cp500"
+        if field["len_enc"] == "ascii":
+            field["len_enc"] = "cp500"
+    return Profile("ebcdic", spec, dict(_AUTH))
+
+
+def _bcd() -> Profile:
+    r"""Numeric fields are packed BCD measured in nibbles."""
+    spec: SpecDict = copy.deepcopy(iso8583.specs.default)
+    for key in _NUMERIC:
+        field = spec[key]
+        field["data_enc"] = "b"
+        field["len_enc"] = "bcd"
+        field["len_count"] = "nibbles"
+        field["left_pad"] = "0"
+        if field["len_type"] > 0:
+            field["len_type"] = 1
+    return Profile("bcd", spec, dict(_AUTH))
+
+
+def _tertiary() -> Profile:
+    r"""Network management message with secondary and tertiary bitmap fields."""
+    spec = copy.deepcopy(iso8583.specs.default)
+    for i in range(129, 193):
+        spec[str(i)] = {
+            "data_enc": "ascii",
+            "len_enc": "ascii",
+            "len_type": 2,
+            "max_len": 99,
+            "desc": f"Tertiary Field {i}",
+        }
+    doc_dec = {
+        "t": "0800",
+        "7": "1017123456",
+        "11": "123456",
+        "70": "301",
+        "100": "123456",
+        "102": "1234567890",
+        "130": "TERTIARY DATA 130",
+        "140": "TERTIARY DATA 140",
+        "160": "TERTIARY DATA 160",
+        "190": "TERTIARY DATA 190",
+    }
+    return Profile("tertiary", spec, doc_dec)
+
+
+def _large() -> Profile:
+    r"""Fields 55 and 127 at their maximum length."""
+    doc_dec = dict(_AUTH)
+    doc_dec["55"] = (_ICC * 8)[:510]
+    doc_dec["127"] = ("PRIVATE DATA " * 77)[:999]
+    return Profile("large", copy.deepcopy(iso8583.specs.default), doc_dec)
+
+
+_FACTORIES: Dict[str, Callable[[], Profile]] = {
+    "default": _default,
+    "default_ascii": _default_ascii,
+    "ebcdic": _ebcdic,
+    "bcd": _bcd,
+    "tertiary": _tertiary,
+    "large": _large,
+}
+
+PROFILES = list(_FACTORIES)
+r"""Names of available message profiles."""
+
+
+def get_profile(name: str) -> Profile:
+    r"""Build a message profile by its name.
+
+    Raises
+    ------
+    KeyError
+        Unknown profile name
+    """
+    profile = _FACTORIES[name]()
+    # Fail early if a profile does not match its specification
+    iso8583.encode(profile.doc_dec, profile.spec)
+    return profile
@@ -0,0 +1,278 @@
+r"""Run benchmarks, report results and compare them against a baseline."""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO
+
+import iso8583
+from benchmarks.profiles import PROFILES, Profile, get_profile
+
+__all__ = ["OPERATIONS", "run", "compare", "main"]
+
+# Results of one benchmark: msgs_per_s, ns_per_field and alloc_bytes
+Result = Dict[str, float]
+# Results of all benchmarks keyed by profile name and then operation name
+Results = Dict[str, Dict[str, Result]]
+
+OPERATIONS = ["decode", "encode", "pp"]
+r"""Names of benchmarked operations."""
+
+
+class _NullStream:
+    r"""Text stream that discards :func:`iso8583.pp` output."""
+
+    def write(self, s: str) -> int:
+        return len(s)
+
+
+def _make_operation(name: str, profile: Profile, spec: Any) -> Callable[[], Any]:
+    r"""Return a callable that performs operation `name` on one message."""
+    encoded, doc_enc = iso8583.encode(profile.doc_dec, spec)
+    s = bytes(encoded)
+    if name == "decode":
+        return lambda: iso8583.decode(s, spec)
+    if name == "encode":
+        doc_dec = dict(profile.doc_dec)
+        return lambda: iso8583.encode(doc_dec, spec)
+    if name == "pp":
+        # Encoded data dict exercises wrapping of long binary fields
+        stream: Any = _NullStream()
+        return lambda: iso8583.pp(doc_enc, spec, stream=stream)
+    raise KeyError(name)
+
+
+def _measure_time(op: Callable[[], Any], number: int, repeat: int) -> float:
+    r"""Return the best time of a single call in seconds."""
+    timer = timeit.Timer(op)
+    if number <= 0:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def _measure_alloc(op: Callable[[], Any]) -> int:
+    r"""Return peak memory in bytes allocated by a single call."""
+    op()
+    tracemalloc.start()
+    try:
+        op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(
+    profiles: Sequence[str] = PROFILES,
+    operations: Sequence[str] = OPERATIONS,
+    number: int = 0,
+    repeat: int = 5,
+    compiled: bool = False,
+) -> Results:
+    r"""Run benchmarks.
+
+    Parameters
+    ----------
+    profiles : list of str, optional
+        Names of message profiles (default all)
+    operations : list of str, optional
+        Names of operations (default all)
+    number : int, optional
+        Number of calls per timing run. Specify 0 (default)
+        to choose a number that takes at least 0.2 seconds.
+    repeat : int, optional
+        Number of timing runs (default 5). The best run is reported.
+    compiled : bool, optional
+        Compile specifications with :func:`iso8583.compile_spec`
+        (default False)
+
+    Returns
+    -------
+    dict
+        Results keyed by profile name and then operation name
+    """
+    results: Results = {}
+    for profile_name in profiles:
+        profile = get_profile(profile_name)
+        spec: Any = iso8583.compile_spec(profile.spec) if compiled else profile.spec
+        _, doc_enc = iso8583.encode(profile.doc_dec, spec)
+        field_count = len(doc_enc)
+        results[profile_name] = {}
+        for name in operations:
+            op = _make_operation(name, profile, spec)
+            seconds = _measure_time(op, number, repeat)
+            results[profile_name][name] = {
+                "msgs_per_s": round(1 / seconds, 1),
+                "ns_per_field": round(seconds * 1e9 / field_count, 1),
+                "alloc_bytes": _measure_alloc(op),
+            }
+    return results
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> List[str]:
+    r"""Find benchmarks that are slower than the baseline.
+
+    Parameters
+    ----------
+    results : dict
+        Results of :func:`run`
+    baseline : dict
+        Results of an earlier :func:`run`
+    threshold : float
+        Allowed slowdown in percent
+
+    Returns
+    -------
+    list of str
+        Descriptions of benchmarks slower than the baseline by more
+        than `threshold`. Benchmarks missing from either results
+        are not compared.
+    """
+    regressions = []
+    for profile_name, ops in results.items():
+        for name, result in ops.items():
+            base = baseline.get(profile_name, {}).get(name)
+            if base is None:
+                continue
+            change = _change(result, base)
+            if change > threshold:
+                regressions.append(
+                    f"{profile_name} {name}: {change:+.1f}% ns/field "
+                    f"({base['ns_per_field']} -> {result['ns_per_field']})"
+                )
+    return regressions
+
+
+def _change(result: Result, base: Result) -> float:
+    r"""Return change of time per field in percent."""
+    return (result["ns_per_field"] / base["ns_per_field"] - 1) * 100
+
+
+def _report(results: Results, baseline: Optional[Results], stream: TextIO) -> None:
+    header = f"{'profile':<14} {'op':<7} {'msgs/s':>12} {'ns/field':>10} {'alloc B':>9}"
+    if baseline is not None:
+        header += f" {'change':>8}"
+    stream.write(header + "\n")
+    for profile_name, ops in results.items():
+        for name, result in ops.items():
+            line = (
+                f"{profile_name:<14} {name:<7} {result['msgs_per_s']:>12,.0f} "
+                f"{result['ns_per_field']:>10,.1f} {result['alloc_bytes']:>9,.0f}"
+            )
+            if baseline is not None:
+                base = baseline.get(profile_name, {}).get(name)
+                if base is not None:
+                    line += f" {_change(result, base):>+7.1f}%"
+            stream.write(line + "\n")
+
+
+def main(argv: Optional[Sequence[str]] = None, stream: TextIO = sys.stdout) -> int:
+    r"""Command line entry point of ``python -m benchmarks``.
+
+    Returns
+    -------
+    int
+        Exit status: 1 if any benchmark is slower than the baseline
+        by more than the threshold, otherwise 0
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark iso8583 decode, encode and pp.",
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        action="append",
+        choices=PROFILES,
+        help="message profile to run, may be repeated (default all)",
+    )
+    parser.add_argument(
+        "-o",
+        "--operation",
+        action="append",
+        choices=OPERATIONS,
+        help="operation to run, may be repeated (default all)",
+    )
+    parser.add_argument(
+        "-n",
+        "--number",
+        type=int,
+        default=0,
+        help="calls per timing run (default 0 chooses automatically)",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="timing runs (default 5)"
+    )
+    parser.add_argument(
+        "--compiled",
+        action="store_true",
+        help="compile specifications with iso8583.compile_spec",
+    )
+    parser.add_argument(
+        "--versus-compiled",
+        action="store_true",
+        help="compare plain dict specifications against compiled specifications",
+    )
+    parser.add_argument("--save", metavar="FILE", help="save results as JSON baseline")
+    parser.add_argument(
+        "--compare", metavar="FILE", help="compare results against JSON baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="allowed slowdown against baseline in percent (default 10)",
+    )
+    args = parser.parse_args(argv)
+    if args.versus_compiled and (args.compiled or args.compare):
+        parser.error("--versus-compiled cannot be used with --compiled or --compare")
+
+    baseline: Optional[Results] = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    elif args.versus_compiled:
+        baseline = run(
+            args.profile or PROFILES,
+            args.operation or OPERATIONS,
+            args.number,
+            args.repeat,
+            compiled=True,
+        )
+
+    results = run(
+        args.profile or PROFILES,
+        args.operation or OPERATIONS,
+        args.number,
+        args.repeat,
+        args.compiled,
+    )
+    _report(results, baseline, stream)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(_document(results, args.compiled), f, indent=2)
+            f.write("\n")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            stream.write(f"Slower than baseline: {regression}\n")
+        if regressions:
+            return 1
+    return 0
+
+
+def _document(results: Results, compiled: bool) -> Dict[str, Any]:
+    r"""Wrap results with environment details for a JSON baseline."""
+    return {
+        "iso8583": iso8583.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "compiled": compiled,
+        "results": results,
+    }
@@ -0,0 +1,22 @@
+import typing
+
+import pytest
+
+# Doctests of functions that require optional dependencies.
+# They are skipped when the dependency is not installed.
+_OPTIONAL_DOCTESTS = {
+    "iso8583.columnar.to_arrays": "numpy",
+}
+
+
+def pytest_collection_modifyitems(
+    config: typing.Any, items: typing.List[pytest.Item]
+) -> None:
+    for item in items:
+        module = _OPTIONAL_DOCTESTS.get(item.name)
+        if module is None:
+            continue
+        try:
+            __import__(module)
+        except ImportError:
+            item.add_marker(pytest.mark.skip(reason=f"could not import {module!r}"))
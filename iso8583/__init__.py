@@ -65,13 +65,47 @@ Use `iso8583.pp` to pretty print ISO8583 message.
 __version__ = "4.0.1"
 __all__ = [
     "pp",
+    "pformat",
+    "pp_lines",
+    "compile_spec",
+    "CompiledSpec",
     "decode",
+    "decode_fast",
+    "decode_many",
+    "decode_view",
+    "decode_lazy",
+    "decode_subfields",
+    "index",
+    "LazyMessage",
     "DecodeError",
     "encode",
+    "encode_fast",
+    "encode_into",
+    "encode_subfields",
     "EncodeError",
+    "StreamDecoder",
+    "FramingError",
 ]
 __author__ = "Konstantin Novichikhin <konstantin.novichikhin@gmail.com>"
 
-from iso8583.decoder import DecodeError, decode
-from iso8583.encoder import EncodeError, encode
-from iso8583.tools import pp
+from iso8583.compiler import CompiledSpec, compile_spec
+from iso8583.decoder import (
+    DecodeError,
+    LazyMessage,
+    decode,
+    decode_fast,
+    decode_many,
+    decode_lazy,
+    decode_subfields,
+    decode_view,
+    index,
+)
+from iso8583.encoder import (
+    EncodeError,
+    encode,
+    encode_fast,
+    encode_into,
+    encode_subfields,
+)
+from iso8583.stream import FramingError, StreamDecoder
+from iso8583.tools import pformat, pp, pp_lines
@@ -0,0 +1,1042 @@
+r"""Exchange ISO8583 messages over asyncio connections.
+
+:class:`ISO8583Protocol` frames, decodes and encodes ISO8583 messages
+on top of an asyncio transport. Use :func:`open_connection` to connect
+to a host and :func:`start_server` to accept connections.
+
+.. code-block:: python
+
+    >>> import asyncio
+    >>> import iso8583.aio
+    >>> from iso8583.specs import default_ascii as spec
+    >>> async def main():
+    ...     server = await iso8583.aio.start_loopback_server(spec)
+    ...     port = server.sockets[0].getsockname()[1]
+    ...     conn = await iso8583.aio.open_connection("127.0.0.1", port, spec)
+    ...     conn.send({"t": "0800", "70": "301"})
+    ...     doc_dec, doc_enc = await conn.receive()
+    ...     conn.close()
+    ...     await conn.wait_closed()
+    ...     server.close()
+    ...     await server.wait_closed()
+    ...     return doc_dec
+    >>> asyncio.run(main())
+    {'t': '0810', 'p': '8000000002000000', '1': '0400000000000000', '39': '00', '70': '301'}
+
+Messages are framed by a length header.
+See :mod:`iso8583.stream` module for supported framing.
+"""
+
+import asyncio
+import inspect
+import random
+import time
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from iso8583.compiler import compile_spec
+from iso8583.decoder import DecodedDict, DecodeError, EncodedDict, SpecDict, decode
+from iso8583.encoder import encode
+from iso8583.stream import _FRAMINGS, FramingError, StreamDecoder
+
+__all__ = [
+    "ISO8583Protocol",
+    "Multiplexer",
+    "Pool",
+    "Handler",
+    "open_connection",
+    "start_server",
+    "start_loopback_server",
+]
+
+Handler = Callable[[DecodedDict, EncodedDict], Awaitable[Optional[Mapping[str, str]]]]
+
+
+# Placeholder for timeout argument that defaults to Multiplexer timeout
+_DEFAULT_TIMEOUT: Any = object()
+
+
+class ISO8583Protocol(asyncio.Protocol):
+    r"""asyncio protocol that exchanges length-prefixed ISO8583 messages.
+
+    Received messages are either queued for :meth:`receive` or,
+    if `handler` is provided, passed to the handler. A reply returned
+    by the handler is sent back.
+
+    Parameters
+    ----------
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    framing : str, optional
+        Length header format (default ``"b2"``).
+        See :mod:`iso8583.stream` module.
+    handler : coroutine function, optional
+        Called as ``await handler(doc_dec, doc_enc)`` for every received
+        message in a separate task. If it returns a dict, the dict is
+        encoded and sent as a reply.
+    queue_size : int, optional
+        Number of received messages waiting for :meth:`receive`,
+        or of running handler tasks, at which the transport stops
+        reading (default 1024). Reading resumes once the number
+        drops to half of `queue_size`.
+
+    Attributes
+    ----------
+    spec : CompiledSpec
+        Compiled ISO8583 specification
+    framing : str
+        Length header format
+    transport : asyncio.Transport or None
+        Connection transport. None until connection is made.
+
+    Notes
+    -----
+    Messages that fail to decode are passed to :meth:`decode_error`.
+    An invalid length header closes the connection.
+    Exceptions raised by the handler are reported to the event loop
+    exception handler.
+    """
+
+    def __init__(
+        self,
+        spec: SpecDict,
+        framing: str = "b2",
+        handler: Optional[Handler] = None,
+        queue_size: int = 1024,
+    ) -> None:
+        self._decoder = StreamDecoder(spec, framing)
+        self._encode_len = _FRAMINGS[framing][2]
+        self.spec = self._decoder.spec
+        self.framing = framing
+        self.transport: Optional[asyncio.Transport] = None
+        self._handler = handler
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        # Received messages and decoding errors waiting for receive()
+        self._received: Deque[Union[Tuple[DecodedDict, EncodedDict], BaseException]] = (
+            deque()
+        )
+        self._receive_waiters: Deque["asyncio.Future[None]"] = deque()
+        self._drain_waiters: Deque["asyncio.Future[None]"] = deque()
+        self._paused = False
+        self._queue_size = max(int(queue_size), 1)
+        self._reading_paused = False
+        self._closed: Optional["asyncio.Future[None]"] = None
+        self._exc: Optional[BaseException] = None
+        self._multiplexer: Optional["Multiplexer"] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+        self._closed = asyncio.get_running_loop().create_future()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        # Keep framing error that caused the connection to be aborted
+        if self._exc is None:
+            self._exc = exc
+        if self._closed is not None and not self._closed.done():
+            self._closed.set_result(None)
+        for waiter in self._receive_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._wake_drainers()
+        if self._multiplexer is not None:
+            self._multiplexer._fail(exc)
+
+    def pause_writing(self) -> None:
+        self._paused = True
+
+    def resume_writing(self) -> None:
+        self._paused = False
+        self._wake_drainers()
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            for s in self._decoder.frames(data):
+                # Responses awaited by the multiplexer bypass regular processing
+                if self._multiplexer is None or not self._multiplexer._resolve(s):
+                    self.frame_received(s)
+        except FramingError as e:
+            self._exc = e
+            if self.transport is not None:
+                self.transport.abort()
+
+    def frame_received(self, s: bytes) -> None:
+        r"""Decode a received message and pass it to :meth:`message_received`
+        or :meth:`decode_error`.
+
+        Parameters
+        ----------
+        s : bytes
+            Encoded ISO8583 message without length header
+        """
+        try:
+            doc_dec, doc_enc = decode(s, self.spec)
+        except DecodeError as e:
+            self.decode_error(e)
+        else:
+            self.message_received(doc_dec, doc_enc)
+
+    def message_received(self, doc_dec: DecodedDict, doc_enc: EncodedDict) -> None:
+        r"""Process a received message.
+
+        Parameters
+        ----------
+        doc_dec : dict
+            Dict containing decoded ISO8583 data
+        doc_enc : dict
+            Dict containing encoded ISO8583 data
+        """
+        if self._handler is None:
+            self._received.append((doc_dec, doc_enc))
+            self._wake_receiver()
+            self._check_reading()
+            return
+
+        task = asyncio.get_running_loop().create_task(
+            self._handle(self._handler, doc_dec, doc_enc)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._handle_done)
+        self._check_reading()
+
+    def decode_error(self, exc: DecodeError) -> None:
+        r"""Process a message that failed to decode.
+
+        Without a handler the error is raised by :meth:`receive`.
+        With a handler the message is dropped. Override to change
+        this behaviour, e.g. to log the error.
+
+        Parameters
+        ----------
+        exc : DecodeError
+            Decoding error
+        """
+        if self._handler is None:
+            self._received.append(exc)
+            self._wake_receiver()
+            self._check_reading()
+
+    def send(
+        self,
+        doc_dec: Mapping[str, str],
+        bitmap: Optional[int] = None,
+        mutate: bool = True,
+    ) -> None:
+        r"""Encode a message and write it to the transport.
+
+        Parameters
+        ----------
+        doc_dec : dict
+            Dict containing decoded ISO8583 data.
+            See :func:`iso8583.encode`.
+        bitmap : int, optional
+            Precomputed bitmap of fields to encode.
+            See :func:`iso8583.encode`.
+        mutate : bool, optional
+            Store calculated bitmaps into `doc_dec` (default).
+            See :func:`iso8583.encode`.
+
+        Raises
+        ------
+        EncodeError
+            An error encoding ISO8583 data
+        ValueError
+            Encoded message does not fit into length header
+        ConnectionError
+            Connection is closed
+        """
+        if self.transport is None or self.transport.is_closing():
+            raise ConnectionResetError("Connection is closed")
+        s, _ = encode(doc_dec, self.spec, bitmap, mutate)
+        self.transport.writelines((self._encode_len(len(s)), s))
+
+    async def drain(self) -> None:
+        r"""Wait until the transport write buffer is flushed enough to continue."""
+        if not self._paused or (self._closed is not None and self._closed.done()):
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._drain_waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            if waiter in self._drain_waiters:
+                self._drain_waiters.remove(waiter)
+
+    async def receive(self) -> Tuple[DecodedDict, EncodedDict]:
+        r"""Wait for the next received message.
+
+        Concurrent callers receive messages in the order they started waiting.
+
+        Returns
+        -------
+        doc_dec : dict
+            Dict containing decoded ISO8583 data
+        doc_enc : dict
+            Dict containing encoded ISO8583 data
+
+        Raises
+        ------
+        DecodeError
+            Received message failed to decode
+        EOFError
+            Connection is closed and no messages are left
+        FramingError
+            Connection is closed due to an invalid length header
+        """
+        while not self._received:
+            if self._closed is not None and self._closed.done():
+                if self._exc is not None:
+                    raise self._exc
+                raise EOFError("Connection is closed")
+            waiter = asyncio.get_running_loop().create_future()
+            self._receive_waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass the wakeup on if this waiter was woken for a message
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_receiver()
+                raise
+            finally:
+                if waiter in self._receive_waiters:
+                    self._receive_waiters.remove(waiter)
+
+        item = self._received.popleft()
+        self._check_reading()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def __aiter__(self) -> "ISO8583Protocol":
+        return self
+
+    async def __anext__(self) -> Tuple[DecodedDict, EncodedDict]:
+        try:
+            return await self.receive()
+        except EOFError:
+            raise StopAsyncIteration from None
+
+    def close(self) -> None:
+        r"""Close the connection. Buffered outgoing data is flushed first."""
+        if self.transport is not None:
+            self.transport.close()
+
+    async def wait_closed(self) -> None:
+        r"""Wait until the connection is closed."""
+        if self._closed is not None:
+            await self._closed
+
+    async def _handle(
+        self, handler: Handler, doc_dec: DecodedDict, doc_enc: EncodedDict
+    ) -> None:
+        reply = await handler(doc_dec, doc_enc)
+        if reply is not None and not self.transport.is_closing():  # type: ignore[union-attr]
+            self.send(reply)
+
+    def _handle_done(self, task: "asyncio.Task[None]") -> None:
+        self._tasks.discard(task)
+        self._check_reading()
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            task.get_loop().call_exception_handler(
+                {
+                    "message": "Unhandled exception in ISO8583 message handler",
+                    "exception": exc,
+                    "protocol": self,
+                    "transport": self.transport,
+                }
+            )
+
+    def _wake_receiver(self) -> None:
+        r"""Wake the first receiver that is not woken yet."""
+        for waiter in self._receive_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _wake_drainers(self) -> None:
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _check_reading(self) -> None:
+        r"""Pause or resume reading depending on the number of queued messages."""
+        if self.transport is None or self.transport.is_closing():
+            return
+        queued = len(self._received) + len(self._tasks)
+        if not self._reading_paused and queued >= self._queue_size:
+            self._reading_paused = True
+            self.transport.pause_reading()
+        elif self._reading_paused and queued <= self._queue_size // 2:
+            self._reading_paused = False
+            self.transport.resume_reading()
+
+
+class Multiplexer:
+    r"""Match responses to requests sent over a single connection.
+
+    Many requests can be in flight at the same time. A response is
+    matched to its request by a key built from key fields, e.g.
+    STAN (field 11) and terminal ID (field 41).
+    Only message type and key fields of a received message are decoded
+    to find the matching request. Only responses, i.e. messages with
+    an odd third MTI digit such as 0210 or 0810, are matched. The response is fully decoded by
+    :meth:`request` once it is matched.
+
+    Parameters
+    ----------
+    protocol : ISO8583Protocol
+        Connected protocol, e.g. returned by :func:`open_connection`
+    key_fields : sequence of str, optional
+        Fields that identify a request and its response
+        (default ``("11", "41")``). A field missing from
+        a message is keyed as ``None``. Key fields must be present
+        in both or neither, e.g. RRN (field 37) is not a key field
+        by default because it is often assigned in the response.
+    key : callable, optional
+        Called as ``key(doc_dec)`` with a request or with key fields
+        of a received message. Must return a hashable key.
+        By default, the key is a tuple of `key_fields` values.
+    window : int, optional
+        Maximum number of requests in flight (default 256).
+        :meth:`request` waits for a free slot when the window is full.
+    timeout : float, optional
+        Default number of seconds to wait for a response (default 30).
+        None waits forever.
+
+    Attributes
+    ----------
+    protocol : ISO8583Protocol
+        Connected protocol
+    window : int
+        Maximum number of requests in flight
+
+    Notes
+    -----
+    Received messages that do not match a request in flight, such as
+    requests from the host or late responses to timed out requests,
+    are processed by `protocol` as usual: queued for
+    :meth:`ISO8583Protocol.receive` or passed to its handler.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import iso8583.aio
+    >>> from iso8583.specs import default_ascii as spec
+    >>> async def main():
+    ...     server = await iso8583.aio.start_loopback_server(spec)
+    ...     port = server.sockets[0].getsockname()[1]
+    ...     conn = await iso8583.aio.open_connection("127.0.0.1", port, spec)
+    ...     mux = iso8583.aio.Multiplexer(conn)
+    ...     responses = await asyncio.gather(
+    ...         *[
+    ...             mux.request({"t": "0200", "11": f"{stan:06d}", "41": "TERM0001"})
+    ...             for stan in range(1, 4)
+    ...         ]
+    ...     )
+    ...     conn.close()
+    ...     server.close()
+    ...     await server.wait_closed()
+    ...     return [(doc_dec["t"], doc_dec["11"]) for doc_dec, _ in responses]
+    >>> asyncio.run(main())
+    [('0210', '000001'), ('0210', '000002'), ('0210', '000003')]
+    """
+
+    def __init__(
+        self,
+        protocol: ISO8583Protocol,
+        key_fields: Sequence[str] = ("11", "41"),
+        key: Optional[Callable[[Mapping[str, str]], Hashable]] = None,
+        window: int = 256,
+        timeout: Optional[float] = 30.0,
+    ) -> None:
+        if protocol._multiplexer is not None:
+            raise ValueError("Protocol already has a multiplexer")
+        if window < 1:
+            raise ValueError("Window must be at least 1")
+        self.protocol = protocol
+        self.window = window
+        # Message type is decoded to tell responses from host requests
+        self._key_fields = frozenset(key_fields) | {"t"}
+        self._key_fields_order = tuple(key_fields)
+        self._key = key or self._default_key
+        self._timeout = timeout
+        self._slots = asyncio.Semaphore(window)
+        self._pending: Dict[Hashable, "asyncio.Future[bytes]"] = {}
+        protocol._multiplexer = self
+
+    @property
+    def in_flight(self) -> int:
+        r"""Number of requests waiting for a response."""
+        return len(self._pending)
+
+    async def request(
+        self,
+        doc_dec: Mapping[str, str],
+        timeout: Optional[float] = _DEFAULT_TIMEOUT,
+        mutate: bool = True,
+    ) -> Tuple[DecodedDict, EncodedDict]:
+        r"""Send a request and wait for the matching response.
+
+        Parameters
+        ----------
+        doc_dec : dict
+            Dict containing decoded ISO8583 request data
+        timeout : float, optional
+            Number of seconds to wait for a response, including
+            time spent waiting for a free window slot.
+            Defaults to the multiplexer timeout. None waits forever.
+        mutate : bool, optional
+            Store calculated bitmaps into `doc_dec` (default).
+            See :func:`iso8583.encode`.
+
+        Returns
+        -------
+        doc_dec : dict
+            Dict containing decoded ISO8583 response data
+        doc_enc : dict
+            Dict containing encoded ISO8583 response data
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            No response within `timeout`
+        ValueError
+            A request with the same key is already in flight
+        ConnectionError
+            Connection is closed or lost before a response is received
+        EncodeError
+            An error encoding ISO8583 request
+        DecodeError
+            An error decoding ISO8583 response
+        """
+        if timeout is _DEFAULT_TIMEOUT:
+            timeout = self._timeout
+        s = await asyncio.wait_for(self._request(doc_dec, mutate), timeout)
+        return decode(s, self.protocol.spec)
+
+    async def _request(self, doc_dec: Mapping[str, str], mutate: bool) -> bytes:
+        key = self._key(doc_dec)
+        async with self._slots:
+            if key in self._pending:
+                raise ValueError(f"Request with key {key!r} is already in flight")
+
+            future: "asyncio.Future[bytes]" = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            try:
+                self.protocol.send(doc_dec, mutate=mutate)
+                return await future
+            finally:
+                del self._pending[key]
+
+    def _default_key(self, doc_dec: Mapping[str, str]) -> Hashable:
+        return tuple([doc_dec.get(f) for f in self._key_fields_order])
+
+    def _resolve(self, s: bytes) -> bool:
+        r"""Pass a received message to the matching request.
+
+        Returns
+        -------
+        bool
+            True if the message matched a request in flight
+        """
+        if not self._pending:
+            return False
+        try:
+            doc_dec, _ = decode(s, self.protocol.spec, self._key_fields)
+        except DecodeError:
+            return False
+        if not _is_response(doc_dec.get("t", "")):
+            return False
+
+        future = self._pending.get(self._key(doc_dec))
+        if future is None or future.done():
+            return False
+        future.set_result(s)
+        return True
+
+    def _fail(self, exc: Optional[BaseException]) -> None:
+        r"""Fail all requests in flight when connection is lost."""
+        for future in self._pending.values():
+            if not future.done():
+                error = ConnectionResetError("Connection lost")
+                error.__cause__ = exc
+                future.set_exception(error)
+
+
+class Pool:
+    r"""Pool of multiplexed connections to one or more ISO8583 hosts.
+
+    Every host gets `size` persistent connections. Each connection
+    is wrapped into a :class:`Multiplexer`. A lost connection is
+    reconnected with exponential backoff and random jitter so that
+    many connections do not reconnect at once. Idle connections are
+    checked with a network management echo: MTI 0800 with field 70
+    set to ``"301"``. A connection that fails an echo is reconnected.
+
+    Network management echo requests received from a host are answered
+    with MTI 0810 and field 39 set to ``"00"``. Other unsolicited
+    messages from a host are dropped.
+
+    Parameters
+    ----------
+    hosts : sequence of (str, int)
+        Host address and port pairs
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    framing : str, optional
+        Length header format (default ``"b2"``).
+        See :mod:`iso8583.stream` module.
+    size : int, optional
+        Number of connections per host (default 1)
+    strategy : str, optional
+        Connection selection strategy: ``"round_robin"`` (default)
+        or ``"least_in_flight"``. The latter selects a connection with
+        the fewest requests sent through :meth:`request` and not
+        answered yet.
+    echo_interval : float, optional
+        Seconds between echo requests on a connection (default 60).
+        None disables echo.
+    echo_timeout : float, optional
+        Seconds to wait for an echo response (default 10)
+    reconnect_delay : float, optional
+        Initial delay in seconds before reconnecting (default 0.5)
+    max_reconnect_delay : float, optional
+        Maximum delay in seconds before reconnecting (default 30)
+    **kwargs
+        Passed to :class:`Multiplexer`, e.g. ``key_fields``, ``window``
+        and ``timeout``.
+
+    Attributes
+    ----------
+    spec : CompiledSpec
+        Compiled ISO8583 specification
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> import iso8583.aio
+    >>> from iso8583.specs import default_ascii as spec
+    >>> async def main():
+    ...     server = await iso8583.aio.start_loopback_server(spec)
+    ...     port = server.sockets[0].getsockname()[1]
+    ...     async with iso8583.aio.Pool([("127.0.0.1", port)], spec, size=2) as pool:
+    ...         doc_dec, _ = await pool.request(
+    ...             {"t": "0200", "11": "000001", "41": "TERM0001"}
+    ...         )
+    ...     server.close()
+    ...     await server.wait_closed()
+    ...     return doc_dec["t"]
+    >>> asyncio.run(main())
+    '0210'
+    """
+
+    def __init__(
+        self,
+        hosts: Sequence[Tuple[str, int]],
+        spec: SpecDict,
+        framing: str = "b2",
+        size: int = 1,
+        strategy: str = "round_robin",
+        echo_interval: Optional[float] = 60.0,
+        echo_timeout: float = 10.0,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+        **kwargs: Any,
+    ) -> None:
+        if strategy not in ("round_robin", "least_in_flight"):
+            raise ValueError(
+                f"Unknown strategy {strategy!r}, expecting 'round_robin' or 'least_in_flight'"
+            )
+        if size < 1:
+            raise ValueError("Size must be at least 1")
+        if framing not in _FRAMINGS:
+            raise ValueError(
+                f"Unknown framing {framing!r}, expecting one of {sorted(_FRAMINGS)}"
+            )
+        # Multiplexers are created by link tasks. Report invalid
+        # arguments now rather than losing them in a background task.
+        inspect.signature(Multiplexer).bind(None, **kwargs)
+        self.spec = compile_spec(spec)
+        self._hosts = list(hosts)
+        self._framing = framing
+        self._size = size
+        self._strategy = strategy
+        self._echo_interval = echo_interval
+        self._echo_timeout = echo_timeout
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._mux_kwargs = kwargs
+        self._links: List[Multiplexer] = []
+        # Link: number of pool requests not answered yet
+        self._load: Dict[Multiplexer, int] = {}
+        self._next = 0
+        self._stan = 0
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._closing = False
+
+    @property
+    def links(self) -> List[Multiplexer]:
+        r"""Currently connected links."""
+        return list(self._links)
+
+    async def start(self) -> None:
+        r"""Connect to all hosts.
+
+        Waits until every connection is attempted once.
+        Failed connections keep reconnecting in the background.
+
+        Raises
+        ------
+        Exception
+            An unexpected error of a connection attempt.
+            The pool is closed.
+        """
+        if self._tasks:
+            return
+        self._closing = False
+        loop = asyncio.get_running_loop()
+        attempts = []
+        for host, port in self._hosts:
+            for _ in range(self._size):
+                attempted = loop.create_future()
+                attempts.append(attempted)
+                self._tasks.append(
+                    loop.create_task(self._run_link(host, port, attempted))
+                )
+        results = await asyncio.gather(*attempts, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                await self.close()
+                raise result
+
+    async def close(self) -> None:
+        r"""Close all connections and stop reconnecting."""
+        tasks, self._tasks = self._tasks, []
+        # asyncio.wait_for() may swallow a cancellation when the awaited
+        # request completes at the same time. Link tasks check this flag
+        # so that they stop regardless.
+        self._closing = True
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> "Pool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def acquire(self) -> Multiplexer:
+        r"""Select a connected link according to the pool strategy.
+
+        Returns
+        -------
+        Multiplexer
+            Multiplexed link. It stays usable until its connection is lost.
+
+        Raises
+        ------
+        ConnectionError
+            No connected links
+        """
+        links = self._links
+        if not links:
+            raise ConnectionError("No connected links")
+        if self._strategy == "least_in_flight":
+            return min(links, key=self._load.__getitem__)
+        self._next = (self._next + 1) % len(links)
+        return links[self._next]
+
+    async def request(
+        self,
+        doc_dec: Mapping[str, str],
+        timeout: Optional[float] = _DEFAULT_TIMEOUT,
+        mutate: bool = True,
+    ) -> Tuple[DecodedDict, EncodedDict]:
+        r"""Send a request over a connected link and wait for the response.
+
+        See :meth:`Multiplexer.request`.
+
+        Raises
+        ------
+        ConnectionError
+            No connected links or connection is lost before
+            a response is received
+        """
+        mux = self.acquire()
+        self._load[mux] += 1
+        try:
+            return await mux.request(doc_dec, timeout, mutate)
+        finally:
+            # The link may be gone after the connection is lost
+            if mux in self._load:
+                self._load[mux] -= 1
+
+    async def _run_link(
+        self, host: str, port: int, attempted: "asyncio.Future[None]"
+    ) -> None:
+        r"""Keep one connection to a host open.
+        Pass unexpected errors to :meth:`start` waiting on `attempted`."""
+        try:
+            await self._keep_link(host, port, attempted)
+        except asyncio.CancelledError:
+            attempted.cancel()
+            raise
+        except Exception as e:
+            if not attempted.done():
+                attempted.set_exception(e)
+            raise
+
+    async def _keep_link(
+        self, host: str, port: int, attempted: "asyncio.Future[None]"
+    ) -> None:
+        failures = 0
+        while not self._closing:
+            try:
+                protocol = await open_connection(
+                    host, port, self.spec, self._framing, _answer_echo
+                )
+            except OSError:
+                protocol = None
+
+            if protocol is None:
+                if not attempted.done():
+                    attempted.set_result(None)
+                failures += 1
+                delay = min(
+                    self._max_reconnect_delay,
+                    self._reconnect_delay * 2 ** (failures - 1),
+                )
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                continue
+
+            failures = 0
+            try:
+                mux = Multiplexer(protocol, **self._mux_kwargs)
+            except BaseException:
+                protocol.close()
+                raise
+            self._links.append(mux)
+            self._load[mux] = 0
+            if not attempted.done():
+                attempted.set_result(None)
+            try:
+                await self._keep_alive(mux)
+            finally:
+                self._links.remove(mux)
+                del self._load[mux]
+                protocol.close()
+
+            await asyncio.sleep(self._reconnect_delay * random.uniform(0.5, 1.0))
+
+    async def _keep_alive(self, mux: Multiplexer) -> None:
+        r"""Send echo requests until the connection is lost or an echo fails."""
+        protocol = mux.protocol
+        closed = asyncio.ensure_future(protocol.wait_closed())
+        try:
+            while not self._closing:
+                done, _ = await asyncio.wait([closed], timeout=self._echo_interval)
+                if done:
+                    return
+                echo = self._echo(mux)
+                if echo is None:
+                    # Every STAN tried is used by requests in flight
+                    continue
+                try:
+                    await mux.request(echo, self._echo_timeout)
+                except (asyncio.TimeoutError, ConnectionError, ValueError):
+                    # EncodeError and DecodeError are ValueError
+                    return
+        finally:
+            closed.cancel()
+
+    def _echo(self, mux: Multiplexer) -> Optional[Dict[str, str]]:
+        r"""Build a network management echo request with a STAN
+        that does not clash with requests in flight on `mux`."""
+        transmission_time = time.strftime("%m%d%H%M%S", time.gmtime())
+        for _ in range(mux.window + 1):
+            self._stan = self._stan % 999999 + 1
+            echo = {
+                "t": "0800",
+                "7": transmission_time,
+                "11": f"{self._stan:06d}",
+                "70": "301",
+            }
+            if mux._key(echo) not in mux._pending:
+                return echo
+        return None
+
+
+async def open_connection(
+    host: str,
+    port: int,
+    spec: SpecDict,
+    framing: str = "b2",
+    handler: Optional[Handler] = None,
+    queue_size: int = 1024,
+    **kwargs: Any,
+) -> ISO8583Protocol:
+    r"""Connect to an ISO8583 host.
+
+    Parameters
+    ----------
+    host : str
+        Host name or address
+    port : int
+        Port number
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    framing : str, optional
+        Length header format (default ``"b2"``).
+        See :mod:`iso8583.stream` module.
+    handler : coroutine function, optional
+        Message handler. See :class:`ISO8583Protocol`.
+    queue_size : int, optional
+        Received message limit (default 1024). See :class:`ISO8583Protocol`.
+    **kwargs
+        Passed to ``loop.create_connection()``, e.g. ``ssl``
+
+    Returns
+    -------
+    ISO8583Protocol
+        Connected protocol. Use :meth:`ISO8583Protocol.send` and
+        :meth:`ISO8583Protocol.receive` to exchange messages.
+    """
+    compiled = compile_spec(spec)
+    loop = asyncio.get_running_loop()
+    _, protocol = await loop.create_connection(
+        lambda: ISO8583Protocol(compiled, framing, handler, queue_size),
+        host,
+        port,
+        **kwargs,
+    )
+    return protocol
+
+
+async def start_server(
+    handler: Handler,
+    host: Optional[str],
+    port: Optional[int],
+    spec: SpecDict,
+    framing: str = "b2",
+    queue_size: int = 1024,
+    **kwargs: Any,
+) -> asyncio.AbstractServer:
+    r"""Start a server that passes received ISO8583 messages to a handler.
+
+    Parameters
+    ----------
+    handler : coroutine function
+        Called as ``await handler(doc_dec, doc_enc)`` for every received
+        message. If it returns a dict, the dict is encoded and sent
+        back as a reply.
+    host : str
+        Address to listen on
+    port : int
+        Port to listen on. Use 0 to pick a free port.
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    framing : str, optional
+        Length header format (default ``"b2"``).
+        See :mod:`iso8583.stream` module.
+    queue_size : int, optional
+        Running handler task limit per connection (default 1024).
+        See :class:`ISO8583Protocol`.
+    **kwargs
+        Passed to ``loop.create_server()``, e.g. ``ssl``
+
+    Returns
+    -------
+    asyncio.AbstractServer
+        Running server
+    """
+    compiled = compile_spec(spec)
+    loop = asyncio.get_running_loop()
+    return await loop.create_server(
+        lambda: ISO8583Protocol(compiled, framing, handler, queue_size),
+        host,
+        port,
+        **kwargs,
+    )
+
+
+async def start_loopback_server(
+    spec: SpecDict,
+    handler: Optional[Handler] = None,
+    framing: str = "b2",
+) -> asyncio.AbstractServer:
+    r"""Start a local server on a free 127.0.0.1 port for testing.
+
+    Parameters
+    ----------
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    handler : coroutine function, optional
+        Message handler. See :func:`start_server`.
+        By default, every request is answered with a response
+        that has the same fields, response message type
+        (e.g. 0200 becomes 0210) and field 39 set to ``"00"``.
+    framing : str, optional
+        Length header format (default ``"b2"``).
+        See :mod:`iso8583.stream` module.
+
+    Returns
+    -------
+    asyncio.AbstractServer
+        Running server. The port is ``server.sockets[0].getsockname()[1]``.
+    """
+    return await start_server(handler or _approve, "127.0.0.1", 0, spec, framing)
+
+
+#
+# Private interface
+#
+
+
+async def _answer_echo(
+    doc_dec: DecodedDict, doc_enc: EncodedDict
+) -> Optional[Mapping[str, str]]:
+    r"""Answer network management echo requests. Other messages are dropped."""
+    if doc_dec["t"] != "0800" or doc_dec.get("70") != "301":
+        return None
+    return await _approve(doc_dec, doc_enc)
+
+
+async def _approve(
+    doc_dec: DecodedDict, doc_enc: EncodedDict
+) -> Optional[Mapping[str, str]]:
+    r"""Answer a request with an approved response. Responses are not answered."""
+    mti = doc_dec["t"]
+    if len(mti) != 4 or not mti.isdigit() or int(mti[2]) & 1:
+        return None
+    reply = dict(doc_dec)
+    reply["t"] = mti[:2] + str(int(mti[2]) + 1) + mti[3]
+    reply["39"] = "00"
+    return reply
+
+
+def _is_response(mti: str) -> bool:
+    r"""Return True if message type is a response: its third digit is odd."""
+    return len(mti) == 4 and mti.isdigit() and int(mti[2]) & 1 == 1
@@ -0,0 +1,347 @@
+r"""Random access to ISO8583 messages stored in a length-prefixed log file.
+
+:class:`MessageLog` maps a log file into memory with :mod:`mmap` and
+indexes message boundaries. The index is saved next to the log file
+so that the log file is scanned only once. Messages are decoded
+on access and the rest of the file is not read.
+
+.. code-block:: python
+
+    >>> import os, tempfile
+    >>> import iso8583.archive
+    >>> from iso8583.specs import default_ascii as spec
+    >>> frames = [b"\x00\x14" + b"08%s0000000000000000" % b for b in (b"00", b"10")]
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     path = os.path.join(tmp, "messages.log")
+    ...     with open(path, "wb") as f:
+    ...         _ = f.write(b"".join(frames))
+    ...     with iso8583.archive.MessageLog(path, spec) as log:
+    ...         doc_dec, doc_enc = log[-1]
+    ...         len(log), doc_dec["t"]
+    (2, '0810')
+
+See :mod:`iso8583.stream` module for supported framing headers.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import (
+    Any,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
+
+from iso8583.compiler import compile_spec
+from iso8583.decoder import DecodedDict, EncodedDict, SpecDict, decode
+from iso8583.stream import _FRAMINGS
+
+__all__ = ["MessageLog"]
+
+_PathLike = Union[str, "os.PathLike[str]"]
+
+
+class MessageLog:
+    r"""Read-only log file of length-prefixed ISO8583 messages
+    with random access by message number.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Log file containing framed ISO8583 messages
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    framing : str, optional
+        Length header format (default ``"b2"``).
+        See :mod:`iso8583.stream` module.
+    index_path : str or path-like, optional
+        Index file. Defaults to `path` with ``.idx`` suffix appended.
+    persist : bool, optional
+        Save the index into `index_path` (default). The saved index
+        is loaded instead of scanning the log file again.
+
+    Attributes
+    ----------
+    spec : CompiledSpec
+        Compiled ISO8583 specification
+    framing : str
+        Length header format
+
+    Raises
+    ------
+    FramingError
+        An error decoding a length header
+    ValueError
+        Unknown framing
+    OSError
+        An error reading the log file
+
+    Notes
+    -----
+    Log files are expected to be append-only. When the log file grew
+    since the index was saved, only the new data is scanned.
+    The saved index holds a checksum of the start and the end of
+    the indexed data. The log file is scanned again if it was
+    replaced by a different file. The index is kept in memory
+    only if it cannot be saved, e.g. in a read-only directory.
+    An incomplete message at the end of the log file is not indexed.
+    The log file is mapped once. Messages appended afterwards
+    are available after the log file is opened again.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> import iso8583.archive
+    >>> from iso8583.specs import default_ascii as spec
+    >>> frame = b"\x00\x20" + b"02004000000000000000101234567890"
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     path = os.path.join(tmp, "messages.log")
+    ...     with open(path, "wb") as f:
+    ...         _ = f.write(frame * 5)
+    ...     with iso8583.archive.MessageLog(path, spec) as log:
+    ...         [doc_dec["2"] for doc_dec, _ in log[1:3]]
+    ...         log.frame(0)
+    ['1234567890', '1234567890']
+    b'02004000000000000000101234567890'
+    """
+
+    def __init__(
+        self,
+        path: _PathLike,
+        spec: SpecDict,
+        framing: str = "b2",
+        index_path: Optional[_PathLike] = None,
+        persist: bool = True,
+    ) -> None:
+        try:
+            self._header_len, self._decode_len, _ = _FRAMINGS[framing]
+        except KeyError:
+            raise ValueError(
+                f"Unknown framing {framing!r}, expecting one of {sorted(_FRAMINGS)}"
+            ) from None
+        self.spec = compile_spec(spec)
+        self.framing = framing
+        self._mm: Optional[mmap.mmap] = None
+
+        path = os.fspath(path)
+        if index_path is None:
+            index_path = path + ".idx"
+
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # Empty files cannot be mapped
+            if size:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            offsets = _load_index(index_path, framing, self._mm) if persist else None
+            if offsets is None or offsets[-1] < size:
+                offsets, saved = self._scan(offsets), offsets
+                if persist and offsets != saved:
+                    try:
+                        _save_index(index_path, framing, offsets, self._mm)
+                    except OSError:
+                        pass
+        except BaseException:
+            self.close()
+            raise
+
+        # Start of every message and the end of the last message
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, i: int) -> Tuple[DecodedDict, EncodedDict]: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[Tuple[DecodedDict, EncodedDict]]: ...
+
+    def __getitem__(
+        self, i: Union[int, slice]
+    ) -> Union[Tuple[DecodedDict, EncodedDict], List[Tuple[DecodedDict, EncodedDict]]]:
+        r"""Decode a message or a slice of messages.
+
+        Raises
+        ------
+        DecodeError
+            An error decoding ISO8583 message
+        IndexError
+            Message number is out of range
+        """
+        if isinstance(i, slice):
+            return [decode(self.frame(j), self.spec) for j in range(len(self))[i]]
+        return decode(self.frame(i), self.spec)
+
+    def __iter__(self) -> Iterator[Tuple[DecodedDict, EncodedDict]]:
+        for i in range(len(self)):
+            yield decode(self.frame(i), self.spec)
+
+    def __enter__(self) -> "MessageLog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def frame(self, i: int) -> bytes:
+        r"""Return encoded message without length header.
+
+        Parameters
+        ----------
+        i : int
+            Message number. Negative numbers count from the end.
+
+        Returns
+        -------
+        bytes
+            Encoded ISO8583 message
+
+        Raises
+        ------
+        IndexError
+            Message number is out of range
+        ValueError
+            Log file is closed
+        """
+        offsets = self._offsets
+        count = len(offsets) - 1
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError("Message number out of range")
+        if self._mm is None:
+            raise ValueError("Log file is closed")
+        return self._mm[offsets[i] + self._header_len : offsets[i + 1]]
+
+    def close(self) -> None:
+        r"""Unmap the log file."""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _scan(self, offsets: "Optional[array[int]]") -> "array[int]":
+        r"""Index messages starting from the end of the last indexed message."""
+        if offsets is None:
+            offsets = array("Q", [0])
+        else:
+            offsets = array("Q", offsets)
+
+        mm = self._mm
+        if mm is None:
+            return offsets
+
+        header_len = self._header_len
+        decode_len = self._decode_len
+        size = len(mm)
+        pos = offsets[-1]
+        while True:
+            data_pos = pos + header_len
+            if data_pos > size:
+                break
+            pos = data_pos + decode_len(mm[pos:data_pos])
+            if pos > size:
+                break
+            offsets.append(pos)
+        return offsets
+
+
+#
+# Private interface
+#
+
+# Magic, framing, size and checksum of the indexed log file data
+_INDEX_HEADER = struct.Struct("<8s8sQI")
+_INDEX_MAGIC = b"ISO8583\x02"
+# Number of bytes at the start and at the end of the indexed data
+# covered by the checksum
+_CHECKSUM_LEN = 4096
+
+
+def _load_index(
+    index_path: _PathLike, framing: str, mm: Optional[mmap.mmap]
+) -> "Optional[array[int]]":
+    r"""Load a saved index if it matches the log file.
+
+    Returns
+    -------
+    array or None
+        Message offsets or None if there is no matching index
+    """
+    try:
+        with open(index_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < _INDEX_HEADER.size:
+        return None
+    magic, index_framing, indexed_size, checksum = _INDEX_HEADER.unpack_from(data)
+    body = data[_INDEX_HEADER.size :]
+    if (
+        magic != _INDEX_MAGIC
+        or index_framing.rstrip(b"\x00") != framing.encode()
+        or indexed_size > (len(mm) if mm is not None else 0)
+        or not body
+        or len(body) % 8
+        or checksum != _checksum(mm, indexed_size)
+    ):
+        # Wrong format or the log file was replaced by a different one
+        return None
+
+    offsets = array("Q")
+    offsets.frombytes(body)
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    if offsets[0] != 0 or offsets[-1] != indexed_size:
+        return None
+    return offsets
+
+
+def _save_index(
+    index_path: _PathLike,
+    framing: str,
+    offsets: "array[int]",
+    mm: Optional[mmap.mmap],
+) -> None:
+    r"""Save index atomically so that a reader never sees a partial index."""
+    body = array("Q", offsets)
+    if sys.byteorder == "big":
+        body.byteswap()
+    index_path = os.fspath(index_path)
+    tmp_path = index_path + ".tmp"
+    indexed_size = offsets[-1]
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(
+                _INDEX_HEADER.pack(
+                    _INDEX_MAGIC,
+                    framing.encode(),
+                    indexed_size,
+                    _checksum(mm, indexed_size),
+                )
+            )
+            f.write(body.tobytes())
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _checksum(mm: Optional[mmap.mmap], size: int) -> int:
+    r"""CRC-32 of the start and the end of the first `size` bytes of the log file."""
+    if mm is None or size == 0:
+        return 0
+    crc = zlib.crc32(mm[: min(size, _CHECKSUM_LEN)])
+    return zlib.crc32(mm[max(size - _CHECKSUM_LEN, 0) : size], crc)
@@ -0,0 +1,625 @@
+r"""Decode a batch of ISO8583 messages into per-field columns.
+
+:func:`to_columns` decodes selected fields of every message into
+a :class:`Column` per field. A column stores decoded field data of all
+messages in one UTF-8 buffer instead of a dict per message.
+
+Fixed length fields whose data is always the same number of bytes are stored
+back to back without offsets. Such columns can be viewed as fixed-width
+NumPy arrays without copying. Other fields are stored with an array of
+offsets into the data buffer.
+
+.. code-block:: python
+
+    >>> import iso8583
+    >>> import iso8583.columnar
+    >>> from iso8583.specs import default_ascii as spec
+    >>> messages = [
+    ...     iso8583.encode({"t": "0200", "2": "4444555566667777", "4": "000000001500"}, spec)[0],
+    ...     iso8583.encode({"t": "0200", "2": "1234567890"}, spec)[0],
+    ... ]
+    >>> columns = iso8583.columnar.to_columns(messages, spec, ["2", "4"])
+    >>> columns["4"].width, columns["4"].data
+    (12, b'000000001500\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+    >>> columns["4"].to_list()
+    ['000000001500', None]
+    >>> columns["2"].width, columns["2"].offsets.tolist()
+    (0, [0, 16, 26])
+
+:func:`to_arrays` decodes a batch into NumPy arrays directly. Messages that
+share the same layout are decoded together with vectorized NumPy operations.
+
+:meth:`Column.to_numpy` and :func:`to_arrays` require NumPy.
+NumPy is not required otherwise.
+"""
+
+import functools
+from array import array
+from itertools import accumulate
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from iso8583.compiler import CompiledField, compile_spec
+from iso8583.decoder import (
+    DecodeError,
+    SpecDict,
+    _decode,
+    _decode_preamble,
+    _skip_field,
+)
+
+__all__ = ["to_columns", "to_arrays", "Column"]
+
+
+class Column(NamedTuple):
+    r"""Decoded data of a single field across a batch of messages.
+
+    Attributes
+    ----------
+    key : str
+        Field ID
+    width : int
+        Number of bytes taken by every value in `data` or 0 if values
+        have different length and are located by `offsets`.
+    data : bytes
+        UTF-8 encoded field data of all messages back to back.
+        A fixed width value of a message without the field is filled
+        with zero bytes.
+    offsets : array
+        Signed 64-bit array of start offsets of values in `data` followed
+        by the end of the last value. Empty if `width` is not 0.
+    present : bytes
+        One byte per message: 1 if the message contains the field, 0 otherwise.
+    """
+
+    key: str
+    width: int
+    data: bytes
+    offsets: "array[int]"
+    present: bytes
+
+    def to_list(self) -> List[Optional[str]]:
+        r"""Return field data of every message as a list.
+
+        Returns
+        -------
+        list
+            Decoded field data or None if the message does not contain the field
+        """
+        data = self.data
+        width = self.width
+        if width:
+            return [
+                data[i * width : (i + 1) * width].decode() if present else None
+                for i, present in enumerate(self.present)
+            ]
+        offsets = self.offsets
+        return [
+            data[offsets[i] : offsets[i + 1]].decode() if present else None
+            for i, present in enumerate(self.present)
+        ]
+
+    def to_numpy(self, dtype: Any = None) -> Any:
+        r"""Return field data of every message as a NumPy array.
+
+        Parameters
+        ----------
+        dtype : data-type, optional
+            Data type to convert field data to, e.g. ``"int64"`` for
+            numeric fields. A message without the field gets 0.
+            By default, a unicode string array is returned where
+            a message without the field gets an empty string.
+
+        Returns
+        -------
+        numpy.ndarray
+            Field data of every message. Use ``numpy.frombuffer(column.present, bool)``
+            to tell empty field data from a missing field.
+
+        Raises
+        ------
+        ImportError
+            NumPy is not installed
+        ValueError
+            Field data cannot be converted to `dtype`
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("Column.to_numpy() requires NumPy") from e
+
+        if self.width:
+            # Zero-copy view of fixed width values
+            values = np.frombuffer(self.data, dtype=f"S{self.width}")
+        else:
+            data = self.data
+            offsets = self.offsets
+            values = np.array(
+                [data[offsets[i] : offsets[i + 1]] for i in range(len(self.present))],
+                dtype=bytes,
+            )
+
+        if dtype is None:
+            return np.char.decode(values, "utf-8")
+        present = np.frombuffer(self.present, dtype=bool)
+        return np.where(present, values, b"0").astype(dtype)
+
+
+def to_columns(
+    messages: Iterable[Union[bytes, bytearray]],
+    spec: SpecDict,
+    fields: Sequence[str],
+) -> Dict[str, Column]:
+    r"""Decode selected fields of a batch of ISO8583 messages into columns.
+
+    Parameters
+    ----------
+    messages : iterable of bytes or bytearray
+        Encoded ISO8583 messages
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        The specification is compiled once with :func:`iso8583.compile_spec`.
+    fields : sequence of str
+        Keys of fields to decode, e.g. ``["t", "4", "7", "11"]``.
+        Other fields are validated and skipped.
+
+    Returns
+    -------
+    dict
+        Dict of field keys to :class:`Column` in the order of `fields`
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 message
+    TypeError
+        A message must be a bytes or bytearray instance
+
+    Notes
+    -----
+    Fixed length fields (``len_type`` 0) are stored with a fixed `width`
+    when every value takes ``max_len`` bytes, or twice as many for binary
+    fields that decode into hex strings. Values of text fields that are not
+    ASCII can take a different number of bytes in UTF-8. In that case the
+    column is stored with offsets.
+    """
+    compiled = compile_spec(spec)
+    fields_spec = compiled.fields
+    wanted = {field_key: i for i, field_key in enumerate(fields)}
+    wanted_set = frozenset(wanted)
+    columns: List[List[Optional[bytes]]] = [[] for _ in wanted]
+
+    for s in messages:
+        if not isinstance(s, (bytes, bytearray)):
+            raise TypeError(
+                f"Encoded ISO8583 data must be bytes or bytearray, not {s.__class__.__name__}"
+            )
+
+        row = _decode_row(s, fields_spec, wanted)
+        if row is None:
+            # Let the regular decoder report the error along with partial data
+            doc_dec, _ = _decode(s, compiled, wanted_set)
+            row = [None] * len(wanted)
+            for field_key, field_data in doc_dec.items():
+                row[wanted[field_key]] = field_data.encode()
+
+        for column, value in zip(columns, row):
+            column.append(value)
+
+    return {
+        field_key: _build_column(field_key, fields_spec.get(field_key), column)
+        for field_key, column in zip(wanted, columns)
+    }
+
+
+def to_arrays(
+    messages: Iterable[Union[bytes, bytearray]],
+    spec: SpecDict,
+    fields: Sequence[str],
+) -> Dict[str, Any]:
+    r"""Decode selected fields of a batch of ISO8583 messages into NumPy arrays.
+
+    Messages are grouped by length, header, message type and primary bitmap.
+    Within a group, messages with the same bitmaps and field lengths share
+    field boundaries. Their field data is sliced out of a two-dimensional
+    array of all messages at once instead of being decoded message by message.
+
+    Parameters
+    ----------
+    messages : iterable of bytes or bytearray
+        Encoded ISO8583 messages
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        The specification is compiled once with :func:`iso8583.compile_spec`.
+    fields : sequence of str
+        Keys of fields to decode, e.g. ``["t", "4", "7", "11"]``.
+
+    Returns
+    -------
+    dict
+        Dict of field keys to ``numpy.ma.MaskedArray`` of unicode strings
+        in the order of `fields`. A message without the field is masked.
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 message
+    TypeError
+        A message must be a bytes or bytearray instance
+    ImportError
+        NumPy is not installed
+
+    Notes
+    -----
+    Binary fields and fields with a text encoding known to NumPy are
+    decoded with vectorized operations. Messages with fields measured
+    in nibbles or data that fails to decode are decoded one by one.
+    So are messages with rare layouts.
+
+    NumPy strings cannot end with zero characters. Trailing ``"\\x00"``
+    characters of field data are dropped.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> import iso8583.columnar
+    >>> from iso8583.specs import default_ascii as spec
+    >>> messages = [
+    ...     iso8583.encode({"t": "0200", "4": f"{i:012d}", "11": f"{i:06d}"}, spec)[0]
+    ...     for i in range(1, 4)
+    ... ]
+    >>> arrays = iso8583.columnar.to_arrays(messages, spec, ["4", "11", "39"])
+    >>> arrays["4"].astype("int64").tolist()
+    [1, 2, 3]
+    >>> arrays["39"].mask.tolist()
+    [True, True, True]
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("to_arrays() requires NumPy") from e
+
+    compiled = compile_spec(spec)
+    fields_spec = compiled.fields
+    wanted = list(dict.fromkeys(fields))
+    wanted_set = frozenset(wanted)
+    messages = list(messages)
+    for s in messages:
+        if not isinstance(s, (bytes, bytearray)):
+            raise TypeError(
+                f"Encoded ISO8583 data must be bytes or bytearray, not {s.__class__.__name__}"
+            )
+
+    # Group by message length and everything up to the end of primary bitmap
+    prefix_len = _fixed_prefix_len(fields_spec)
+    groups: Dict[Tuple[int, bytes], List[int]] = {}
+    for i, s in enumerate(messages):
+        groups.setdefault((len(s), bytes(s[:prefix_len])), []).append(i)
+
+    pieces: Dict[str, List[Tuple[Any, Any]]] = {key: [] for key in wanted}
+    slow: List[int] = []
+    for (msg_len, _), group in groups.items():
+        rows = np.array(group, dtype=np.intp)
+        data = np.frombuffer(
+            b"".join([messages[i] for i in group]), dtype=np.uint8
+        ).reshape(len(group), msg_len)
+        slow += _decode_group(messages, compiled, wanted_set, rows, data, pieces)
+
+    slow_values: Dict[str, Tuple[List[int], List[str]]] = {
+        key: ([], []) for key in wanted
+    }
+    for i in sorted(slow):
+        doc_dec, _ = _decode(messages[i], compiled, wanted_set)
+        for key, value in doc_dec.items():
+            slow_values[key][0].append(i)
+            slow_values[key][1].append(value)
+
+    arrays: Dict[str, Any] = {}
+    for key in wanted:
+        slow_rows, slow_data = slow_values[key]
+        if slow_rows:
+            pieces[key].append(
+                (np.array(slow_rows, dtype=np.intp), np.array(slow_data, dtype=str))
+            )
+        width = max([values.dtype.itemsize // 4 for _, values in pieces[key]] + [1])
+        out = np.zeros(len(messages), dtype=f"U{width}")
+        mask = np.ones(len(messages), dtype=bool)
+        for rows, values in pieces[key]:
+            out[rows] = values
+            mask[rows] = False
+        arrays[key] = np.ma.MaskedArray(out, mask)
+    return arrays
+
+
+#
+# Private interface
+#
+
+
+def _decode_row(
+    s: Union[bytes, bytearray],
+    fields_spec: Mapping[str, CompiledField],
+    wanted: Dict[str, int],
+) -> Optional[List[Optional[bytes]]]:
+    r"""Decode wanted fields of a message into UTF-8 values.
+
+    Returns
+    -------
+    list or None
+        UTF-8 encoded field data in order of wanted fields or None
+        if the message is invalid or needs the regular decoder
+    """
+    row: List[Optional[bytes]] = [None] * len(wanted)
+    doc_dec: Dict[str, str] = {}
+    try:
+        idx, field_keys = _decode_preamble(s, doc_dec, {}, fields_spec)
+    except DecodeError:
+        return None
+
+    # Header, message type and bitmaps are decoded by the preamble
+    for field_key, field_data in doc_dec.items():
+        if field_key in wanted:
+            row[wanted[field_key]] = field_data.encode()
+
+    s_len = len(s)
+    try:
+        for field_key in field_keys:
+            field = fields_spec[field_key]
+            data_idx = idx + field.len_type
+            if data_idx > s_len:
+                return None
+
+            enc_field_len = field.decode_len(s[idx:data_idx])
+            if enc_field_len > field.max_len:
+                return None
+
+            if field.nibbles:
+                # Odd nibble fields need pad removal
+                if field_key in wanted:
+                    return None
+                idx = data_idx + (enc_field_len + 1) // 2
+            else:
+                idx = data_idx + enc_field_len
+            if idx > s_len:
+                return None
+
+            if field_key in wanted:
+                data = bytes(s[data_idx:idx])
+                if field.data_enc != "ascii" or not data.isascii():
+                    data = field.decode_data(data).encode()
+                row[wanted[field_key]] = data
+    except Exception:
+        return None
+
+    if idx != s_len:
+        return None
+
+    return row
+
+
+def _build_column(
+    field_key: str, field: Optional[CompiledField], values: List[Optional[bytes]]
+) -> Column:
+    r"""Pack field values of all messages into a column."""
+    present = bytes(value is not None for value in values)
+
+    width = 0
+    if field is not None and field.len_type == 0 and not field.nibbles:
+        width = field.max_len * 2 if field.binary else field.max_len
+        if any(value is not None and len(value) != width for value in values):
+            width = 0
+
+    if width:
+        blank = bytes(width)
+        data = b"".join(blank if value is None else value for value in values)
+        return Column(field_key, width, data, array("q"), present)
+
+    chunks = [b"" if value is None else value for value in values]
+    offsets = array("q", [0])
+    offsets.extend(accumulate(len(chunk) for chunk in chunks))
+    return Column(field_key, 0, b"".join(chunks), offsets, present)
+
+
+# Text encodings decoded by widening bytes into Unicode code points
+_SINGLE_BYTE_ENCODINGS = frozenset(("ascii", "latin-1", "latin_1", "iso-8859-1"))
+
+# Maximum number of distinct layouts decoded together within one group
+_MAX_LAYOUTS = 16
+
+
+def _fixed_prefix_len(fields_spec: Mapping[str, CompiledField]) -> int:
+    r"""Return length of header, message type and primary bitmap
+    if all of them are fixed length. Otherwise, return 0."""
+    prefix_len = 0
+    for key in ("h", "t", "p"):
+        field = fields_spec.get(key)
+        if field is None:
+            continue
+        if field.len_type != 0 or field.nibbles:
+            return 0
+        prefix_len += field.max_len
+    return prefix_len
+
+
+def _decode_group(
+    messages: List[Union[bytes, bytearray]],
+    compiled: Any,
+    wanted: FrozenSet[str],
+    rows: Any,
+    data: Any,
+    pieces: Dict[str, List[Tuple[Any, Any]]],
+) -> List[int]:
+    r"""Decode messages of the same length with vectorized operations.
+
+    Parameters
+    ----------
+    rows : numpy.ndarray
+        Message numbers of the group
+    data : numpy.ndarray
+        Two-dimensional array of group messages, one message per row
+    pieces : dict
+        Decoded field data is added to it as pairs of message numbers
+        and unicode arrays
+
+    Returns
+    -------
+    list
+        Message numbers that must be decoded one by one
+    """
+    import numpy as np
+
+    fields_spec = compiled.fields
+    slow: List[int] = []
+    remaining = np.arange(len(rows))
+    for _ in range(_MAX_LAYOUTS):
+        if not remaining.size:
+            return slow
+
+        rep = rows[remaining[0]]
+        located = _locate_fields(messages[rep], fields_spec)
+        if located is None:
+            # Let the slow path report the error the same way as to_columns()
+            slow.append(int(rep))
+            remaining = remaining[1:]
+            continue
+        layout, structure, doc_dec = located
+
+        group = data[remaining]
+        if structure:
+            cols = np.array(structure, dtype=np.intp)
+            match = (group[:, cols] == data[remaining[0], cols]).all(axis=1)
+        else:
+            match = np.ones(len(remaining), dtype=bool)
+
+        decoded = _decode_layout(fields_spec, wanted, layout, doc_dec, group[match])
+        if decoded is None:
+            slow += [int(i) for i in rows[remaining[match]]]
+            remaining = remaining[~match]
+            continue
+
+        matched_rows = rows[remaining[match]]
+        for key, values in decoded.items():
+            pieces[key].append((matched_rows, values))
+        remaining = remaining[~match]
+
+    return slow + [int(i) for i in rows[remaining]]
+
+
+def _locate_fields(
+    s: Union[bytes, bytearray], fields_spec: Mapping[str, CompiledField]
+) -> Optional[Tuple[List[Tuple[str, int, int]], List[int], Dict[str, str]]]:
+    r"""Locate field data of a message without decoding fields
+    other than header, message type and bitmaps.
+
+    Returns
+    -------
+    tuple or None
+        Field keys with data start and end, positions of bytes that define
+        the layout (bitmaps and field lengths) and decoded header, message
+        type and bitmaps. None if the message is invalid.
+    """
+    doc_dec: Dict[str, str] = {}
+    doc_enc: Dict[str, Dict[str, bytes]] = {}
+    layout: List[Tuple[str, int, int]] = []
+    structure: List[int] = []
+    try:
+        idx, field_keys = _decode_preamble(s, doc_dec, doc_enc, fields_spec)
+        pos = 0
+        for key, enc in doc_enc.items():
+            len_end = pos + len(enc["len"])
+            end = len_end + len(enc["data"])
+            structure.extend(range(pos, len_end))
+            if key in ("p", "1"):
+                structure.extend(range(len_end, end))
+            layout.append((key, len_end, end))
+            pos = end
+
+        for key in field_keys:
+            data_idx, byte_field_len, _ = _skip_field(
+                s, doc_dec, doc_enc, idx, fields_spec[key]
+            )
+            structure.extend(range(idx, data_idx))
+            idx = data_idx + byte_field_len
+            layout.append((key, data_idx, idx))
+    except DecodeError:
+        return None
+
+    if idx != len(s):
+        return None
+    return layout, structure, doc_dec
+
+
+def _decode_layout(
+    fields_spec: Mapping[str, CompiledField],
+    wanted: FrozenSet[str],
+    layout: List[Tuple[str, int, int]],
+    doc_dec: Dict[str, str],
+    data: Any,
+) -> Optional[Dict[str, Any]]:
+    r"""Slice and decode wanted fields of messages with the same layout.
+
+    Returns
+    -------
+    dict or None
+        Dict of field keys to unicode arrays or None if the messages
+        must be decoded one by one
+    """
+    import numpy as np
+
+    decoded: Dict[str, Any] = {}
+    count = len(data)
+    for key, start, end in layout:
+        if key not in wanted:
+            continue
+
+        field = fields_spec[key]
+        width = end - start
+        if key in ("p", "1") or width == 0:
+            # Bitmaps are the same in all messages
+            decoded[key] = np.full(count, doc_dec.get(key, ""))
+            continue
+        if field.nibbles:
+            return None
+
+        chunk = np.ascontiguousarray(data[:, start:end])
+        if field.binary:
+            hex_chunk = np.ascontiguousarray(_hex_table()[chunk])
+            decoded[key] = hex_chunk.view(f"S{width * 2}").reshape(count)
+            decoded[key] = decoded[key].astype(f"U{width * 2}")
+            continue
+
+        if field.data_enc in _SINGLE_BYTE_ENCODINGS:
+            if field.data_enc == "ascii" and (chunk > 127).any():
+                return None
+            # Bytes of these encodings are equal to Unicode code points
+            decoded[key] = chunk.astype("<u4").view(f"<U{width}").reshape(count)
+            continue
+        try:
+            decoded[key] = np.char.decode(
+                chunk.view(f"S{width}").reshape(count), field.data_enc
+            )
+        except (LookupError, UnicodeError):
+            return None
+
+    return decoded
+
+
+@functools.lru_cache(maxsize=None)
+def _hex_table() -> Any:
+    r"""Return a table of upper case hex digit pairs for every byte value."""
+    import numpy as np
+
+    return np.frombuffer(b"".join(b"%02X" % byte for byte in range(256)), dtype="S2")
@@ -0,0 +1,706 @@
+r"""Compile an ISO8583 specification into a form that is faster to use.
+
+A specification is a plain Python ``dict`` (see :mod:`iso8583.specs`).
+Every time :func:`iso8583.decode` or :func:`iso8583.encode` processes
+a field it has to look up and interpret the same field properties.
+:func:`iso8583.compile_spec` does that work once and returns
+an immutable :class:`CompiledSpec` that can be passed to
+:func:`iso8583.decode`, :func:`iso8583.encode` and :func:`iso8583.pp`
+in place of the original specification.
+
+.. code-block:: python
+
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii
+    >>> spec = iso8583.compile_spec(default_ascii)
+    >>> doc_dec, doc_enc = iso8583.decode(b"02004000000000000000101234567890", spec)
+    >>> doc_dec["2"]
+    '1234567890'
+
+The compiled specification takes a snapshot of the original specification.
+Changes made to the original specification afterwards are not reflected
+in the compiled specification.
+"""
+
+import binascii
+import copy
+import functools
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Hashable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+__all__ = [
+    "compile_spec",
+    "CompiledSpec",
+    "CompiledField",
+    "CompiledSubfields",
+    "CacheInfo",
+]
+
+SpecDict = Mapping[str, Mapping[str, Any]]
+_FieldSpecDict = Mapping[str, Any]
+_BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class CompiledField(NamedTuple):
+    r"""Immutable, pre-processed specification of a single ISO8583 field.
+
+    Attributes
+    ----------
+    key : str
+        Field ID
+    data_enc : str
+        Field data encoding type
+    len_enc : str
+        Field length encoding type
+    len_type : int
+        Number of bytes in field length
+    max_len : int
+        Field maximum length in bytes or nibbles
+    len_count : str
+        Either ``bytes`` or ``nibbles``
+    binary : bool
+        True if field data is binary or BCD
+    nibbles : bool
+        True if field length is measured in nibbles
+    left_pad : str
+        Left pad character of an odd binary field or empty string
+    right_pad : str
+        Right pad character of an odd binary field or empty string
+    decode_len : callable
+        Converts encoded field length into an integer
+    encode_len : callable
+        Converts an integer into encoded field length
+    decode_data : callable
+        Converts encoded field data into a string
+    encode_data : callable
+        Converts a string into encoded field data and its length
+    subfields : CompiledSubfields or None
+        Compiled subfields of a composite field
+    """
+
+    key: str
+    data_enc: str
+    len_enc: str
+    len_type: int
+    max_len: int
+    len_count: str
+    binary: bool
+    nibbles: bool
+    left_pad: str
+    right_pad: str
+    decode_len: Callable[[_BytesLike], int]
+    encode_len: Callable[[int], bytes]
+    decode_data: Callable[[_BytesLike], str]
+    encode_data: Callable[[str], Tuple[bytes, int]]
+    subfields: "Optional[CompiledSubfields]" = None
+
+
+class CompiledSubfields(NamedTuple):
+    r"""Immutable, pre-processed subfield specification of a composite field.
+
+    Attributes
+    ----------
+    format : str
+        Subfield layout: ``fixed``, ``tlv`` or ``bitmap``
+    fields : dict
+        Read-only mapping of subfield IDs to :class:`CompiledField`
+    tag_len : int
+        Number of bytes in subfield tag of ``tlv`` layout
+    tag_enc : str
+        Subfield tag encoding type of ``tlv`` layout
+    """
+
+    format: str
+    fields: Mapping[str, CompiledField]
+    tag_len: int
+    tag_enc: str
+
+
+class CacheInfo(NamedTuple):
+    r"""Layout cache statistics of a :class:`CompiledSpec`.
+
+    Attributes
+    ----------
+    hits : int
+        Number of bitmaps found in the cache
+    misses : int
+        Number of bitmaps not found in the cache
+    maxsize : int
+        Maximum number of cached bitmaps
+    currsize : int
+        Current number of cached bitmaps
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class CompiledSpec(Mapping[str, _FieldSpecDict]):
+    r"""Immutable ISO8583 specification produced by :func:`compile_spec`.
+
+    It is a read-only mapping with the same keys and field
+    properties as the specification it was compiled from.
+    Compiled fields are available in :attr:`fields`.
+    """
+
+    __slots__ = ("_spec", "_fields", "_layouts")
+
+    def __init__(self, spec: SpecDict, layout_cache_size: int = 0):
+        self._spec: Dict[str, _FieldSpecDict] = {}
+        self._fields: Dict[str, CompiledField] = {}
+        for key, field_spec in spec.items():
+            self._spec[key] = MappingProxyType(dict(field_spec))
+            self._fields[key] = _compile_field(key, field_spec)
+        self._layouts = (
+            _LayoutCache(layout_cache_size) if layout_cache_size > 0 else None
+        )
+
+    def __getitem__(self, key: str) -> _FieldSpecDict:
+        return self._spec[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._spec)
+
+    def __len__(self) -> int:
+        return len(self._spec)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} fields={len(self._spec)}>"
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, Dict[str, Any]], int]]:
+        # Compiled fields hold closures that cannot be pickled.
+        # Recompile them from the field properties instead.
+        # Cached layouts are not carried over.
+        return self.__class__, (
+            {k: dict(v) for k, v in self._spec.items()},
+            self._layouts.maxsize if self._layouts is not None else 0,
+        )
+
+    @property
+    def fields(self) -> Mapping[str, CompiledField]:
+        r"""Read-only mapping of field IDs to :class:`CompiledField`."""
+        return MappingProxyType(self._fields)
+
+    def cache_info(self) -> CacheInfo:
+        r"""Return layout cache statistics.
+
+        Returns
+        -------
+        CacheInfo
+            Hits, misses, maximum and current size of the layout cache.
+            All zeros if the layout cache is disabled.
+        """
+        layouts = self._layouts
+        if layouts is None:
+            return CacheInfo(0, 0, 0, 0)
+        return CacheInfo(
+            layouts.hits, layouts.misses, layouts.maxsize, len(layouts.data)
+        )
+
+    def cache_clear(self) -> None:
+        r"""Clear the layout cache and its statistics."""
+        layouts = self._layouts
+        if layouts is not None:
+            layouts.data.clear()
+            layouts.hits = layouts.misses = 0
+
+
+def compile_spec(spec: SpecDict, layout_cache_size: int = 0) -> CompiledSpec:
+    r"""Compile ISO8583 specification.
+
+    Parameters
+    ----------
+    spec : dict
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    layout_cache_size : int, optional
+        Maximum number of bitmaps to remember (default 0, disabled).
+        Decoding a bitmap seen before skips decoding it and looking up
+        fields it enables. Encoding a dict with the same keys as before
+        skips building the bitmap. Use :meth:`CompiledSpec.cache_info`
+        to find out how effective the cache is.
+
+    Returns
+    -------
+    CompiledSpec
+        Immutable compiled specification. It can be used in place of
+        `spec` with :func:`iso8583.decode`, :func:`iso8583.encode`
+        and :func:`iso8583.pp`.
+
+    Raises
+    ------
+    KeyError
+        A field is missing a mandatory property
+
+    Notes
+    -----
+    Unknown or invalid encodings are not reported during compilation.
+    They are reported by :func:`iso8583.decode` or :func:`iso8583.encode`
+    the same way as if the original specification was used.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii
+    >>> spec = iso8583.compile_spec(default_ascii)
+    >>> s, doc_enc = iso8583.encode({"t": "0210", "39": "00"}, spec)
+    >>> s
+    bytearray(b'0210000000000200000000')
+    """
+    if isinstance(spec, CompiledSpec):
+        return spec
+    return CompiledSpec(spec, layout_cache_size)
+
+
+def _compile_field(key: str, field_spec: _FieldSpecDict) -> CompiledField:
+    r"""Compile specification of a single ISO8583 field.
+
+    Parameters
+    ----------
+    key : str
+        Field ID
+    field_spec : dict
+        A Python dict defining ISO8583 specification for this field.
+        See :mod:`iso8583.specs` module for examples.
+
+    Returns
+    -------
+    CompiledField
+        Immutable compiled field specification
+
+    Raises
+    ------
+    KeyError
+        The field is missing a mandatory property
+    """
+    len_type: int = field_spec["len_type"]
+    field = _make_field(
+        key,
+        field_spec["data_enc"],
+        # Length encoding makes no difference for fixed length fields.
+        field_spec["len_enc"] if len_type > 0 else field_spec.get("len_enc", ""),
+        len_type,
+        field_spec["max_len"],
+        # Optional field added in v2.1. Prior specs do not have it.
+        field_spec.get("len_count", "bytes"),
+        field_spec.get("left_pad", ""),
+        field_spec.get("right_pad", ""),
+    )
+    if "subfields" in field_spec:
+        # Subfield specifications are not hashable and bypass the shared cache
+        field = field._replace(subfields=_compile_subfields(field_spec))
+    return field
+
+
+def _compile_subfields(field_spec: _FieldSpecDict) -> CompiledSubfields:
+    r"""Compile subfield specification of a composite ISO8583 field.
+
+    Parameters
+    ----------
+    field_spec : dict
+        A Python dict defining ISO8583 specification for this field.
+        See :mod:`iso8583.specs` module for examples.
+
+    Returns
+    -------
+    CompiledSubfields
+        Immutable compiled subfield specification
+
+    Raises
+    ------
+    KeyError
+        A subfield is missing a mandatory property
+    """
+    return CompiledSubfields(
+        field_spec.get("subfield_format", "fixed"),
+        MappingProxyType(
+            {
+                key: _compile_field(key, subfield_spec)
+                for key, subfield_spec in field_spec["subfields"].items()
+            }
+        ),
+        field_spec.get("subfield_tag_len", 2),
+        field_spec.get("subfield_tag_enc", "ascii"),
+    )
+
+
+# Plain dict specifications are compiled field by field on first use.
+# Fields with identical properties share one compiled instance.
+@functools.lru_cache(maxsize=4096)
+def _make_field(
+    key: str,
+    data_enc: str,
+    len_enc: str,
+    len_type: int,
+    max_len: int,
+    len_count: str,
+    left_pad: str,
+    right_pad: str,
+) -> CompiledField:
+    nibbles = len_count == "nibbles"
+    binary = data_enc == "b"
+    left_pad = left_pad[:1]
+    right_pad = right_pad[:1]
+
+    decode_len: Callable[[_BytesLike], int]
+    encode_len: Callable[[int], bytes]
+    decode_data: Callable[[_BytesLike], str]
+    encode_data: Callable[[str], Tuple[bytes, int]]
+
+    if len_type == 0:
+        decode_len = _decode_len_fixed(max_len)
+        encode_len = _encode_len_fixed
+    elif len_enc == "b":
+        decode_len = _decode_len_binary
+        encode_len = _encode_len_binary(len_type)
+    elif len_enc == "bcd":
+        decode_len = _decode_len_bcd
+        encode_len = _encode_len_bcd(len_type)
+    else:
+        decode_len = _decode_len_text(len_enc)
+        encode_len = _encode_len_text(len_type, len_enc)
+
+    if binary:
+        decode_data = _decode_data_binary
+        # Left pad takes precedence over the right pad.
+        encode_data = _encode_data_binary(
+            nibbles, left_pad, "" if left_pad else right_pad
+        )
+    else:
+        decode_data = _decode_data_text(data_enc)
+        encode_data = _encode_data_text(data_enc, nibbles)
+
+    return CompiledField(
+        key,
+        data_enc,
+        len_enc,
+        len_type,
+        max_len,
+        len_count,
+        binary,
+        nibbles,
+        left_pad,
+        right_pad,
+        decode_len,
+        encode_len,
+        decode_data,
+        encode_data,
+    )
+
+
+class _CodecError(Exception):
+    r"""Raised by compiled field codecs.
+    Callers convert it into :class:`iso8583.DecodeError`
+    or :class:`iso8583.EncodeError` with message `args[0]`."""
+
+
+# Fields compiled from plain dict specifications: field key mapped to
+# the field specification, a copy of it and the compiled field.
+_CompiledFields = Dict[str, Tuple[_FieldSpecDict, Dict[str, Any], CompiledField]]
+
+# Plain dict specifications are not hashable and cannot be weakly
+# referenced, so they are cached by id() and hold a reference to
+# the specification to make sure the id is not reused.
+_SPEC_CACHE_SIZE = 64
+_spec_cache: Dict[int, Tuple[SpecDict, _CompiledFields]] = {}
+
+
+class _FieldCache(Dict[str, CompiledField]):
+    r"""Compiles fields of a plain dict specification on first use.
+
+    This lets :func:`iso8583.decode` and :func:`iso8583.encode` share
+    one implementation for plain and compiled specifications without
+    paying for compilation of fields that are not present in a message.
+
+    Fields compiled by earlier calls with the same specification are
+    reused as long as the field specification is unchanged.
+    """
+
+    __slots__ = ("_spec", "_compiled")
+
+    def __init__(self, spec: SpecDict, compiled: _CompiledFields):
+        super().__init__()
+        self._spec = spec
+        self._compiled = compiled
+
+    def __missing__(self, key: str) -> CompiledField:
+        field_spec = self._spec[key]
+        entry = self._compiled.get(key)
+        if entry is None or entry[0] is not field_spec or entry[1] != field_spec:
+            entry = (field_spec, _snapshot(field_spec), _compile_field(key, field_spec))
+            self._compiled[key] = entry
+        field = self[key] = entry[2]
+        return field
+
+
+def _snapshot(field_spec: _FieldSpecDict) -> Dict[str, Any]:
+    r"""Copy a field specification to detect later modifications."""
+    if "subfields" in field_spec:
+        return copy.deepcopy(dict(field_spec))
+    return dict(field_spec)
+
+
+def _get_fields(spec: SpecDict) -> Mapping[str, CompiledField]:
+    r"""Return compiled fields of a plain or compiled specification."""
+    if isinstance(spec, CompiledSpec):
+        return spec._fields
+    entry = _spec_cache.get(id(spec))
+    if entry is None or entry[0] is not spec:
+        if len(_spec_cache) >= _SPEC_CACHE_SIZE:
+            _spec_cache.clear()
+        entry = _spec_cache[id(spec)] = (spec, {})
+    return _FieldCache(spec, entry[1])
+
+
+class _LayoutCache:
+    r"""Bounded least recently used cache of bitmap layouts.
+
+    Keys and values are provided by the decoder and the encoder.
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "data")
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        r"""Return a cached value or None."""
+        value = self.data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            self.data.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread
+            pass
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        data = self.data
+        data[key] = value
+        if len(data) > self.maxsize:
+            try:
+                data.popitem(last=False)
+            except KeyError:
+                pass
+
+
+def _get_layouts(spec: SpecDict) -> Optional[_LayoutCache]:
+    r"""Return layout cache of a compiled specification if enabled."""
+    if isinstance(spec, CompiledSpec):
+        return spec._layouts
+    return None
+
+
+#
+# Length codecs
+#
+
+
+def _decode_len_fixed(max_len: int) -> Callable[[_BytesLike], int]:
+    def decode_len(data: _BytesLike) -> int:
+        return max_len
+
+    return decode_len
+
+
+def _encode_len_fixed(enc_field_len: int) -> bytes:
+    return b""
+
+
+def _decode_len_binary(data: _BytesLike) -> int:
+    try:
+        return int.from_bytes(data, "big", signed=False)
+    # It does not seem to be possible to hit this unless
+    # it's a type or input parameter error.
+    # However, keeping this, because you just never know.
+    except Exception as e:  # pragma: no cover
+        raise _CodecError(f"Failed to decode field length, {e}") from None
+
+
+def _decode_len_bcd(data: _BytesLike) -> int:
+    try:
+        return int(data.hex(), 10)
+    except Exception:
+        raise _CodecError("Failed to decode field length, invalid BCD data") from None
+
+
+def _decode_len_text(len_enc: str) -> Callable[[_BytesLike], int]:
+    def decode_len(data: _BytesLike) -> int:
+        try:
+            # memoryview has no decode(). str() is slower for bytes.
+            if data.__class__ is memoryview:
+                decoded_length = str(data, len_enc)
+            else:
+                decoded_length = data.decode(len_enc)  # type: ignore[union-attr]
+        except LookupError:
+            raise _CodecError(
+                "Failed to decode field length, unknown encoding specified"
+            ) from None
+        except Exception:
+            raise _CodecError("Failed to decode field length, invalid data") from None
+
+        try:
+            return int(decoded_length)
+        except Exception:
+            raise _CodecError(
+                "Failed to decode field length, non-numeric data"
+            ) from None
+
+    return decode_len
+
+
+def _encode_len_binary(len_type: int) -> Callable[[int], bytes]:
+    def encode_len(enc_field_len: int) -> bytes:
+        try:
+            return enc_field_len.to_bytes(len_type, "big", signed=False)
+        except OverflowError:
+            raise _CodecError(
+                "Failed to encode field length, field length does not fit into configured field size"
+            ) from None
+
+    return encode_len
+
+
+def _encode_len_bcd(len_type: int) -> Callable[[int], bytes]:
+    # Odd field length type is not allowed when translating string BCD. Pad it, e.g.:
+    # BCD LVAR length \x09 must be string "09"
+    # BCD LLVAR length \x99 must be string "99"
+    # BCD LLLVAR length \x09\x99 must be string "0999"
+    # BCD LLLLVAR length \x99\x99 must be string "9999"
+    fmt = "{:0" + str(len_type * 2) + "d}"
+
+    def encode_len(enc_field_len: int) -> bytes:
+        bcd_field_len = fmt.format(enc_field_len)
+        if len(bcd_field_len) > (len_type * 2):
+            raise _CodecError(
+                "Failed to encode field length, field length does not fit into configured field size"
+            )
+        return binascii.a2b_hex(bcd_field_len)
+
+    return encode_len
+
+
+def _encode_len_text(len_type: int, len_enc: str) -> Callable[[int], bytes]:
+    fmt = "{:0" + str(len_type) + "d}"
+
+    def encode_len(enc_field_len: int) -> bytes:
+        try:
+            encoded_len = bytes(fmt.format(enc_field_len), len_enc)
+        except LookupError:
+            raise _CodecError(
+                "Failed to encode field length, unknown encoding specified"
+            ) from None
+        # It does not seem to be possible to hit this because regular
+        # numeric characters seem to be always encodable.
+        # However, keeping this, because you just never know.
+        except Exception as e:  # pragma: no cover
+            raise _CodecError(f"Failed to encode field length, {e}") from None
+
+        if len(encoded_len) > len_type:
+            raise _CodecError(
+                "Failed to encode field length, field length does not fit into configured field size"
+            )
+        return encoded_len
+
+    return encode_len
+
+
+#
+# Data codecs
+#
+
+
+def _decode_data_binary(data: _BytesLike) -> str:
+    return data.hex().upper()
+
+
+def _decode_data_text(data_enc: str) -> Callable[[_BytesLike], str]:
+    def decode_data(data: _BytesLike) -> str:
+        try:
+            # memoryview has no decode(). str() is slower for bytes.
+            if data.__class__ is memoryview:
+                return str(data, data_enc)
+            return data.decode(data_enc)  # type: ignore[union-attr]
+        except LookupError:
+            raise _CodecError(
+                "Failed to decode field, unknown encoding specified"
+            ) from None
+        except Exception:
+            raise _CodecError("Failed to decode field, invalid data") from None
+
+    return decode_data
+
+
+def _encode_data_binary(
+    nibbles: bool, left_pad: str, right_pad: str
+) -> Callable[[str], Tuple[bytes, int]]:
+    def encode_data(field_data: str) -> Tuple[bytes, int]:
+        try:
+            # Odd length nibbles need to be padded because it's not possible to send half a byte
+            if nibbles and len(field_data) & 1:
+                data_to_encode = left_pad + field_data + right_pad
+            else:
+                data_to_encode = field_data
+            encoded_data = binascii.a2b_hex(data_to_encode)
+        except Exception:
+            if nibbles and len(data_to_encode) % 2 == 1:
+                raise _CodecError(
+                    "Failed to encode field, odd-length nibble data, specify pad"
+                ) from None
+            if len(data_to_encode) % 2 == 1:
+                raise _CodecError(
+                    "Failed to encode field, odd-length hex data"
+                ) from None
+            raise _CodecError("Failed to encode field, non-hex data") from None
+
+        # Encoded field length can be in bytes or half bytes (nibbles).
+        # Encoded nibble length directly corresponds to the count of received nibbles.
+        if nibbles:
+            return (encoded_data, len(field_data))
+        else:
+            return (encoded_data, len(encoded_data))
+
+    return encode_data
+
+
+def _encode_data_text(
+    data_enc: str, nibbles: bool
+) -> Callable[[str], Tuple[bytes, int]]:
+    def encode_data(field_data: str) -> Tuple[bytes, int]:
+        try:
+            encoded_data = field_data.encode(data_enc)
+        except LookupError:
+            raise _CodecError(
+                "Failed to encode field, unknown encoding specified"
+            ) from None
+        except Exception:
+            raise _CodecError("Failed to encode field, invalid data") from None
+
+        # Encoded field length can be in bytes or half bytes (nibbles)
+        # Encoded nibble length directly corresponds to the count of received nibbles.
+        if nibbles:
+            return (encoded_data, len(encoded_data) * 2)
+        else:
+            return (encoded_data, len(encoded_data))
+
+    return encode_data
@@ -1,11 +1,52 @@
-from typing import Any, Dict, Literal, Mapping, Set, Tuple, Type, Union
-
-__all__ = ["decode", "DecodeError"]
+from array import array
+from typing import (
+    Any,
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    overload,
+)
+
+from iso8583.compiler import (
+    CompiledField,
+    CompiledSubfields,
+    _CodecError,
+    _get_fields,
+    _get_layouts,
+    _LayoutCache,
+    compile_spec,
+)
+
+__all__ = [
+    "decode",
+    "decode_fast",
+    "decode_many",
+    "decode_view",
+    "decode_lazy",
+    "decode_subfields",
+    "index",
+    "LazyMessage",
+    "DecodeError",
+]
 
 DecodedDict = Dict[str, str]
 EncodedDict = Dict[str, Dict[str, bytes]]
+EncodedViewDict = Dict[str, Dict[str, memoryview]]
 SpecDict = Mapping[str, Mapping[str, Any]]
 
+# Encoded data is a memoryview when decoding with decode_view()
+_Buffer = Union[bytes, bytearray, memoryview]
+_AnyEncodedDict = Dict[str, Dict[str, Any]]
+
 
 class DecodeError(ValueError):
     r"""Subclass of ValueError that describes ISO8583 decoding error.
@@ -29,7 +70,7 @@ class DecodeError(ValueError):
     def __init__(
         self,
         msg: str,
-        s: Union[bytes, bytearray],
+        s: _Buffer,
         doc_dec: DecodedDict,
         doc_enc: EncodedDict,
         pos: int,
@@ -48,7 +89,7 @@ class DecodeError(ValueError):
         self,
     ) -> Tuple[
         Type["DecodeError"],
-        Tuple[str, Union[bytes, bytearray], DecodedDict, EncodedDict, int, str],
+        Tuple[str, _Buffer, DecodedDict, EncodedDict, int, str],
     ]:
         return (
             self.__class__,
@@ -57,7 +98,9 @@ class DecodeError(ValueError):
 
 
 def decode(
-    s: Union[bytes, bytearray], spec: SpecDict
+    s: Union[bytes, bytearray],
+    spec: SpecDict,
+    fields: Optional[Container[str]] = None,
 ) -> Tuple[DecodedDict, EncodedDict]:
     r"""Deserialize a bytes or bytearray instance containing
     ISO8583 data to a Python dict.
@@ -66,9 +109,16 @@ def decode(
     ----------
     s : bytes or bytearray
         Encoded ISO8583 data
-    spec : dict
+    spec : dict or CompiledSpec
         A Python dict defining ISO8583 specification.
         See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+    fields : set, optional
+        Keys of fields to decode, e.g. ``{"t", "2", "4"}``.
+        Other fields are validated and skipped but not decoded
+        and not included into the output.
+        All fields are decoded if not specified (default).
 
     Returns
     -------
@@ -97,6 +147,9 @@ def decode(
      '20': '111',
      'p': '4010100000000000',
      't': '0200'}
+    >>> doc_dec, doc_enc = iso8583.decode(s, spec, fields={"t", "12"})
+    >>> pprint.pprint(doc_dec)
+    {'12': '123456', 't': '0200'}
     """
 
     if not isinstance(s, (bytes, bytearray)):
@@ -104,86 +157,855 @@ def decode(
             f"Encoded ISO8583 data must be bytes or bytearray, not {s.__class__.__name__}"
         )
 
-    doc_dec: DecodedDict = {}
-    doc_enc: EncodedDict = {}
-    fields: Set[int] = set()
-    idx = 0
+    return _decode(s, spec, fields)
 
-    idx = _decode_header(s, doc_dec, doc_enc, idx, spec)
-    idx = _decode_type(s, doc_dec, doc_enc, idx, spec)
-    field = "p"
-    idx = _decode_bitmap(
-        s,
-        doc_dec,
-        doc_enc,
-        idx,
-        field,
-        spec[field],
-        0,
-        False,
-        fields,
+
+def decode_fast(s: Union[bytes, bytearray], spec: SpecDict) -> DecodedDict:
+    r"""Deserialize a bytes or bytearray instance containing
+    ISO8583 data to a Python dict without building encoded data dict.
+
+    Encoded data dict is built only when an error occurs
+    so that :class:`iso8583.DecodeError` carries the same
+    partially decoded data as with :func:`iso8583.decode`.
+
+    Parameters
+    ----------
+    s : bytes or bytearray
+        Encoded ISO8583 data
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+
+    Returns
+    -------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 bytearray
+    TypeError
+        `s` must be a bytes or bytearray instance
+
+    Examples
+    --------
+    >>> import pprint
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> s = b"02004010100000000000161234567890123456123456111"
+    >>> doc_dec = iso8583.decode_fast(s, spec)
+    >>> pprint.pprint(doc_dec)
+    {'12': '123456',
+     '2': '1234567890123456',
+     '20': '111',
+     'p': '4010100000000000',
+     't': '0200'}
+    """
+
+    if not isinstance(s, (bytes, bytearray)):
+        raise TypeError(
+            f"Encoded ISO8583 data must be bytes or bytearray, not {s.__class__.__name__}"
+        )
+
+    doc_dec = _decode_fast(s, _get_fields(spec), _get_layouts(spec))
+    if doc_dec is None:
+        # Let the regular decoder report the error along with partial data
+        doc_dec = _decode(s, spec, None)[0]
+    return doc_dec
+
+
+@overload
+def decode_many(
+    messages: Iterable[Union[bytes, bytearray]],
+    spec: SpecDict,
+    fields: Optional[Container[str]] = ...,
+    return_exceptions: Literal[False] = ...,
+) -> Iterator[Tuple[DecodedDict, EncodedDict]]: ...
+
+
+@overload
+def decode_many(
+    messages: Iterable[Union[bytes, bytearray]],
+    spec: SpecDict,
+    fields: Optional[Container[str]] = ...,
+    return_exceptions: bool = ...,
+) -> Iterator[Union[Tuple[DecodedDict, EncodedDict], DecodeError]]: ...
+
+
+def decode_many(
+    messages: Iterable[Union[bytes, bytearray]],
+    spec: SpecDict,
+    fields: Optional[Container[str]] = None,
+    return_exceptions: bool = False,
+) -> Iterator[Union[Tuple[DecodedDict, EncodedDict], DecodeError]]:
+    r"""Deserialize many bytes or bytearray instances containing
+    ISO8583 data using the same specification.
+
+    The specification is compiled once with :func:`iso8583.compile_spec`
+    for the whole batch.
+
+    Parameters
+    ----------
+    messages : iterable of bytes or bytearray
+        Encoded ISO8583 messages
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    fields : set, optional
+        Keys of fields to decode. See :func:`iso8583.decode`.
+    return_exceptions : bool, optional
+        Produce :class:`iso8583.DecodeError` in place of a message
+        that failed to decode and carry on with the following messages.
+        By default, the first error is raised.
+
+    Yields
+    ------
+    tuple of (dict, dict) or DecodeError
+        Decoded and encoded data dicts in the order of `messages`.
+        An error decoding a message when `return_exceptions` is true.
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 bytearray when `return_exceptions` is false
+    TypeError
+        A message must be a bytes or bytearray instance
+
+    Notes
+    -----
+    Messages are decoded as they are iterated over so that
+    the whole batch does not have to fit into memory.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> messages = [b"08000000000000000000", b"0800", b"02000000000000000000"]
+    >>> for r in iso8583.decode_many(messages, spec, return_exceptions=True):
+    ...     print(r[0]["t"] if isinstance(r, tuple) else r)
+    0800
+    Field data is 0 bytes, expecting 16: field p pos 4
+    0200
+    """
+    # Compile before the first message is requested
+    # so that an invalid specification is reported right away
+    return _decode_many(messages, compile_spec(spec), fields, return_exceptions)
+
+
+def decode_view(
+    s: Union[bytes, bytearray, memoryview],
+    spec: SpecDict,
+    fields: Optional[Container[str]] = None,
+) -> Tuple[DecodedDict, EncodedViewDict]:
+    r"""Deserialize ISO8583 data to a Python dict without copying
+    encoded field data.
+
+    This function is the same as :func:`iso8583.decode` except that
+    encoded data dict is populated with ``memoryview`` slices of `s`
+    instead of ``bytes`` copies.
+
+    Parameters
+    ----------
+    s : bytes, bytearray or memoryview
+        Encoded ISO8583 data
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+    fields : set, optional
+        Keys of fields to decode. See :func:`iso8583.decode`.
+
+    Returns
+    -------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_enc : dict
+        Dict containing encoded ISO8583 data as ``memoryview`` instances
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 bytearray.
+        Encoded data attached to the error is copied into ``bytes``.
+    TypeError
+        `s` must be a bytes, bytearray or memoryview instance
+
+    Notes
+    -----
+    Encoded data views reference `s`. Do not modify `s` while the views
+    are in use. A ``bytearray`` cannot be resized while views of it exist.
+    Call ``bytes()`` on a view to get an independent copy.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> s = b"02004010100000000000161234567890123456123456111"
+    >>> doc_dec, doc_enc = iso8583.decode_view(s, spec)
+    >>> doc_dec["2"]
+    '1234567890123456'
+    >>> type(doc_enc["2"]["data"])
+    <class 'memoryview'>
+    >>> bytes(doc_enc["2"]["data"])
+    b'1234567890123456'
+    """
+
+    if not isinstance(s, (bytes, bytearray, memoryview)):
+        raise TypeError(
+            f"Encoded ISO8583 data must be bytes, bytearray or memoryview, not {s.__class__.__name__}"
+        )
+
+    view = memoryview(s).cast("B")
+    try:
+        doc_dec, doc_enc = _decode(view, spec, fields)
+    except DecodeError as e:
+        # Do not leak views of the original data through the error.
+        e.s = s.tobytes() if isinstance(s, memoryview) else s
+        e.doc_enc = {
+            k: {kk: bytes(vv) for kk, vv in v.items()} for k, v in e.doc_enc.items()
+        }
+        raise
+
+    return doc_dec, doc_enc
+
+
+class LazyMessage(MutableMapping[str, str]):
+    r"""Decoded ISO8583 message that decodes field data on first access.
+
+    :func:`iso8583.decode_lazy` returns an instance of this class.
+    It behaves like decoded data dict returned by :func:`iso8583.decode`
+    and can be passed to :func:`iso8583.encode`.
+
+    Header, message type and bitmaps are decoded immediately.
+    Field boundaries are validated immediately as well.
+    Field data is decoded the first time a field is accessed.
+    The result is cached.
+
+    Attributes
+    ----------
+    s : bytes, bytearray or memoryview
+        The ISO8583 bytes instance being parsed
+
+    Notes
+    -----
+    Errors in field data, such as invalid characters, are reported
+    as :class:`iso8583.DecodeError` when the field is accessed.
+
+    A pickled :class:`LazyMessage` is restored as a regular ``dict``.
+    """
+
+    __slots__ = ("s", "_values", "_pending")
+
+    def __init__(
+        self,
+        s: _Buffer,
+        values: Dict[str, Any],
+        pending: Dict[str, Tuple[CompiledField, int, int, int, int]],
+    ):
+        self.s = s
+        # Fields that are not decoded yet are set to _PENDING
+        self._values = values
+        self._pending = pending
+
+    def __getitem__(self, key: str) -> str:
+        value = self._values[key]
+        if value is _PENDING:
+            value = self._values[key] = self._decode_pending(key)
+        return value  # type: ignore[no-any-return]
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._values[key] = value
+        self._pending.pop(key, None)
+
+    def __delitem__(self, key: str) -> None:
+        del self._values[key]
+        self._pending.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self)!r})"
+
+    def __reduce__(self) -> Tuple[Type[Dict[str, str]], Tuple[Dict[str, str]]]:
+        return dict, (dict(self),)
+
+    def _decode_pending(self, key: str) -> str:
+        field, idx, data_idx, byte_field_len, enc_field_len = self._pending[key]
+        encoded_field_data = self.s[data_idx : data_idx + byte_field_len]
+        doc_dec: DecodedDict = {}
+        doc_enc: _AnyEncodedDict = {}
+        try:
+            value = _decode_field_data(
+                self.s,
+                doc_dec,
+                doc_enc,
+                data_idx,
+                field,
+                encoded_field_data,
+                enc_field_len,
+            )
+        except DecodeError:
+            # Attach encoded field to the error
+            doc_enc[key] = {
+                "len": bytes(self.s[idx:data_idx]),
+                "data": bytes(encoded_field_data),
+            }
+            raise
+
+        del self._pending[key]
+        return value
+
+
+def decode_lazy(s: Union[bytes, bytearray], spec: SpecDict) -> LazyMessage:
+    r"""Deserialize a bytes or bytearray instance containing
+    ISO8583 data to a :class:`LazyMessage` that decodes field data
+    on first access.
+
+    Parameters
+    ----------
+    s : bytes or bytearray
+        Encoded ISO8583 data. It must not be modified while
+        the returned message is in use.
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+
+    Returns
+    -------
+    LazyMessage
+        Mapping containing decoded ISO8583 data
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 bytearray
+    TypeError
+        `s` must be a bytes or bytearray instance
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> s = b"02004010100000000000161234567890123456123456111"
+    >>> doc_dec = iso8583.decode_lazy(s, spec)
+    >>> doc_dec["2"]
+    '1234567890123456'
+    >>> list(doc_dec)
+    ['t', 'p', '2', '12', '20']
+    """
+
+    if not isinstance(s, (bytes, bytearray)):
+        raise TypeError(
+            f"Encoded ISO8583 data must be bytes or bytearray, not {s.__class__.__name__}"
+        )
+
+    doc_dec: Dict[str, Any] = {}
+    doc_enc: _AnyEncodedDict = {}
+    pending: Dict[str, Tuple[CompiledField, int, int, int, int]] = {}
+    fields_spec = _get_fields(spec)
+
+    idx, field_keys = _decode_preamble(
+        s, doc_dec, doc_enc, fields_spec, _get_layouts(spec)
     )
 
-    if 1 in fields:
-        field = "1"
-        idx = _decode_bitmap(
+    for field_key in field_keys:
+        field = fields_spec[field_key]
+        data_idx, byte_field_len, enc_field_len = _skip_field(
+            s, doc_dec, doc_enc, idx, field
+        )
+        doc_dec[field_key] = _PENDING
+        pending[field_key] = (field, idx, data_idx, byte_field_len, enc_field_len)
+        idx = data_idx + byte_field_len
+
+    if idx != len(s):
+        raise DecodeError(
+            "Extra data after last field",
             s,
             doc_dec,
             doc_enc,
             idx,
-            field,
-            spec[field],
-            64,
-            False,
-            fields,
+            _last_field_key(doc_dec, field_keys),
         )
-        fields.remove(1)
 
-    if 65 in fields:
-        # Secondary bitmap is extended to contain tertiary fields
-        idx = _decode_bitmap(
+    return LazyMessage(s, doc_dec, pending)
+
+
+def index(s: Union[bytes, bytearray, memoryview], spec: SpecDict) -> "array[int]":
+    r"""Locate ISO8583 fields without decoding them.
+
+    Parameters
+    ----------
+    s : bytes, bytearray or memoryview
+        Encoded ISO8583 data
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+
+    Returns
+    -------
+    array
+        Unsigned int array of four items per field present in the message:
+        field number, index of field length, index of field data and
+        field data length in bytes. Fields are listed in order of appearance.
+        Secondary bitmap is reported as field 1 and includes
+        tertiary bitmap if present.
+        Header, message type and primary bitmap are not reported.
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 bytearray
+    TypeError
+        `s` must be a bytes, bytearray or memoryview instance
+
+    Notes
+    -----
+    Field lengths and boundaries are validated the same way as
+    in :func:`iso8583.decode`. Field data is not validated.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> s = b"02004010100000000000161234567890123456123456111"
+    >>> idx = iso8583.index(s, spec)
+    >>> idx.tolist()
+    [2, 20, 22, 16, 12, 38, 38, 6, 20, 44, 44, 3]
+    >>> s[idx[6] : idx[6] + idx[7]]
+    b'123456'
+    """
+
+    if not isinstance(s, (bytes, bytearray, memoryview)):
+        raise TypeError(
+            f"Encoded ISO8583 data must be bytes, bytearray or memoryview, not {s.__class__.__name__}"
+        )
+
+    doc_dec: DecodedDict = {}
+    doc_enc: _AnyEncodedDict = {}
+    fields_spec = _get_fields(spec)
+    table = array("I")
+
+    idx, field_keys = _decode_preamble(
+        s, doc_dec, doc_enc, fields_spec, _get_layouts(spec)
+    )
+
+    if "1" in doc_enc:
+        bitmap_len = len(doc_enc["1"]["data"])
+        table.extend((1, idx - bitmap_len, idx - bitmap_len, bitmap_len))
+
+    for field_key in field_keys:
+        field = fields_spec[field_key]
+        data_idx, byte_field_len, _ = _skip_field(s, doc_dec, doc_enc, idx, field)
+        table.extend((int(field_key), idx, data_idx, byte_field_len))
+        idx = data_idx + byte_field_len
+
+    if idx != len(s):
+        raise DecodeError(
+            "Extra data after last field",
             s,
             doc_dec,
             doc_enc,
             idx,
-            field,
-            spec[field],
-            128,
-            True,
-            fields,
+            _last_field_key(doc_dec, field_keys),
         )
-        fields.remove(65)
 
-    for field in [str(i) for i in sorted(fields)]:
-        idx = _decode_field(s, doc_dec, doc_enc, idx, field, spec[field])
+    return table
 
-    if idx != len(s):
-        raise DecodeError(
-            "Extra data after last field", s, doc_dec, doc_enc, idx, field
+
+def decode_subfields(
+    s: Union[bytes, bytearray, memoryview], spec: SpecDict, field_key: str
+) -> Tuple[Dict[str, Any], _AnyEncodedDict]:
+    r"""Deserialize encoded data of a composite field into subfields.
+
+    Parameters
+    ----------
+    s : bytes, bytearray or memoryview
+        Encoded field data without field length, e.g. ``doc_enc["48"]["data"]``
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+    field_key : str
+        Field ID with **subfields** in the specification
+
+    Returns
+    -------
+    doc_dec : dict
+        Dict containing decoded subfields. Subfields that have
+        their own subfields are decoded into nested dicts.
+    doc_enc : dict
+        Dict containing encoded subfields. Encoded data is a ``memoryview``
+        slice of `s` when `s` is a ``memoryview``.
+
+    Raises
+    ------
+    DecodeError
+        An error decoding subfields. Error field is a dotted path to
+        the subfield, e.g. ``48.01``. Error position is relative to `s`.
+    KeyError
+        Field is not defined in the specification
+    TypeError
+        `s` must be a bytes, bytearray or memoryview instance
+    ValueError
+        Field has no subfields in the specification
+
+    Notes
+    -----
+    :func:`iso8583.decode` decodes composite fields into strings.
+    Subfields are decoded only when this function is called.
+    :func:`iso8583.encode` accepts a dict of subfields in place of the string.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii
+    >>> spec = dict(default_ascii)
+    >>> spec["48"] = {
+    ...     "data_enc": "ascii", "len_enc": "ascii", "len_type": 3, "max_len": 999,
+    ...     "subfield_format": "tlv",
+    ...     "subfields": {
+    ...         "01": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 2, "max_len": 10},
+    ...         "02": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 3},
+    ...     },
+    ... }
+    >>> doc_dec, doc_enc = iso8583.decode(b"01000000000000010000014021230105ABCDE", spec)
+    >>> doc_dec["48"]
+    '021230105ABCDE'
+    >>> subfields, _ = iso8583.decode_subfields(doc_enc["48"]["data"], spec, "48")
+    >>> subfields
+    {'02': '123', '01': 'ABCDE'}
+    """
+
+    if not isinstance(s, (bytes, bytearray, memoryview)):
+        raise TypeError(
+            f"Encoded field data must be bytes, bytearray or memoryview, not {s.__class__.__name__}"
         )
 
-    return doc_dec, doc_enc
+    subfields = _get_fields(spec)[field_key].subfields
+    if subfields is None:
+        raise ValueError(f"Field {field_key} has no subfields")
+
+    try:
+        return _decode_subfields(s, subfields)
+    except DecodeError as e:
+        raise DecodeError(
+            e.msg,
+            e.s,
+            e.doc_dec,
+            e.doc_enc,
+            e.pos,
+            f"{field_key}.{e.field}" if e.field else field_key,
+        ) from None
 
 
 #
 # Private interface
 #
 
-_FieldSpecDict = Mapping[str, Any]
+_FieldsSpec = Mapping[str, CompiledField]
 
+# Placeholder for LazyMessage fields that are not decoded yet
+_PENDING: Any = object()
 
-def _decode_header(
+
+def _bitmap_byte_table(base: int) -> Tuple[Tuple[str, ...], ...]:
+    r"""Build a table of field keys enabled by each bitmap byte value.
+
+    Parameters
+    ----------
+    base : int
+        Number of the field preceding the first field of this byte
+
+    Returns
+    -------
+    tuple
+        256 tuples of field keys in ascending order indexed by byte value
+    """
+    # Least significant bit enables the last field of the byte
+    keys = [str(base + bit) for bit in range(8, 0, -1)]
+    table: List[Tuple[str, ...]] = [()]
+    for byte in range(1, 256):
+        # Append the key of the lowest set bit to the keys of the higher bits
+        table.append(
+            table[byte & (byte - 1)] + (keys[(byte & -byte).bit_length() - 1],)
+        )
+    return tuple(table)
+
+
+# Per-byte field key tables for primary (0), secondary (64)
+# and tertiary (128) bitmaps.
+_BITMAP_TABLES: Dict[int, Tuple[Tuple[Tuple[str, ...], ...], ...]] = {
+    field_offset: tuple(
+        _bitmap_byte_table(field_offset + byte_idx * 8) for byte_idx in range(8)
+    )
+    for field_offset in (0, 64, 128)
+}
+
+
+def _decode(
+    s: _Buffer, spec: SpecDict, fields: Optional[Container[str]]
+) -> Tuple[DecodedDict, _AnyEncodedDict]:
+    r"""Deserialize ISO8583 data. See :func:`iso8583.decode`."""
+    doc_dec: DecodedDict = {}
+    doc_enc: _AnyEncodedDict = {}
+    fields_spec = _get_fields(spec)
+
+    idx, field_keys = _decode_preamble(
+        s, doc_dec, doc_enc, fields_spec, _get_layouts(spec)
+    )
+
+    if fields is None:
+        for field_key in field_keys:
+            idx = _decode_field(s, doc_dec, doc_enc, idx, fields_spec[field_key])
+    else:
+        for field_key in field_keys:
+            if field_key in fields:
+                idx = _decode_field(s, doc_dec, doc_enc, idx, fields_spec[field_key])
+            else:
+                data_idx, byte_field_len, _ = _skip_field(
+                    s, doc_dec, doc_enc, idx, fields_spec[field_key]
+                )
+                idx = data_idx + byte_field_len
+
+    if idx != len(s):
+        raise DecodeError(
+            "Extra data after last field",
+            s,
+            doc_dec,
+            doc_enc,
+            idx,
+            _last_field_key(doc_dec, field_keys),
+        )
+
+    if fields is not None:
+        # Header, type and bitmaps are always decoded to locate fields
+        for field_key in ("h", "t", "p", "1"):
+            if field_key in doc_dec and field_key not in fields:
+                del doc_dec[field_key]
+                del doc_enc[field_key]
+
+    return doc_dec, doc_enc
+
+
+def _decode_many(
+    messages: Iterable[_Buffer],
+    spec: SpecDict,
+    fields: Optional[Container[str]],
+    return_exceptions: bool,
+) -> Iterator[Union[Tuple[DecodedDict, EncodedDict], DecodeError]]:
+    r"""Deserialize many ISO8583 messages. See :func:`iso8583.decode_many`."""
+    for s in messages:
+        if not isinstance(s, (bytes, bytearray)):
+            raise TypeError(
+                f"Encoded ISO8583 data must be bytes or bytearray, not {s.__class__.__name__}"
+            )
+
+        if not return_exceptions:
+            yield _decode(s, spec, fields)
+            continue
+
+        result: Union[Tuple[DecodedDict, EncodedDict], DecodeError]
+        try:
+            result = _decode(s, spec, fields)
+        except DecodeError as e:
+            result = e
+        yield result
+
+
+def _decode_fast(
     s: Union[bytes, bytearray],
+    fields_spec: _FieldsSpec,
+    layouts: Optional[_LayoutCache] = None,
+) -> Optional[DecodedDict]:
+    r"""Deserialize ISO8583 data without building encoded data dict.
+
+    Parameters
+    ----------
+    s : bytes or bytearray
+        Encoded ISO8583 data
+    fields_spec : dict
+        A Python dict of compiled ISO8583 field specifications.
+        See :mod:`iso8583.compiler` module.
+    layouts : _LayoutCache, optional
+        Layout cache of the compiled specification
+
+    Returns
+    -------
+    dict or None
+        Dict containing decoded ISO8583 data or None if data is invalid
+    """
+    doc_dec: DecodedDict = {}
+    try:
+        idx, field_keys = _decode_preamble(s, doc_dec, {}, fields_spec, layouts)
+    except DecodeError:
+        return None
+
+    s_len = len(s)
+    try:
+        for field_key in field_keys:
+            field = fields_spec[field_key]
+            data_idx = idx + field.len_type
+            if data_idx > s_len:
+                return None
+
+            enc_field_len = field.decode_len(s[idx:data_idx])
+            if enc_field_len > field.max_len:
+                return None
+
+            if enc_field_len == 0:
+                doc_dec[field_key] = ""
+                idx = data_idx
+                continue
+
+            # Encoded field length can be in bytes or half bytes (nibbles)
+            if field.nibbles:
+                idx = data_idx + (enc_field_len + 1) // 2
+            else:
+                idx = data_idx + enc_field_len
+            if idx > s_len:
+                return None
+
+            field_data = field.decode_data(s[data_idx:idx])
+            if field.binary and field.nibbles and enc_field_len & 1:
+                if field.left_pad and field_data[:1] == field.left_pad:
+                    field_data = field_data[1:]
+                elif field.right_pad and field_data[-1:] == field.right_pad:
+                    field_data = field_data[:-1]
+                else:
+                    return None
+            doc_dec[field_key] = field_data
+    except Exception:
+        return None
+
+    if idx != s_len:
+        return None
+
+    return doc_dec
+
+
+def _decode_preamble(
+    s: _Buffer,
+    doc_dec: DecodedDict,
+    doc_enc: _AnyEncodedDict,
+    fields_spec: _FieldsSpec,
+    layouts: Optional[_LayoutCache] = None,
+) -> Tuple[int, List[str]]:
+    r"""Decode ISO8583 header, message type and bitmaps.
+
+    Parameters
+    ----------
+    s : bytes, bytearray or memoryview
+        Encoded ISO8583 data
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_enc : dict
+        Dict containing encoded ISO8583 data
+    fields_spec : dict
+        A Python dict of compiled ISO8583 field specifications.
+        See :mod:`iso8583.compiler` module.
+    layouts : _LayoutCache, optional
+        Layout cache of the compiled specification
+
+    Returns
+    -------
+    int
+        Index in ISO8583 byte array where the first field starts
+    list
+        Keys of fields enabled in the bitmaps, in order of appearance
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 bytearray.
+    """
+    field_keys: List[str] = []
+    idx = 0
+
+    idx = _decode_header(s, doc_dec, doc_enc, idx, fields_spec)
+    idx = _decode_type(s, doc_dec, doc_enc, idx, fields_spec["t"])
+    idx = _decode_bitmap(
+        s,
+        doc_dec,
+        doc_enc,
+        idx,
+        fields_spec["p"],
+        0,
+        False,
+        field_keys,
+        layouts,
+    )
+
+    # Bitmap tables produce keys in ascending order.
+    # Field 1 can only be the first key and field 65
+    # can only be the first key after primary fields.
+    if field_keys and field_keys[0] == "1":
+        del field_keys[0]
+        primary_count = len(field_keys)
+        idx = _decode_bitmap(
+            s,
+            doc_dec,
+            doc_enc,
+            idx,
+            fields_spec["1"],
+            64,
+            False,
+            field_keys,
+            layouts,
+        )
+
+        if len(field_keys) > primary_count and field_keys[primary_count] == "65":
+            del field_keys[primary_count]
+            # Secondary bitmap is extended to contain tertiary fields
+            idx = _decode_bitmap(
+                s,
+                doc_dec,
+                doc_enc,
+                idx,
+                fields_spec["1"],
+                128,
+                True,
+                field_keys,
+                layouts,
+            )
+
+    return idx, field_keys
+
+
+def _last_field_key(doc_dec: Mapping[str, Any], field_keys: List[str]) -> str:
+    r"""Return key of the last field present in the message."""
+    if field_keys:
+        return field_keys[-1]
+    return "1" if "1" in doc_dec else "p"
+
+
+def _decode_header(
+    s: _Buffer,
     doc_dec: DecodedDict,
-    doc_enc: EncodedDict,
+    doc_enc: _AnyEncodedDict,
     idx: int,
-    spec: SpecDict,
+    fields_spec: _FieldsSpec,
 ) -> int:
     r"""Decode ISO8583 header data if present.
 
     Parameters
     ----------
-    s : bytes or bytearray
+    s : bytes, bytearray or memoryview
         Encoded ISO8583 data
     doc_dec : dict
         Dict containing decoded ISO8583 data
@@ -191,9 +1013,9 @@ def _decode_header(
         Dict containing encoded ISO8583 data
     idx : int
         Current index in ISO8583 byte array
-    spec : dict
-        A Python dict defining ISO8583 specification.
-        See :mod:`iso8583.specs` module for examples.
+    fields_spec : dict
+        A Python dict of compiled ISO8583 field specifications.
+        See :mod:`iso8583.compiler` module.
 
     Returns
     -------
@@ -207,24 +1029,24 @@ def _decode_header(
     """
 
     # Header is not expected according to specifications
-    if spec["h"]["max_len"] <= 0:
+    if fields_spec["h"].max_len <= 0:
         return idx
 
-    return _decode_field(s, doc_dec, doc_enc, idx, "h", spec["h"])
+    return _decode_field(s, doc_dec, doc_enc, idx, fields_spec["h"])
 
 
 def _decode_type(
-    s: Union[bytes, bytearray],
+    s: _Buffer,
     doc_dec: DecodedDict,
-    doc_enc: EncodedDict,
+    doc_enc: _AnyEncodedDict,
     idx: int,
-    spec: SpecDict,
+    field: CompiledField,
 ) -> int:
     r"""Decode ISO8583 message type.
 
     Parameters
     ----------
-    s : bytes or bytearray
+    s : bytes, bytearray or memoryview
         Encoded ISO8583 data
     doc_dec : dict
         Dict containing decoded ISO8583 data
@@ -232,9 +1054,9 @@ def _decode_type(
         Dict containing encoded ISO8583 data
     idx : int
         Current index in ISO8583 byte array
-    spec : dict
-        A Python dict defining ISO8583 specification.
-        See :mod:`iso8583.specs` module for examples.
+    field : CompiledField
+        Compiled ISO8583 specification for the message type.
+        See :mod:`iso8583.compiler` module.
 
     Returns
     -------
@@ -248,14 +1070,16 @@ def _decode_type(
     """
 
     # Message type is a set length in ISO8583
-    if spec["t"]["data_enc"] == "b":
+    if field.binary:
         expected_field_len = 2
     else:
         expected_field_len = 4
 
     encoded_field_data = s[idx : idx + expected_field_len]
+    if s.__class__ is not memoryview:
+        encoded_field_data = bytes(encoded_field_data)
     doc_dec["t"] = ""
-    doc_enc["t"] = {"len": b"", "data": bytes(encoded_field_data)}
+    doc_enc["t"] = {"len": encoded_field_data[:0], "data": encoded_field_data}
 
     if len(encoded_field_data) != expected_field_len:
         raise DecodeError(
@@ -267,38 +1091,34 @@ def _decode_type(
             "t",
         )
 
-    if spec["t"]["data_enc"] == "b":
-        doc_dec["t"] = encoded_field_data.hex().upper()
-    else:
-        doc_dec["t"] = _decode_text_data(
-            s,
-            encoded_field_data,
-            idx,
-            doc_dec,
-            doc_enc,
-            "t",
-            spec["t"],
-        )
+    doc_dec["t"] = _decode_text_data(
+        s,
+        encoded_field_data,
+        idx,
+        doc_dec,
+        doc_enc,
+        field,
+    )
 
     return idx + expected_field_len
 
 
 def _decode_bitmap(
-    s: Union[bytes, bytearray],
+    s: _Buffer,
     doc_dec: DecodedDict,
-    doc_enc: EncodedDict,
+    doc_enc: _AnyEncodedDict,
     idx: int,
-    field_key: str,
-    field_spec: _FieldSpecDict,
+    field: CompiledField,
     field_offset: Literal[0, 64, 128],
     is_extended: bool,
-    fields: Set[int],
+    field_keys: List[str],
+    layouts: Optional[_LayoutCache] = None,
 ) -> int:
     r"""Decode ISO8583 a bitmap.
 
     Parameters
     ----------
-    s : bytes or bytearray
+    s : bytes, bytearray or memoryview
         Encoded ISO8583 data
     doc_dec : dict
         Dict containing decoded ISO8583 data
@@ -306,17 +1126,17 @@ def _decode_bitmap(
         Dict containing encoded ISO8583 data
     idx : int
         Current index in ISO8583 byte array
-    field_key : str
-        Field ID to be decoded
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
     field_offset : int
         Offset by which to adjust fields from 1-64 range.
     is_extended : bool
         If true then processing an extension of an already processed bitmap
-    fields: set
-        Will be populated with enabled field numbers
+    field_keys: list
+        Will be extended with keys of enabled fields in ascending order
+    layouts : _LayoutCache, optional
+        Layout cache of the compiled specification
 
     Returns
     -------
@@ -328,22 +1148,29 @@ def _decode_bitmap(
     DecodeError
         An error decoding ISO8583 bytearray.
     """
+    field_key = field.key
 
     # Primary/Secondary bitmap is a set length in ISO8583
-    if field_spec["data_enc"] == "b":
+    if field.binary:
         expected_field_len = 8
     else:
         expected_field_len = 16
 
     encoded_field_data = s[idx : idx + expected_field_len]
+    if s.__class__ is not memoryview:
+        encoded_field_data = bytes(encoded_field_data)
 
     if is_extended:
-        doc_enc[field_key]["data"] = doc_enc[field_key]["data"] + bytes(
-            encoded_field_data
+        extended_data = bytes(doc_enc[field_key]["data"]) + bytes(encoded_field_data)
+        doc_enc[field_key]["data"] = (
+            memoryview(extended_data) if s.__class__ is memoryview else extended_data
         )
     else:
         doc_dec[field_key] = ""
-        doc_enc[field_key] = {"len": b"", "data": bytes(encoded_field_data)}
+        doc_enc[field_key] = {
+            "len": encoded_field_data[:0],
+            "data": encoded_field_data,
+        }
 
     if len(encoded_field_data) != expected_field_len:
         raise DecodeError(
@@ -355,30 +1182,35 @@ def _decode_bitmap(
             field_key,
         )
 
-    if field_spec["data_enc"] == "b":
-        decoded_field_data = encoded_field_data.hex().upper()
-        doc_dec[field_key] = (
-            doc_dec[field_key] + decoded_field_data
-            if is_extended
-            else decoded_field_data
-        )
+    if layouts is not None:
+        layout_key = ("bitmap", field_offset, bytes(encoded_field_data))
+        layout = layouts.get(layout_key)
+        if layout is not None:
+            decoded_field_data, enabled_keys = layout
+            doc_dec[field_key] = (
+                doc_dec[field_key] + decoded_field_data
+                if is_extended
+                else decoded_field_data
+            )
+            field_keys += enabled_keys
+            return idx + expected_field_len
+
+    decoded_field_data = _decode_text_data(
+        s,
+        encoded_field_data,
+        idx,
+        doc_dec,
+        doc_enc,
+        field,
+    )
+    doc_dec[field_key] = (
+        doc_dec[field_key] + decoded_field_data if is_extended else decoded_field_data
+    )
+    keys_count = len(field_keys)
+
+    if field.binary:
         bitmap = encoded_field_data
     else:
-        decoded_field_data = _decode_text_data(
-            s,
-            encoded_field_data,
-            idx,
-            doc_dec,
-            doc_enc,
-            field_key,
-            field_spec,
-        )
-        doc_dec[field_key] = (
-            doc_dec[field_key] + decoded_field_data
-            if is_extended
-            else decoded_field_data
-        )
-
         try:
             bitmap = bytes.fromhex(decoded_field_data)
         except Exception:
@@ -391,31 +1223,36 @@ def _decode_bitmap(
                 field_key,
             ) from None
 
-    fields.update(
-        [
-            field_offset + byte_idx * 8 + bit
-            for bit in range(1, 9)
-            for byte_idx, byte in enumerate(bitmap)
-            if byte >> (8 - bit) & 1
-        ]
-    )
+    tables = _BITMAP_TABLES[field_offset]
+    if len(bitmap) == 8:
+        t0, t1, t2, t3, t4, t5, t6, t7 = tables
+        b0, b1, b2, b3, b4, b5, b6, b7 = bitmap
+        field_keys += (
+            t0[b0] + t1[b1] + t2[b2] + t3[b3] + t4[b4] + t5[b5] + t6[b6] + t7[b7]
+        )
+    else:
+        # Text bitmap may contain whitespace skipped by bytes.fromhex
+        for table, byte in zip(tables, bitmap):
+            field_keys += table[byte]
+
+    if layouts is not None:
+        layouts.put(layout_key, (decoded_field_data, tuple(field_keys[keys_count:])))
 
     return idx + expected_field_len
 
 
 def _decode_field(
-    s: Union[bytes, bytearray],
+    s: _Buffer,
     doc_dec: DecodedDict,
-    doc_enc: EncodedDict,
+    doc_enc: _AnyEncodedDict,
     idx: int,
-    field_key: str,
-    field_spec: _FieldSpecDict,
+    field: CompiledField,
 ) -> int:
     r"""Decode ISO8583 individual fields.
 
     Parameters
     ----------
-    s : bytes or bytearray
+    s : bytes, bytearray or memoryview
         Encoded ISO8583 data
     doc_dec : dict
         Dict containing decoded ISO8583 data
@@ -423,11 +1260,9 @@ def _decode_field(
         Dict containing encoded ISO8583 data
     idx : int
         Current index in ISO8583 byte array
-    field_key : str
-        Field ID to be decoded
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
 
     Returns
     -------
@@ -439,17 +1274,18 @@ def _decode_field(
     DecodeError
         An error decoding ISO8583 bytearray.
     """
-    len_type = field_spec["len_type"]
-
-    # Optional field added in v2.1. Prior specs do not have it.
-    len_count = field_spec.get("len_count", "bytes")
+    field_key = field.key
+    len_type = field.len_type
+    encoded_field_len = s[idx : idx + len_type]
+    if s.__class__ is not memoryview:
+        encoded_field_len = bytes(encoded_field_len)
 
     doc_dec[field_key] = ""
-    doc_enc[field_key] = {"len": bytes(s[idx : idx + len_type]), "data": b""}
+    doc_enc[field_key] = {"len": encoded_field_len, "data": encoded_field_len[:0]}
 
-    if len(s[idx : idx + len_type]) != len_type:
+    if len(encoded_field_len) != len_type:
         raise DecodeError(
-            f"Field length is {len(s[idx:idx + len_type])} bytes wide, expecting {len_type}",
+            f"Field length is {len(encoded_field_len)} bytes wide, expecting {len_type}",
             s,
             doc_dec,
             doc_enc,
@@ -459,85 +1295,20 @@ def _decode_field(
 
     # Parse field length if present.
     # For fixed-length fields max_len is the length.
-    if len_type == 0:
-        enc_field_len: int = field_spec["max_len"]
-    # Variable field length
-    else:
-        # Binary length
-        if field_spec["len_enc"] == "b":
-            try:
-                enc_field_len = int.from_bytes(
-                    s[idx : idx + len_type], "big", signed=False
-                )
-            # It does not seem to be possible to hit this unless
-            # it's a type or input parameter error.
-            # However, keeping this, because you just never know.
-            except Exception as e:  # pragma: no cover
-                raise DecodeError(
-                    f"Failed to decode field length, {e}",
-                    s,
-                    doc_dec,
-                    doc_enc,
-                    idx,
-                    field_key,
-                ) from None
-        # BCD length
-        elif field_spec["len_enc"] == "bcd":
-            try:
-                enc_field_len = int(s[idx : idx + len_type].hex(), 10)
-            except Exception:
-                raise DecodeError(
-                    "Failed to decode field length, invalid BCD data",
-                    s,
-                    doc_dec,
-                    doc_enc,
-                    idx,
-                    field_key,
-                ) from None
-        # Text length
-        else:
-            try:
-                decoded_length = s[idx : idx + len_type].decode(field_spec["len_enc"])
-            except LookupError:
-                raise DecodeError(
-                    "Failed to decode field length, unknown encoding specified",
-                    s,
-                    doc_dec,
-                    doc_enc,
-                    idx,
-                    field_key,
-                ) from None
-            except Exception:
-                raise DecodeError(
-                    "Failed to decode field length, invalid data",
-                    s,
-                    doc_dec,
-                    doc_enc,
-                    idx,
-                    field_key,
-                ) from None
-
-            try:
-                enc_field_len = int(decoded_length)
-            except Exception:
-                raise DecodeError(
-                    "Failed to decode field length, non-numeric data",
-                    s,
-                    doc_dec,
-                    doc_enc,
-                    idx,
-                    field_key,
-                ) from None
+    try:
+        enc_field_len = field.decode_len(encoded_field_len)
+    except _CodecError as e:
+        raise DecodeError(e.args[0], s, doc_dec, doc_enc, idx, field_key) from None
 
-        if enc_field_len > field_spec["max_len"]:
-            raise DecodeError(
-                f"Field data is {enc_field_len} {len_count}, larger than maximum {field_spec['max_len']}",
-                s,
-                doc_dec,
-                doc_enc,
-                idx,
-                field_key,
-            )
+    if enc_field_len > field.max_len:
+        raise DecodeError(
+            f"Field data is {enc_field_len} {field.len_count}, larger than maximum {field.max_len}",
+            s,
+            doc_dec,
+            doc_enc,
+            idx,
+            field_key,
+        )
 
     idx += len_type
 
@@ -547,24 +1318,24 @@ def _decode_field(
 
     # Encoded field length can be in bytes or half bytes (nibbles)
     # Convert nibbles to bytes if needed
-    if len_count == "nibbles":
-        if enc_field_len & 1:
-            byte_field_len = (enc_field_len + 1) // 2
-        else:
-            byte_field_len = enc_field_len // 2
+    if field.nibbles:
+        byte_field_len = (enc_field_len + 1) // 2
     else:
         byte_field_len = enc_field_len
 
     # Parse field data
-    doc_enc[field_key]["data"] = bytes(s[idx : idx + byte_field_len])
-    if len(doc_enc[field_key]["data"]) != byte_field_len:
-        if len_count == "nibbles":
-            actual_field_len = len(doc_enc[field_key]["data"]) * 2
+    encoded_field_data = s[idx : idx + byte_field_len]
+    if s.__class__ is not memoryview:
+        encoded_field_data = bytes(encoded_field_data)
+    doc_enc[field_key]["data"] = encoded_field_data
+    if len(encoded_field_data) != byte_field_len:
+        if field.nibbles:
+            actual_field_len = len(encoded_field_data) * 2
         else:
-            actual_field_len = len(doc_enc[field_key]["data"])
+            actual_field_len = len(encoded_field_data)
 
         raise DecodeError(
-            f"Field data is {actual_field_len} {len_count}, expecting {enc_field_len}",
+            f"Field data is {actual_field_len} {field.len_count}, expecting {enc_field_len}",
             s,
             doc_dec,
             doc_enc,
@@ -572,46 +1343,145 @@ def _decode_field(
             field_key,
         )
 
-    if field_spec["data_enc"] == "b":
-        doc_dec[field_key] = doc_enc[field_key]["data"].hex().upper()
-        if len_count == "nibbles" and enc_field_len & 1:
-            doc_dec[field_key] = _remove_pad_field(
-                s,
-                idx,
-                doc_dec,
-                doc_enc,
-                field_key,
-                field_spec,
-                enc_field_len,
-            )
-    else:
-        doc_dec[field_key] = _decode_text_data(
+    _decode_field_data(
+        s, doc_dec, doc_enc, idx, field, encoded_field_data, enc_field_len
+    )
+
+    return idx + byte_field_len
+
+
+def _decode_field_data(
+    s: _Buffer,
+    doc_dec: DecodedDict,
+    doc_enc: _AnyEncodedDict,
+    idx: int,
+    field: CompiledField,
+    encoded_field_data: _Buffer,
+    enc_field_len: int,
+) -> str:
+    r"""Decode ISO8583 field data into `doc_dec[field.key]`.
+
+    Parameters
+    ----------
+    s : bytes, bytearray or memoryview
+        Encoded ISO8583 data
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_enc : dict
+        Dict containing encoded ISO8583 data
+    idx : int
+        Index in ISO8583 byte array where field data starts
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
+    encoded_field_data : bytes, bytearray or memoryview
+        Encoded field data
+    enc_field_len : int
+        Field length in bytes or nibbles
+
+    Returns
+    -------
+    str
+        Decoded ISO8583 field data
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 bytearray.
+    """
+    field_key = field.key
+    doc_dec[field_key] = _decode_text_data(
+        s,
+        encoded_field_data,
+        idx,
+        doc_dec,
+        doc_enc,
+        field,
+    )
+    if field.binary and field.nibbles and enc_field_len & 1:
+        doc_dec[field_key] = _remove_pad_field(
             s,
-            doc_enc[field_key]["data"],
             idx,
             doc_dec,
             doc_enc,
-            field_key,
-            field_spec,
+            field,
+            enc_field_len,
         )
+    return doc_dec[field_key]
 
-    return idx + byte_field_len
+
+def _skip_field(
+    s: _Buffer,
+    doc_dec: DecodedDict,
+    doc_enc: _AnyEncodedDict,
+    idx: int,
+    field: CompiledField,
+) -> Tuple[int, int, int]:
+    r"""Validate ISO8583 field length and locate field data
+    without decoding or copying it.
+
+    Parameters
+    ----------
+    s : bytes, bytearray or memoryview
+        Encoded ISO8583 data
+    doc_dec : dict
+        Dict containing decoded ISO8583 data.
+        Populated only if an error is raised.
+    doc_enc : dict
+        Dict containing encoded ISO8583 data.
+        Populated only if an error is raised.
+    idx : int
+        Current index in ISO8583 byte array
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
+
+    Returns
+    -------
+    int
+        Index in ISO8583 byte array where field data starts
+    int
+        Field data length in bytes
+    int
+        Field length in bytes or nibbles
+
+    Raises
+    ------
+    DecodeError
+        An error decoding ISO8583 bytearray.
+    """
+    data_idx = idx + field.len_type
+    try:
+        enc_field_len = field.decode_len(s[idx:data_idx])
+    except _CodecError:
+        enc_field_len = -1
+
+    if 0 <= enc_field_len <= field.max_len:
+        if field.nibbles:
+            byte_field_len = (enc_field_len + 1) // 2
+        else:
+            byte_field_len = enc_field_len
+        if data_idx + byte_field_len <= len(s):
+            return data_idx, byte_field_len, enc_field_len
+
+    # Let the regular decoder report the error along with partial data
+    _decode_field(s, doc_dec, doc_enc, idx, field)
+    raise AssertionError("unreachable")  # pragma: no cover
 
 
 def _remove_pad_field(
-    s: Union[bytes, bytearray],
+    s: _Buffer,
     idx: int,
     doc_dec: DecodedDict,
-    doc_enc: EncodedDict,
-    field_key: str,
-    field_spec: _FieldSpecDict,
+    doc_enc: _AnyEncodedDict,
+    field: CompiledField,
     enc_field_len: int,
 ) -> str:
     r"""Remove left or right pad from a BCD or hex field.
 
     Parameters
     ----------
-    s : bytes or bytearray
+    s : bytes, bytearray or memoryview
         Encoded ISO8583 data
     idx : int
         Current index in ISO8583 byte array
@@ -619,11 +1489,9 @@ def _remove_pad_field(
         Dict containing decoded ISO8583 data
     doc_enc : dict
         Dict containing encoded ISO8583 data
-    field_key : str
-        Field ID to remove pad from
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
     enc_field_len : int
         Number of nibbles expected in the field
 
@@ -637,11 +1505,13 @@ def _remove_pad_field(
     DecodeError
         An error decoding ISO8583 bytearray.
     """
-    pad: str = field_spec.get("left_pad", "")[:1]
+    field_key = field.key
+
+    pad = field.left_pad
     if len(pad) > 0 and doc_dec[field_key][:1] == pad:
         return doc_dec[field_key][1:]
 
-    pad = field_spec.get("right_pad", "")[:1]
+    pad = field.right_pad
     if len(pad) > 0 and doc_dec[field_key][-1:] == pad:
         return doc_dec[field_key][:-1]
 
@@ -656,21 +1526,20 @@ def _remove_pad_field(
 
 
 def _decode_text_data(
-    s: Union[bytes, bytearray],
-    data: Union[bytes, bytearray],
+    s: _Buffer,
+    data: _Buffer,
     idx: int,
     doc_dec: DecodedDict,
-    doc_enc: EncodedDict,
-    field_key: str,
-    field_spec: _FieldSpecDict,
+    doc_enc: _AnyEncodedDict,
+    field: CompiledField,
 ) -> str:
-    r"""Decode non-binary field and handle errors if any
+    r"""Decode field data and handle errors if any
 
     Parameters
     ----------
-    s : bytes or bytearray
+    s : bytes, bytearray or memoryview
         Encoded ISO8583 data
-    data : bytes or bytearray
+    data : bytes, bytearray or memoryview
         Encoded ISO8583 data to decode
     idx : int
         Current index in ISO8583 byte array
@@ -678,13 +1547,9 @@ def _decode_text_data(
         Dict containing decoded ISO8583 data
     doc_enc : dict
         Dict containing encoded ISO8583 data
-    field_key : str
-        Field ID to remove pad from
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
-    enc_field_len : int
-        Number of nibbles expected in the field
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
 
     Returns
     -------
@@ -697,22 +1562,184 @@ def _decode_text_data(
         An error decoding ISO8583 bytearray.
     """
     try:
-        return data.decode(field_spec["data_enc"])
-    except LookupError:
+        return field.decode_data(data)
+    except _CodecError as e:
+        raise DecodeError(e.args[0], s, doc_dec, doc_enc, idx, field.key) from None
+
+
+#
+# Subfields
+#
+
+
+def _decode_subfields(
+    s: _Buffer, subfields: CompiledSubfields
+) -> Tuple[Dict[str, Any], _AnyEncodedDict]:
+    r"""Decode subfields of a composite field.
+
+    Parameters
+    ----------
+    s : bytes, bytearray or memoryview
+        Encoded field data
+    subfields : CompiledSubfields
+        Compiled subfield specification of the field.
+        See :mod:`iso8583.compiler` module.
+
+    Returns
+    -------
+    doc_dec : dict
+        Dict containing decoded subfields
+    doc_enc : dict
+        Dict containing encoded subfields
+
+    Raises
+    ------
+    DecodeError
+        An error decoding subfields. Error field is relative to this field.
+    """
+    doc_dec: Dict[str, Any] = {}
+    doc_enc: _AnyEncodedDict = {}
+    fields_spec = subfields.fields
+    end = len(s)
+    idx = 0
+
+    if subfields.format == "fixed":
+        # Trailing subfields may be omitted
+        for field in fields_spec.values():
+            if idx == end:
+                break
+            idx = _decode_subfield(s, doc_dec, doc_enc, idx, field)
+
+    elif subfields.format == "tlv":
+        tag_len = subfields.tag_len
+        while idx < end:
+            tag = _decode_tag(s, doc_dec, doc_enc, idx, subfields)
+            if tag not in fields_spec:
+                raise DecodeError(
+                    "Field is not defined in specification",
+                    s,
+                    doc_dec,
+                    doc_enc,
+                    idx,
+                    tag,
+                )
+            idx = _decode_subfield(s, doc_dec, doc_enc, idx + tag_len, fields_spec[tag])
+
+    elif subfields.format == "bitmap":
+        if "p" not in fields_spec:
+            raise DecodeError(
+                "Field is not defined in specification", s, doc_dec, doc_enc, idx, "p"
+            )
+        idx = _decode_subfield(s, doc_dec, doc_enc, idx, fields_spec["p"])
+        try:
+            bitmap = int(doc_dec["p"], 16)
+        except ValueError:
+            raise DecodeError(
+                "Failed to decode field, non-hex data", s, doc_dec, doc_enc, 0, "p"
+            ) from None
+
+        width = len(doc_dec["p"]) * 4
+        for field_num in range(1, width + 1):
+            if not bitmap >> (width - field_num) & 1:
+                continue
+            field_key = str(field_num)
+            if field_key not in fields_spec:
+                raise DecodeError(
+                    "Field is not defined in specification",
+                    s,
+                    doc_dec,
+                    doc_enc,
+                    idx,
+                    field_key,
+                )
+            idx = _decode_subfield(s, doc_dec, doc_enc, idx, fields_spec[field_key])
+
+    else:
+        raise DecodeError(
+            f"Unknown subfield format {subfields.format!r}", s, doc_dec, doc_enc, 0, ""
+        )
+
+    if idx != end:
         raise DecodeError(
-            "Failed to decode field, unknown encoding specified",
+            "Extra data after last field",
             s,
             doc_dec,
             doc_enc,
             idx,
-            field_key,
+            next(reversed(doc_dec), ""),
+        )
+
+    return doc_dec, doc_enc
+
+
+def _decode_subfield(
+    s: _Buffer,
+    doc_dec: Dict[str, Any],
+    doc_enc: _AnyEncodedDict,
+    idx: int,
+    field: CompiledField,
+) -> int:
+    r"""Decode a subfield and its own subfields if any.
+
+    Returns
+    -------
+    int
+        Index in field data where parsing of the subfield ended
+    """
+    idx = _decode_field(s, doc_dec, doc_enc, idx, field)
+    if field.subfields is None:
+        return idx
+
+    field_key = field.key
+    data = doc_enc[field_key]["data"]
+    try:
+        doc_dec[field_key], _ = _decode_subfields(data, field.subfields)
+    except DecodeError as e:
+        raise DecodeError(
+            e.msg,
+            s,
+            doc_dec,
+            doc_enc,
+            idx - len(data) + e.pos,
+            f"{field_key}.{e.field}" if e.field else field_key,
         ) from None
-    except Exception:
+    return idx
+
+
+def _decode_tag(
+    s: _Buffer,
+    doc_dec: Dict[str, Any],
+    doc_enc: _AnyEncodedDict,
+    idx: int,
+    subfields: CompiledSubfields,
+) -> str:
+    r"""Decode subfield tag of a tag/length/value composite field."""
+    tag_len = subfields.tag_len
+    encoded_tag = s[idx : idx + tag_len]
+    if len(encoded_tag) != tag_len:
         raise DecodeError(
-            "Failed to decode field, invalid data",
+            f"Tag is {len(encoded_tag)} bytes, expecting {tag_len}",
             s,
             doc_dec,
             doc_enc,
             idx,
-            field_key,
+            "",
+        )
+
+    try:
+        if subfields.tag_enc == "b":
+            return encoded_tag.hex().upper()
+        return str(encoded_tag, subfields.tag_enc)
+    except LookupError:
+        raise DecodeError(
+            "Failed to decode tag, unknown encoding specified",
+            s,
+            doc_dec,
+            doc_enc,
+            idx,
+            "",
+        ) from None
+    except Exception:
+        raise DecodeError(
+            "Failed to decode tag, invalid data", s, doc_dec, doc_enc, idx, ""
         ) from None
@@ -1,7 +1,28 @@
-from typing import Any, Dict, Literal, Mapping, MutableMapping, Set, Tuple, Type
-import binascii
-
-__all__ = ["encode", "EncodeError"]
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    MutableMapping,
+    NoReturn,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+from iso8583.compiler import (
+    CompiledField,
+    CompiledSubfields,
+    _CodecError,
+    _get_fields,
+    _get_layouts,
+    _LayoutCache,
+)
+from iso8583.decoder import _BITMAP_TABLES as _DECODER_BITMAP_TABLES
+from iso8583.decoder import LazyMessage
+
+__all__ = ["encode", "encode_fast", "encode_into", "encode_subfields", "EncodeError"]
 
 DecodedDict = MutableMapping[str, str]
 EncodedDict = Dict[str, Dict[str, bytes]]
@@ -24,7 +45,7 @@ class EncodeError(ValueError):
     """
 
     def __init__(
-        self, msg: str, doc_dec: DecodedDict, doc_enc: EncodedDict, field: str
+        self, msg: str, doc_dec: Mapping[str, str], doc_enc: EncodedDict, field: str
     ):
         errmsg = f"{msg}: field {field}"
         ValueError.__init__(self, errmsg)
@@ -35,20 +56,41 @@ class EncodeError(ValueError):
 
     def __reduce__(
         self,
-    ) -> Tuple[Type["EncodeError"], Tuple[str, DecodedDict, EncodedDict, str]]:
+    ) -> Tuple[Type["EncodeError"], Tuple[str, Mapping[str, str], EncodedDict, str]]:
         return self.__class__, (self.msg, self.doc_dec, self.doc_enc, self.field)
 
 
-def encode(doc_dec: DecodedDict, spec: SpecDict) -> Tuple[bytearray, EncodedDict]:
+def encode(
+    doc_dec: Mapping[str, str],
+    spec: SpecDict,
+    bitmap: Optional[int] = None,
+    mutate: bool = True,
+) -> Tuple[bytearray, EncodedDict]:
     r"""Serialize Python dict containing ISO8583 data to a bytearray.
 
     Parameters
     ----------
     doc_dec : dict
-        Dict containing decoded ISO8583 data
-    spec : dict
+        Dict containing decoded ISO8583 data. Fields with **subfields**
+        in the specification accept a dict of subfields in place
+        of a string. See :func:`iso8583.encode_subfields`.
+    spec : dict or CompiledSpec
         A Python dict defining ISO8583 specification.
         See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+    bitmap : int, optional
+        Precomputed bitmap of fields to encode. Field N corresponds to
+        bit ``1 << (192 - N)``, i.e. primary, secondary and tertiary bitmaps
+        read as a single 192-bit big-endian integer. Bits for fields 1 and 65
+        are ignored and calculated as needed. When provided, dict keys are not
+        examined and only fields enabled in the bitmap are encoded.
+        By default, the bitmap is calculated from `doc_dec` keys.
+    mutate : bool, optional
+        If true (default), fields 1 and 65 are removed from `doc_dec`
+        and calculated bitmaps are stored into `doc_dec` fields p and 1.
+        If false, `doc_dec` is not modified and can be any mapping,
+        e.g. a ``MappingProxyType`` of a shared template.
 
     Returns
     -------
@@ -62,7 +104,8 @@ def encode(doc_dec: DecodedDict, spec: SpecDict) -> Tuple[bytearray, EncodedDict
     EncodeError
         An error encoding ISO8583 bytearray
     TypeError
-        `doc_dec` must be a dict instance
+        `doc_dec` must be a dict or :class:`iso8583.LazyMessage` instance,
+        or a mapping if `mutate` is false
 
     Examples
     --------
@@ -75,106 +118,549 @@ def encode(doc_dec: DecodedDict, spec: SpecDict) -> Tuple[bytearray, EncodedDict
     >>> s, doc_enc = iso8583.encode(doc_dec, spec)
     >>> s
     bytearray(b'0210200000000200000011111105')
+
+    Encode a message with a precomputed bitmap of fields 3 and 39.
+
+    >>> bitmap = 1 << (192 - 3) | 1 << (192 - 39)
+    >>> s, doc_enc = iso8583.encode(doc_dec, spec, bitmap=bitmap)
+    >>> s
+    bytearray(b'0210200000000200000011111105')
+    """
+
+    doc_bitmaps = _get_doc_bitmaps(doc_dec, mutate)
+    doc_enc: EncodedDict = {}
+    _encode(
+        doc_dec, doc_bitmaps, doc_enc, _get_fields(spec), bitmap, _get_layouts(spec)
+    )
+
+    s = bytearray()
+    for field_enc in doc_enc.values():
+        s += field_enc["len"]
+        s += field_enc["data"]
+
+    return s, doc_enc
+
+
+def encode_fast(
+    doc_dec: Mapping[str, str],
+    spec: SpecDict,
+    bitmap: Optional[int] = None,
+    mutate: bool = True,
+) -> bytearray:
+    r"""Serialize Python dict containing ISO8583 data to a bytearray
+    without building encoded data dict.
+
+    Encoded data dict is built only when an error occurs
+    so that :class:`iso8583.EncodeError` carries the same
+    partially encoded data as with :func:`iso8583.encode`.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+    bitmap : int, optional
+        Precomputed bitmap of fields to encode. See :func:`iso8583.encode`.
+    mutate : bool, optional
+        Store calculated bitmaps into `doc_dec` (default).
+        See :func:`iso8583.encode`.
+
+    Returns
+    -------
+    s : bytearray
+        Encoded ISO8583 data
+
+    Raises
+    ------
+    EncodeError
+        An error encoding ISO8583 bytearray
+    TypeError
+        `doc_dec` must be a dict or :class:`iso8583.LazyMessage` instance,
+        or a mapping if `mutate` is false
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> doc_dec = {
+    ...     't': '0210',
+    ...     '3': '111111',
+    ...     '39': '05'}
+    >>> iso8583.encode_fast(doc_dec, spec)
+    bytearray(b'0210200000000200000011111105')
+    """
+
+    doc_bitmaps = _get_doc_bitmaps(doc_dec, mutate)
+    s = _encode_fast(
+        doc_dec, doc_bitmaps, _get_fields(spec), bitmap, _get_layouts(spec)
+    )
+    if s is None:
+        # Let the regular encoder report the error along with partial data
+        s = encode(doc_dec, spec, bitmap, mutate)[0]
+    return s
+
+
+def encode_into(
+    doc_dec: Mapping[str, str],
+    spec: SpecDict,
+    buf: Union[bytearray, memoryview],
+    offset: int = 0,
+    prefix_len: int = 0,
+    bitmap: Optional[int] = None,
+    mutate: bool = True,
+) -> int:
+    r"""Serialize Python dict containing ISO8583 data into a preallocated buffer.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+    buf : bytearray or memoryview
+        Writable buffer that receives encoded ISO8583 data.
+        The buffer is never resized.
+    offset : int, optional
+        Position in `buf` where writing starts (default 0)
+    prefix_len : int, optional
+        Number of bytes to leave untouched at `offset` for a transport
+        length prefix. Encoded ISO8583 data starts at `offset + prefix_len`.
+        (default 0)
+    bitmap : int, optional
+        Precomputed bitmap of fields to encode. See :func:`iso8583.encode`.
+    mutate : bool, optional
+        Store calculated bitmaps into `doc_dec` (default).
+        See :func:`iso8583.encode`.
+
+    Returns
+    -------
+    int
+        Length of encoded ISO8583 data, not including `prefix_len`
+
+    Raises
+    ------
+    EncodeError
+        An error encoding ISO8583 data or encoded data does not fit into `buf`
+    TypeError
+        `doc_dec` must be a dict or :class:`iso8583.LazyMessage` instance,
+        or a mapping if `mutate` is false.
+        `buf` must be a bytearray or a writable memoryview.
+    ValueError
+        `offset` and `prefix_len` must not be negative
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> doc_dec = {
+    ...     't': '0210',
+    ...     '3': '111111',
+    ...     '39': '05'}
+    >>> buf = bytearray(64)
+    >>> n = iso8583.encode_into(doc_dec, spec, buf, prefix_len=2)
+    >>> buf[:2] = n.to_bytes(2, "big")
+    >>> bytes(buf[: 2 + n])
+    b'\x00\x1c0210200000000200000011111105'
     """
 
-    if not isinstance(doc_dec, dict):
+    doc_bitmaps = _get_doc_bitmaps(doc_dec, mutate)
+
+    if buf.__class__ is memoryview:
+        if buf.readonly:
+            raise TypeError("Buffer must be writable")
+        if buf.format != "B" or buf.ndim != 1:
+            buf = buf.cast("B")
+    elif not isinstance(buf, bytearray):
         raise TypeError(
-            f"Decoded ISO8583 data must be dict, not {doc_dec.__class__.__name__}"
+            f"Buffer must be bytearray or memoryview, not {buf.__class__.__name__}"
         )
 
-    s = bytearray()
+    if offset < 0 or prefix_len < 0:
+        raise ValueError("Offset and prefix length must not be negative")
+
     doc_enc: EncodedDict = {}
+    _encode(
+        doc_dec, doc_bitmaps, doc_enc, _get_fields(spec), bitmap, _get_layouts(spec)
+    )
 
-    # Secondary bitmaps will be calculated as needed
-    doc_dec.pop("1", None)
-    # Extended bitmap indicator must not be an actual field
-    doc_dec.pop("65", None)
+    # Verify that the whole message fits before writing anything
+    start = offset + prefix_len
+    idx = start
+    buf_len = len(buf)
+    for field_key, field_enc in doc_enc.items():
+        idx += len(field_enc["len"]) + len(field_enc["data"])
+        if idx > buf_len:
+            raise EncodeError(
+                f"Encoded data does not fit into buffer of {buf_len} bytes at offset {offset}",
+                doc_dec,
+                doc_enc,
+                field_key,
+            )
+
+    idx = start
+    for field_enc in doc_enc.values():
+        for data in (field_enc["len"], field_enc["data"]):
+            data_len = len(data)
+            buf[idx : idx + data_len] = data
+            idx += data_len
+
+    return idx - start
+
+
+def encode_subfields(
+    doc_dec: Mapping[str, Any], spec: SpecDict, field_key: str
+) -> Tuple[bytes, EncodedDict]:
+    r"""Serialize Python dict containing subfields of a composite field.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded subfields. Subfields that have their
+        own subfields accept either a string or a nested dict.
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        A specification compiled with :func:`iso8583.compile_spec`
+        is accepted as well.
+    field_key : str
+        Field ID with **subfields** in the specification
+
+    Returns
+    -------
+    s : bytes
+        Encoded field data without field length
+    doc_enc : dict
+        Dict containing encoded subfields
+
+    Raises
+    ------
+    EncodeError
+        An error encoding subfields. Error field is a dotted path to
+        the subfield, e.g. ``48.01``.
+    KeyError
+        Field is not defined in the specification
+    TypeError
+        `doc_dec` must be a mapping
+    ValueError
+        Field has no subfields in the specification
+
+    Notes
+    -----
+    Bitmap of ``bitmap`` subfield layout is calculated from `doc_dec` keys.
+    Subfield ``p`` of `doc_dec` is ignored and is not modified.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii
+    >>> spec = dict(default_ascii)
+    >>> spec["62"] = {
+    ...     "data_enc": "ascii", "len_enc": "ascii", "len_type": 3, "max_len": 999,
+    ...     "subfield_format": "bitmap",
+    ...     "subfields": {
+    ...         "p": {"data_enc": "b", "len_enc": "b", "len_type": 0, "max_len": 1},
+    ...         "1": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 1},
+    ...         "2": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 15},
+    ...     },
+    ... }
+    >>> iso8583.encode_subfields({"1": "Y"}, spec, "62")[0]
+    b'\x80Y'
+    >>> s, doc_enc = iso8583.encode({"t": "0100", "62": {"1": "Y"}}, spec)
+    >>> s
+    bytearray(b'01000000000000000004002\x80Y')
+    """
 
-    s += _encode_header(doc_dec, doc_enc, spec)
-    s += _encode_type(doc_dec, doc_enc, spec)
+    if not isinstance(doc_dec, Mapping):
+        raise TypeError(
+            f"Decoded subfields must be a mapping, not {doc_dec.__class__.__name__}"
+        )
+
+    subfields = _get_fields(spec)[field_key].subfields
+    if subfields is None:
+        raise ValueError(f"Field {field_key} has no subfields")
 
     try:
-        fields: Set[int] = set([int(k) for k in doc_dec.keys() if k.isnumeric()])
-    except AttributeError:
+        return _encode_subfields(doc_dec, subfields)
+    except EncodeError as e:
         raise EncodeError(
-            f"Dictionary contains invalid fields {[k for k in doc_dec.keys() if not isinstance(k, str)]}",
-            doc_dec,
-            doc_enc,
-            "p",
+            e.msg,
+            e.doc_dec,
+            e.doc_enc,
+            f"{field_key}.{e.field}" if e.field else field_key,
         ) from None
 
-    # Verify valid field range: 1-192
-    if not fields.issubset(range(1, 193)):
-        raise EncodeError(
-            f"Dictionary contains fields outside of 1-192 range {sorted(fields.difference(range(1, 193)))}",
-            doc_dec,
-            doc_enc,
-            "p",
+
+#
+# Private interface
+#
+
+_FieldsSpec = Mapping[str, CompiledField]
+
+
+def _get_doc_bitmaps(doc_dec: Mapping[str, str], mutate: bool) -> DecodedDict:
+    r"""Validate decoded data type and select where calculated bitmaps are stored.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    mutate : bool
+        If true then bitmaps are stored into `doc_dec`
+
+    Returns
+    -------
+    dict
+        `doc_dec` or a new dict for calculated bitmaps
+
+    Raises
+    ------
+    TypeError
+        `doc_dec` must be a dict or :class:`iso8583.LazyMessage` instance,
+        or a mapping if `mutate` is false
+    """
+    if mutate:
+        if isinstance(doc_dec, (dict, LazyMessage)):
+            return doc_dec
+        raise TypeError(
+            f"Decoded ISO8583 data must be dict, not {doc_dec.__class__.__name__}"
         )
 
-    # Add tertiary bitmap if any 129-192 fields are present
-    tertiary_fields = fields.intersection(range(129, 193))
-    if tertiary_fields:
-        fields.add(65)
+    if isinstance(doc_dec, Mapping):
+        return {}
+    raise TypeError(
+        f"Decoded ISO8583 data must be a mapping, not {doc_dec.__class__.__name__}"
+    )
+
+
+def _encode(
+    doc_dec: Mapping[str, str],
+    doc_bitmaps: DecodedDict,
+    doc_enc: EncodedDict,
+    fields_spec: _FieldsSpec,
+    bitmap: Optional[int],
+    layouts: Optional[_LayoutCache] = None,
+) -> None:
+    r"""Encode ISO8583 fields from `doc_dec` into `doc_enc` in transmission order.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_bitmaps : dict
+        Dict receiving calculated bitmaps. Either `doc_dec` or a separate dict.
+    doc_enc : dict
+        Dict containing encoded ISO8583 data
+    fields_spec : dict
+        A Python dict of compiled ISO8583 field specifications.
+        See :mod:`iso8583.compiler` module.
+    bitmap : int, optional
+        Precomputed bitmap of fields to encode
+    layouts : _LayoutCache, optional
+        Layout cache of the compiled specification
+
+    Raises
+    ------
+    EncodeError
+        An error encoding ISO8583 bytearray.
+    """
+    for field_key in _encode_preamble(
+        doc_dec, doc_bitmaps, doc_enc, fields_spec, bitmap, layouts
+    ):
+        _encode_field(doc_dec, doc_enc, fields_spec[field_key])
+
+
+def _encode_preamble(
+    doc_dec: Mapping[str, str],
+    doc_bitmaps: DecodedDict,
+    doc_enc: EncodedDict,
+    fields_spec: _FieldsSpec,
+    bitmap: Optional[int],
+    layouts: Optional[_LayoutCache] = None,
+) -> List[str]:
+    r"""Encode ISO8583 header, message type and bitmaps.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_bitmaps : dict
+        Dict receiving calculated bitmaps. Either `doc_dec` or a separate dict.
+    doc_enc : dict
+        Dict containing encoded ISO8583 data
+    fields_spec : dict
+        A Python dict of compiled ISO8583 field specifications.
+        See :mod:`iso8583.compiler` module.
+    bitmap : int, optional
+        Precomputed bitmap of fields to encode
+    layouts : _LayoutCache, optional
+        Layout cache of the compiled specification
+
+    Returns
+    -------
+    list
+        Keys of fields enabled in the bitmaps, in order of transmission
+
+    Raises
+    ------
+    EncodeError
+        An error encoding ISO8583 bytearray.
+    """
+    # Secondary bitmaps will be calculated as needed
+    doc_bitmaps.pop("1", None)
+    # Extended bitmap indicator must not be an actual field
+    doc_bitmaps.pop("65", None)
+
+    _encode_header(doc_dec, doc_enc, fields_spec)
+    _encode_type(doc_dec, doc_enc, fields_spec["t"])
+
+    # Dicts with the same keys enable the same fields
+    layout_key: Optional[Tuple[str, Tuple[str, ...]]] = None
+    layout = None
+    if layouts is not None and bitmap is None:
+        layout_key = ("fields", tuple(doc_dec))
+        layout = layouts.get(layout_key)
+
+    field_keys: List[str]
+    if layout is not None:
+        bitmap_bytes = bytearray(layout[0])
+        field_keys = list(layout[1])
+    else:
+        if bitmap is None:
+            bitmap_bytes = _build_bitmap(doc_dec, doc_enc)
+        else:
+            bitmap_bytes = _convert_bitmap(doc_dec, doc_enc, bitmap)
 
-    # Add secondary bitmap if any 65-128 fields are present
-    secondary_fields = fields.intersection(range(65, 129))
-    if secondary_fields:
-        fields.add(1)
+        # Bitmap tables produce keys of present fields in ascending order
+        field_keys = []
+        for table, byte in zip(_BITMAP_TABLES, bitmap_bytes):
+            if byte:
+                field_keys += table[byte]
 
-    s += _encode_bitmap(
+        # Add tertiary bitmap if any 129-192 fields are present
+        if any(bitmap_bytes[16:]):
+            bitmap_bytes[8] |= 0x80
+
+        # Add secondary bitmap if any 65-128 fields are present
+        if any(bitmap_bytes[8:16]):
+            bitmap_bytes[0] |= 0x80
+
+        if layouts is not None and layout_key is not None:
+            layouts.put(layout_key, (bytes(bitmap_bytes), tuple(field_keys)))
+
+    _encode_bitmap(
         doc_dec,
+        doc_bitmaps,
         doc_enc,
-        "p",
-        spec["p"],
-        0,
+        fields_spec["p"],
         False,
-        fields.intersection(range(1, 65)),
+        bitmap_bytes[:8],
     )
 
-    if 1 in fields:
-        s += _encode_bitmap(
+    if bitmap_bytes[0] & 0x80:
+        _encode_bitmap(
             doc_dec,
+            doc_bitmaps,
             doc_enc,
-            "1",
-            spec["1"],
-            64,
+            fields_spec["1"],
             False,
-            secondary_fields,
+            bitmap_bytes[8:16],
         )
-        fields.remove(1)
 
-    if 65 in fields:
-        s += _encode_bitmap(
+    if bitmap_bytes[8] & 0x80:
+        _encode_bitmap(
             doc_dec,
+            doc_bitmaps,
             doc_enc,
-            "1",
-            spec["1"],
-            128,
+            fields_spec["1"],
             True,
-            tertiary_fields,
+            bitmap_bytes[16:],
         )
-        fields.remove(65)
 
-    for field_key in [str(i) for i in sorted(fields)]:
-        s += _encode_field(doc_dec, doc_enc, field_key, spec[field_key])
+    return field_keys
 
-    return s, doc_enc
 
+def _encode_fast(
+    doc_dec: Mapping[str, str],
+    doc_bitmaps: DecodedDict,
+    fields_spec: _FieldsSpec,
+    bitmap: Optional[int],
+    layouts: Optional[_LayoutCache] = None,
+) -> Optional[bytearray]:
+    r"""Serialize ISO8583 data without building encoded data dict for fields.
 
-#
-# Private interface
-#
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_bitmaps : dict
+        Dict receiving calculated bitmaps. Either `doc_dec` or a separate dict.
+    fields_spec : dict
+        A Python dict of compiled ISO8583 field specifications.
+        See :mod:`iso8583.compiler` module.
+    bitmap : int, optional
+        Precomputed bitmap of fields to encode
+    layouts : _LayoutCache, optional
+        Layout cache of the compiled specification
+
+    Returns
+    -------
+    bytearray or None
+        Encoded ISO8583 data or None if data cannot be encoded
+    """
+    doc_enc: EncodedDict = {}
+    try:
+        field_keys = _encode_preamble(
+            doc_dec, doc_bitmaps, doc_enc, fields_spec, bitmap, layouts
+        )
+    except EncodeError:
+        return None
 
-_FieldSpecDict = Mapping[str, Any]
+    s = bytearray()
+    for field_enc in doc_enc.values():
+        s += field_enc["len"]
+        s += field_enc["data"]
 
+    try:
+        for field_key in field_keys:
+            field = fields_spec[field_key]
+            field_data, enc_field_len = field.encode_data(doc_dec[field_key])
+            if field.len_type == 0:
+                if enc_field_len != field.max_len:
+                    return None
+            else:
+                if enc_field_len > field.max_len:
+                    return None
+                s += field.encode_len(enc_field_len)
+            s += field_data
+    except Exception:
+        return None
 
-def _encode_header(
-    doc_dec: DecodedDict,
-    doc_enc: EncodedDict,
-    spec: SpecDict,
-) -> bytes:
-    r"""Encode ISO8583 header data if present from `d["h"]`.
+    return s
+
+
+# Bitmap byte index and bit mask of each field
+_FIELD_BITS: Dict[str, Tuple[int, int]] = {
+    str(field_num): ((field_num - 1) // 8, 0x80 >> ((field_num - 1) % 8))
+    for field_num in range(1, 193)
+}
+
+# Per-byte field key tables for all 24 bytes of primary,
+# secondary and tertiary bitmaps. Fields 1 and 65 are never
+# in a message, they are set when the bitmaps are encoded.
+_BITMAP_TABLES = (
+    _DECODER_BITMAP_TABLES[0] + _DECODER_BITMAP_TABLES[64] + _DECODER_BITMAP_TABLES[128]
+)
+
+
+def _build_bitmap(doc_dec: Mapping[str, str], doc_enc: EncodedDict) -> bytearray:
+    r"""Build primary, secondary and tertiary bitmaps from `doc_dec` keys.
 
     Parameters
     ----------
@@ -182,14 +668,150 @@ def _encode_header(
         Dict containing decoded ISO8583 data
     doc_enc : dict
         Dict containing encoded ISO8583 data
-    spec : dict
-        A Python dict defining ISO8583 specification.
-        See :mod:`iso8583.specs` module for examples.
 
     Returns
     -------
-    bytes
-        Encoded ISO8583 header data
+    bytearray
+        24 bytes of bitmaps with fields 1 and 65 disabled
+
+    Raises
+    ------
+    EncodeError
+        An error encoding ISO8583 bytearray.
+    """
+    bitmap = bytearray(24)
+    invalid_keys = []
+    for field_key in doc_dec:
+        try:
+            byte, mask = _FIELD_BITS[field_key]
+        except KeyError:
+            # Non-numeric keys, such as header or type, are not fields
+            if not isinstance(field_key, str) or field_key.isnumeric():
+                invalid_keys.append(field_key)
+            continue
+        bitmap[byte] |= mask
+
+    if invalid_keys:
+        _raise_invalid_keys(doc_dec, doc_enc, invalid_keys)
+
+    # Fields 1 and 65 are calculated as needed
+    bitmap[0] &= 0x7F
+    bitmap[8] &= 0x7F
+
+    return bitmap
+
+
+def _convert_bitmap(
+    doc_dec: Mapping[str, str], doc_enc: EncodedDict, bitmap: int
+) -> bytearray:
+    r"""Convert precomputed bitmap integer to primary, secondary and tertiary bitmaps.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_enc : dict
+        Dict containing encoded ISO8583 data
+    bitmap : int
+        192-bit integer where field N corresponds to bit ``1 << (192 - N)``
+
+    Returns
+    -------
+    bytearray
+        24 bytes of bitmaps with fields 1 and 65 disabled
+
+    Raises
+    ------
+    EncodeError
+        An error encoding ISO8583 bytearray.
+    """
+    try:
+        bitmap_bytes = bytearray(bitmap.to_bytes(24, "big"))
+    except (AttributeError, OverflowError):
+        raise EncodeError(
+            f"Bitmap must be a non-negative 192-bit integer, not {bitmap!r}",
+            doc_dec,
+            doc_enc,
+            "p",
+        ) from None
+
+    bitmap_bytes[0] &= 0x7F
+    bitmap_bytes[8] &= 0x7F
+
+    for table, byte in zip(_BITMAP_TABLES, bitmap_bytes):
+        if byte:
+            for field_key in table[byte]:
+                if field_key not in doc_dec:
+                    raise EncodeError(
+                        "Field data is required according to bitmap",
+                        doc_dec,
+                        doc_enc,
+                        field_key,
+                    )
+
+    return bitmap_bytes
+
+
+def _raise_invalid_keys(
+    doc_dec: Mapping[str, str], doc_enc: EncodedDict, invalid_keys: List[Any]
+) -> NoReturn:
+    r"""Report dict keys that cannot be encoded as fields.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_enc : dict
+        Dict containing encoded ISO8583 data
+    invalid_keys : list
+        Non-string keys and numeric keys that are not fields 1-192
+
+    Raises
+    ------
+    EncodeError
+        An error encoding ISO8583 bytearray.
+    """
+    # Numeric keys outside of field range are reported as such.
+    # Anything else, e.g. "002" or 2, is not a valid field key.
+    out_of_range = [
+        k
+        for k in invalid_keys
+        if isinstance(k, str) and k.isdecimal() and not 1 <= int(k) <= 192
+    ]
+    invalid_keys = [k for k in invalid_keys if k not in out_of_range]
+
+    if invalid_keys:
+        raise EncodeError(
+            f"Dictionary contains invalid fields {invalid_keys}",
+            doc_dec,
+            doc_enc,
+            "p",
+        )
+
+    raise EncodeError(
+        f"Dictionary contains fields outside of 1-192 range {sorted(int(k) for k in out_of_range)}",
+        doc_dec,
+        doc_enc,
+        "p",
+    )
+
+
+def _encode_header(
+    doc_dec: Mapping[str, str],
+    doc_enc: EncodedDict,
+    fields_spec: _FieldsSpec,
+) -> None:
+    r"""Encode ISO8583 header data if present from `d["h"]`.
+
+    Parameters
+    ----------
+    doc_dec : dict
+        Dict containing decoded ISO8583 data
+    doc_enc : dict
+        Dict containing encoded ISO8583 data
+    fields_spec : dict
+        A Python dict of compiled ISO8583 field specifications.
+        See :mod:`iso8583.compiler` module.
 
     Raises
     ------
@@ -198,8 +820,8 @@ def _encode_header(
     """
 
     # Header is not expected according to specifications
-    if spec["h"]["max_len"] <= 0:
-        return b""
+    if fields_spec["h"].max_len <= 0:
+        return
 
     # Header data is a required field.
     if "h" not in doc_dec:
@@ -207,14 +829,14 @@ def _encode_header(
             "Field data is required according to specifications", doc_dec, doc_enc, "h"
         )
 
-    return _encode_field(doc_dec, doc_enc, "h", spec["h"])
+    _encode_field(doc_dec, doc_enc, fields_spec["h"])
 
 
 def _encode_type(
-    doc_dec: DecodedDict,
+    doc_dec: Mapping[str, str],
     doc_enc: EncodedDict,
-    spec: SpecDict,
-) -> bytes:
+    field: CompiledField,
+) -> None:
     r"""Encode ISO8583 message type from `d["t"]`.
 
     Parameters
@@ -223,14 +845,9 @@ def _encode_type(
         Dict containing decoded ISO8583 data
     doc_enc : dict
         Dict containing encoded ISO8583 data
-    spec : dict
-        A Python dict defining ISO8583 specification.
-        See :mod:`iso8583.specs` module for examples.
-
-    Returns
-    -------
-    bytes
-        Encoded ISO8583 message type data
+    field : CompiledField
+        Compiled ISO8583 specification for the message type.
+        See :mod:`iso8583.compiler` module.
 
     Raises
     ------
@@ -243,31 +860,14 @@ def _encode_type(
         raise EncodeError("Field data is required", doc_dec, doc_enc, "t")
 
     # Message type is a set length in ISO8583
-    if spec["t"]["data_enc"] == "b":
+    if field.binary:
         expected_field_len = 2
     else:
         expected_field_len = 4
 
     doc_enc["t"] = {"len": b"", "data": b""}
-
-    if spec["t"]["data_enc"] == "b":
-        doc_enc["t"]["data"], enc_field_len = _encode_bindary_field(
-            doc_dec,
-            doc_enc,
-            doc_dec["t"],
-            "t",
-            spec["t"],
-            "bytes",
-        )
-    else:
-        doc_enc["t"]["data"], enc_field_len = _encode_text_field(
-            doc_dec,
-            doc_enc,
-            doc_dec["t"],
-            "t",
-            spec["t"],
-            "bytes",
-        )
+    doc_enc["t"]["data"] = _encode_data(doc_dec, doc_enc, doc_dec["t"], field)[0]
+    enc_field_len = len(doc_enc["t"]["data"])
 
     if enc_field_len != expected_field_len:
         raise EncodeError(
@@ -277,100 +877,64 @@ def _encode_type(
             "t",
         )
 
-    return doc_enc["t"]["data"]
-
 
 def _encode_bitmap(
-    doc_dec: DecodedDict,
+    doc_dec: Mapping[str, str],
+    doc_bitmaps: DecodedDict,
     doc_enc: EncodedDict,
-    field_key: str,
-    field_spec: _FieldSpecDict,
-    field_offset: Literal[0, 64, 128],
+    field: CompiledField,
     is_extended: bool,
-    fields: Set[int],
-) -> bytes:
+    bitmap: bytearray,
+) -> None:
     r"""Encode ISO8583 bitmap.
 
     Parameters
     ----------
     doc_dec : dict
         Dict containing decoded ISO8583 data
+    doc_bitmaps : dict
+        Dict receiving calculated bitmaps. Either `doc_dec` or a separate dict.
     doc_enc : dict
         Dict containing encoded ISO8583 data
-    field_key : str
-        Field ID to be encoded
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
-    field_offset : int
-        Offset by which to adjust fields to fit into 1-64 range.
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
     is_extended : bool
         If true then processing an extension of an already processed bitmap
-    fields: set
-        Will be populated with enabled field numbers
-
-    Returns
-    -------
-    bytes
-        Encoded ISO8583 bitmap data
+    bitmap : bytearray
+        8 bytes of bitmap data
 
     Raises
     ------
     EncodeError
         An error encoding ISO8583 bytearray.
     """
-
-    bitmap = bytearray(b"\x00\x00\x00\x00\x00\x00\x00\x00")
-
-    for field in fields:
-        # Fields start at 1. Make them zero-bound for easier conversion.
-        # Offset fields to fit into 0-7 byte.
-        field -= 1 + field_offset
-
-        # Place this particular field in a byte where it belongs.
-        # E.g. field 8 belongs to byte 0, field 64 belongs to byte 7.
-        byte = field // 8
-
-        # Determine bit to enable. ISO8583 bitmaps are left-aligned.
-        # E.g. fields 1, 9, 17, etc. enable bit 7 in bytes 0, 1, 2, etc.
-        bit = 7 - (field - byte * 8)
-        bitmap[byte] |= 1 << bit
-
+    field_key = field.key
     hex_bitmap = bitmap.hex().upper()
 
     if is_extended:
-        doc_dec[field_key] = doc_dec[field_key] + hex_bitmap
+        doc_bitmaps[field_key] = doc_bitmaps[field_key] + hex_bitmap
     else:
-        doc_dec[field_key] = hex_bitmap
+        doc_bitmaps[field_key] = hex_bitmap
         doc_enc[field_key] = {"len": b"", "data": b""}
 
-    if field_spec["data_enc"] == "b":
+    if field.binary:
         encoded_data = bytes(bitmap)
     else:
-        encoded_data, _ = _encode_text_field(
-            doc_dec,
-            doc_enc,
-            hex_bitmap,
-            field_key,
-            field_spec,
-            "bytes",
-        )
+        encoded_data = _encode_data(doc_dec, doc_enc, hex_bitmap, field)[0]
 
     if is_extended:
         doc_enc[field_key]["data"] = doc_enc[field_key]["data"] + encoded_data
     else:
         doc_enc[field_key]["data"] = encoded_data
 
-    return encoded_data
-
 
 def _encode_field(
-    doc_dec: DecodedDict,
+    doc_dec: Mapping[str, str],
     doc_enc: EncodedDict,
-    field_key: str,
-    field_spec: _FieldSpecDict,
-) -> bytes:
-    r"""Encode ISO8583 individual field from `doc_dec[field_key]`.
+    field: CompiledField,
+) -> None:
+    r"""Encode ISO8583 individual field from `doc_dec[field.key]`.
 
     Parameters
     ----------
@@ -378,150 +942,58 @@ def _encode_field(
         Dict containing decoded ISO8583 data
     doc_enc : dict
         Dict containing encoded ISO8583 data
-    field_key : str
-        Field ID to be encoded
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
-
-    Returns
-    -------
-    bytes
-        Encoded ISO8583 field data
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
 
     Raises
     ------
     EncodeError
         An error encoding ISO8583 bytearray.
     """
+    field_key = field.key
 
     # Encode field data
     doc_enc[field_key] = {"len": b"", "data": b""}
-
-    # Optional field added in v2.1. Prior specs do not have it.
-    len_count = field_spec.get("len_count", "bytes")
-
-    # Binary data: either hex or BCD
-    if field_spec["data_enc"] == "b":
-        doc_enc[field_key]["data"], enc_field_len = _encode_bindary_field(
-            doc_dec,
-            doc_enc,
-            doc_dec[field_key],
-            field_key,
-            field_spec,
-            len_count,
-        )
-    # Text data
-    else:
-        doc_enc[field_key]["data"], enc_field_len = _encode_text_field(
-            doc_dec,
-            doc_enc,
-            doc_dec[field_key],
-            field_key,
-            field_spec,
-            len_count,
-        )
-
-    len_type = field_spec["len_type"]
+    doc_enc[field_key]["data"], enc_field_len = _encode_data(
+        doc_dec, doc_enc, doc_dec[field_key], field
+    )
 
     # Handle fixed length field. No need to calculate length.
-    if len_type == 0:
-        if enc_field_len != field_spec["max_len"]:
+    if field.len_type == 0:
+        if enc_field_len != field.max_len:
             raise EncodeError(
-                f"Field data is {enc_field_len} {len_count}, expecting {field_spec['max_len']}",
+                f"Field data is {enc_field_len} {field.len_count}, expecting {field.max_len}",
                 doc_dec,
                 doc_enc,
                 field_key,
             )
 
-        doc_enc[field_key]["len"] = b""
-        return doc_enc[field_key]["data"]
+        return
 
     # Continue with variable length field.
 
-    if enc_field_len > field_spec["max_len"]:
+    if enc_field_len > field.max_len:
         raise EncodeError(
-            f"Field data is {enc_field_len} {len_count}, larger than maximum {field_spec['max_len']}",
+            f"Field data is {enc_field_len} {field.len_count}, larger than maximum {field.max_len}",
             doc_dec,
             doc_enc,
             field_key,
         )
 
-    # Encode binary field length
-    if field_spec["len_enc"] == "b":
-        try:
-            doc_enc[field_key]["len"] = (enc_field_len).to_bytes(
-                len_type, "big", signed=False
-            )
-        except OverflowError:
-            raise EncodeError(
-                "Failed to encode field length, field length does not fit into configured field size",
-                doc_dec,
-                doc_enc,
-                field_key,
-            ) from None
-    # Encode BCD field length
-    elif field_spec["len_enc"] == "bcd":
-        # Odd field length type is not allowed when translating string BCD. Pad it, e.g.:
-        # BCD LVAR length \x09 must be string "09"
-        # BCD LLVAR length \x99 must be string "99"
-        # BCD LLLVAR length \x09\x99 must be string "0999"
-        # BCD LLLLVAR length \x99\x99 must be string "9999"
-        bcd_field_len = "{:0{len_type}d}".format(enc_field_len, len_type=len_type * 2)
-
-        if len(bcd_field_len) > (len_type * 2):
-            raise EncodeError(
-                "Failed to encode field length, field length does not fit into configured field size",
-                doc_dec,
-                doc_enc,
-                field_key,
-            ) from None
-
-        doc_enc[field_key]["len"] = binascii.a2b_hex(bcd_field_len)
-    else:
-        try:
-            doc_enc[field_key]["len"] = bytes(
-                "{:0{len_type}d}".format(enc_field_len, len_type=len_type),
-                field_spec["len_enc"],
-            )
-        except LookupError:
-            raise EncodeError(
-                "Failed to encode field length, unknown encoding specified",
-                doc_dec,
-                doc_enc,
-                field_key,
-            ) from None
-        # It does not seem to be possible to hit this because regular
-        # numeric characters seem to be always encodable.
-        # However, keeping this, because you just never know.
-        except Exception as e:  # pragma: no cover
-            raise EncodeError(
-                f"Failed to encode field length, {e}",
-                doc_dec,
-                doc_enc,
-                field_key,
-            ) from None
-
-        if len(doc_enc[field_key]["len"]) > len_type:
-            raise EncodeError(
-                "Failed to encode field length, field length does not fit into configured field size",
-                doc_dec,
-                doc_enc,
-                field_key,
-            ) from None
-
-    return doc_enc[field_key]["len"] + doc_enc[field_key]["data"]
+    try:
+        doc_enc[field_key]["len"] = field.encode_len(enc_field_len)
+    except _CodecError as e:
+        raise EncodeError(e.args[0], doc_dec, doc_enc, field_key) from None
 
 
-def _encode_bindary_field(
-    doc_dec: DecodedDict,
+def _encode_data(
+    doc_dec: Mapping[str, str],
     doc_enc: EncodedDict,
     field_data: str,
-    field_key: str,
-    field_spec: _FieldSpecDict,
-    len_count: str,
+    field: CompiledField,
 ) -> Tuple[bytes, int]:
-    r"""Encode ISO8583 individual field.
+    r"""Encode ISO8583 field data and handle errors if any.
 
     Parameters
     ----------
@@ -531,11 +1003,9 @@ def _encode_bindary_field(
         Dict containing encoded ISO8583 data
     field_data : str
         Field data to encode
-    field_key : str
-        Field ID to be encoded
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
+    field : CompiledField
+        Compiled ISO8583 specification for this field.
+        See :mod:`iso8583.compiler` module.
 
     Returns
     -------
@@ -547,131 +1017,203 @@ def _encode_bindary_field(
     EncodeError
         An error encoding ISO8583 bytearray.
     """
+    if field.subfields is not None and isinstance(field_data, Mapping):
+        return _encode_subfield_data(doc_dec, doc_enc, field_data, field)
     try:
-        # Odd length nibbles need to be padded because it's not possible to send half a byte
-        if len_count == "nibbles" and len(field_data) & 1:
-            data_to_encode = _add_pad_field(field_data, field_spec)
-        else:
-            data_to_encode = field_data
-        encoded_data = binascii.a2b_hex(data_to_encode)
-    except Exception:
-        if len_count == "nibbles" and len(data_to_encode) % 2 == 1:
-            raise EncodeError(
-                "Failed to encode field, odd-length nibble data, specify pad",
-                doc_dec,
-                doc_enc,
-                field_key,
-            ) from None
-        if len(data_to_encode) % 2 == 1:
-            raise EncodeError(
-                "Failed to encode field, odd-length hex data",
-                doc_dec,
-                doc_enc,
-                field_key,
-            ) from None
+        return field.encode_data(field_data)
+    except _CodecError as e:
+        raise EncodeError(e.args[0], doc_dec, doc_enc, field.key) from None
+
+
+#
+# Subfields
+#
+
+
+def _encode_subfield_data(
+    doc_dec: Mapping[str, Any],
+    doc_enc: EncodedDict,
+    field_data: Mapping[str, Any],
+    field: CompiledField,
+) -> Tuple[bytes, int]:
+    r"""Encode a dict of subfields into field data.
+
+    Returns
+    -------
+    tuple(bytes, int)
+        Encoded data and length of the encoded ISO8583 field data. The length is either nibbles or bytes.
+    """
+    assert field.subfields is not None
+    try:
+        data, _ = _encode_subfields(field_data, field.subfields)
+    except EncodeError as e:
         raise EncodeError(
-            "Failed to encode field, non-hex data",
+            e.msg,
             doc_dec,
             doc_enc,
-            field_key,
+            f"{field.key}.{e.field}" if e.field else field.key,
         ) from None
-
-    # Encoded field length can be in bytes or half bytes (nibbles).
-    # Encoded nibble length directly corresponds to the count of received nibbles.
-    if len_count == "nibbles":
-        return (encoded_data, len(field_data))
-    else:
-        return (encoded_data, len(encoded_data))
+    return data, len(data) * 2 if field.nibbles else len(data)
 
 
-def _add_pad_field(
-    field_data: str,
-    field_spec: _FieldSpecDict,
-) -> str:
-    r"""Pad a BCD or hex field from the left or right.
+def _encode_subfields(
+    doc_dec: Mapping[str, Any], subfields: CompiledSubfields
+) -> Tuple[bytes, EncodedDict]:
+    r"""Encode subfields of a composite field.
 
     Parameters
     ----------
     doc_dec : dict
-        Dict containing decoded ISO8583 data
-    field_data : str
-        Field data to encode
-    field_key : str
-        Field ID to pad
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
+        Dict containing decoded subfields
+    subfields : CompiledSubfields
+        Compiled subfield specification of the field.
+        See :mod:`iso8583.compiler` module.
 
     Returns
     -------
-    str
-        Padded field data
+    s : bytes
+        Encoded field data
+    doc_enc : dict
+        Dict containing encoded subfields
+
+    Raises
+    ------
+    EncodeError
+        An error encoding subfields. Error field is relative to this field.
     """
-    pad: str = field_spec.get("left_pad", "")[:1]
-    if len(pad) > 0:
-        return pad + field_data
+    doc_enc: EncodedDict = {}
+    fields_spec = subfields.fields
+    s = bytearray()
+
+    if subfields.format == "fixed":
+        _check_subfield_keys(doc_dec, doc_enc, fields_spec)
+        missing = ""
+        for field_key, field in fields_spec.items():
+            if field_key not in doc_dec:
+                missing = missing or field_key
+                continue
+            # Only trailing subfields may be omitted
+            if missing:
+                raise EncodeError(
+                    "Field data is required according to specifications",
+                    doc_dec,
+                    doc_enc,
+                    missing,
+                )
+            _encode_field(doc_dec, doc_enc, field)
+            s += doc_enc[field_key]["len"]
+            s += doc_enc[field_key]["data"]
+
+    elif subfields.format == "tlv":
+        _check_subfield_keys(doc_dec, doc_enc, fields_spec)
+        for field_key in doc_dec:
+            s += _encode_tag(doc_dec, doc_enc, field_key, subfields)
+            _encode_field(doc_dec, doc_enc, fields_spec[field_key])
+            s += doc_enc[field_key]["len"]
+            s += doc_enc[field_key]["data"]
+
+    elif subfields.format == "bitmap":
+        if "p" not in fields_spec:
+            raise EncodeError(
+                "Field is not defined in specification", doc_dec, doc_enc, "p"
+            )
+        bitmap_field = fields_spec["p"]
+        width = bitmap_field.max_len * (8 if bitmap_field.binary else 4)
+        _check_subfield_keys(doc_dec, doc_enc, fields_spec, width)
+        field_nums = sorted(int(k) for k in doc_dec if k != "p")
+        bitmap = 0
+        for field_num in field_nums:
+            bitmap |= 1 << (width - field_num)
+
+        _encode_field({"p": f"{bitmap:0{width // 4}X}"}, doc_enc, bitmap_field)
+        s += doc_enc["p"]["data"]
+        for field_num in field_nums:
+            field_key = str(field_num)
+            _encode_field(doc_dec, doc_enc, fields_spec[field_key])
+            s += doc_enc[field_key]["len"]
+            s += doc_enc[field_key]["data"]
 
-    pad = field_spec.get("right_pad", "")[:1]
-    if len(pad) > 0:
-        return field_data + pad
+    else:
+        raise EncodeError(
+            f"Unknown subfield format {subfields.format!r}", doc_dec, doc_enc, ""
+        )
 
-    return field_data
+    return bytes(s), doc_enc
 
 
-def _encode_text_field(
-    doc_dec: DecodedDict,
+def _check_subfield_keys(
+    doc_dec: Mapping[str, Any],
     doc_enc: EncodedDict,
-    field_data: str,
-    field_key: str,
-    field_spec: _FieldSpecDict,
-    len_count: str,
-) -> Tuple[bytes, int]:
-    r"""Encode ISO8583 individual field.
+    fields_spec: Mapping[str, CompiledField],
+    bitmap_width: int = 0,
+) -> None:
+    r"""Report subfields that are not defined in the specification.
 
     Parameters
     ----------
     doc_dec : dict
-        Dict containing decoded ISO8583 data
+        Dict containing decoded subfields
     doc_enc : dict
-        Dict containing encoded ISO8583 data
-    field_data : str
-        Field data to encode
-    field_key : str
-        Field ID to be encoded
-    field_spec : dict
-        A Python dict defining ISO8583 specification for this field.
-        See :mod:`iso8583.specs` module for examples.
-
-    Returns
-    -------
-    tuple(bytes, int)
-        Encoded data and length of the encoded ISO8583 field data. The length is either nibbles or bytes.
+        Dict containing encoded subfields
+    fields_spec : dict
+        Compiled subfield specifications
+    bitmap_width : int, optional
+        Number of subfields in the subfield bitmap
+        or 0 if subfields have no bitmap (default).
 
     Raises
     ------
     EncodeError
-        An error encoding ISO8583 bytearray.
+        An error encoding subfields.
     """
+    invalid_keys = [
+        k
+        for k in doc_dec
+        if k not in fields_spec
+        or (
+            bitmap_width
+            and k != "p"
+            and not (k in _FIELD_BITS and int(k) <= bitmap_width)
+        )
+    ]
+    if invalid_keys:
+        raise EncodeError(
+            f"Dictionary contains invalid fields {invalid_keys}",
+            doc_dec,
+            doc_enc,
+            "",
+        )
+
+
+def _encode_tag(
+    doc_dec: Mapping[str, Any],
+    doc_enc: EncodedDict,
+    field_key: str,
+    subfields: CompiledSubfields,
+) -> bytes:
+    r"""Encode subfield tag of a tag/length/value composite field."""
     try:
-        encoded_data = field_data.encode(field_spec["data_enc"])
+        if subfields.tag_enc == "b":
+            tag = bytes.fromhex(field_key)
+        else:
+            tag = field_key.encode(subfields.tag_enc)
     except LookupError:
         raise EncodeError(
-            "Failed to encode field, unknown encoding specified",
+            "Failed to encode tag, unknown encoding specified",
             doc_dec,
             doc_enc,
             field_key,
         ) from None
     except Exception:
         raise EncodeError(
-            "Failed to encode field, invalid data",
+            "Failed to encode tag, invalid data", doc_dec, doc_enc, field_key
+        ) from None
+
+    if len(tag) != subfields.tag_len:
+        raise EncodeError(
+            f"Tag is {len(tag)} bytes, expecting {subfields.tag_len}",
             doc_dec,
             doc_enc,
             field_key,
-        ) from None
-
-    # Encoded field length can be in bytes or half bytes (nibbles)
-    # Encoded nibble length directly corresponds to the count of received nibbles.
-    if len_count == "nibbles":
-        return (encoded_data, len(encoded_data) * 2)
-    else:
-        return (encoded_data, len(encoded_data))
+        )
+    return tag
@@ -0,0 +1,278 @@
+r"""Decode large files of length-prefixed ISO8583 messages on multiple processes.
+
+A file is split into chunks at frame boundaries. Each worker process maps
+the file into memory with :mod:`mmap` and decodes its chunks. Only the file
+path and chunk boundaries are sent to the workers. Decoded data is sent back
+as columns: one list per field with a value for every message.
+
+.. code-block:: python
+
+    >>> import os, tempfile
+    >>> import iso8583.parallel
+    >>> from iso8583.specs import default_ascii as spec
+    >>> frame = b"\x00\x20" + b"02004000000000000000101234567890"
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     path = os.path.join(tmp, "archive.bin")
+    ...     with open(path, "wb") as f:
+    ...         _ = f.write(frame * 3)
+    ...     columns, errors = iso8583.parallel.decode_file(path, spec, workers=1)
+    >>> columns["2"]
+    ['1234567890', '1234567890', '1234567890']
+    >>> errors
+    {}
+
+See :mod:`iso8583.stream` module for supported framing headers.
+"""
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Callable,
+    Container,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from iso8583.compiler import CompiledSpec, compile_spec
+from iso8583.decoder import DecodeError, SpecDict, _decode
+from iso8583.stream import _FRAMINGS, FramingError
+
+__all__ = ["decode_file"]
+
+ColumnsDict = Dict[str, List[Optional[str]]]
+
+
+def decode_file(
+    path: Union[str, "os.PathLike[str]"],
+    spec: SpecDict,
+    workers: Optional[int] = None,
+    framing: str = "b2",
+    fields: Optional[Container[str]] = None,
+    chunks_per_worker: int = 4,
+) -> Tuple[ColumnsDict, Dict[int, DecodeError]]:
+    r"""Decode a file of length-prefixed ISO8583 messages on multiple processes.
+
+    Parameters
+    ----------
+    path : str or path-like
+        File containing framed ISO8583 messages
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+        The file is decoded in the calling process when set to 1.
+    framing : str, optional
+        Length header format (default ``"b2"``).
+        See :mod:`iso8583.stream` module.
+    fields : set, optional
+        Keys of fields to decode. See :func:`iso8583.decode`.
+    chunks_per_worker : int, optional
+        Number of chunks per worker (default 4). More chunks balance
+        the load better at the cost of more inter-process messages.
+
+    Returns
+    -------
+    columns : dict
+        Dict of field keys to lists of decoded field data with one item
+        per message in file order. An item is None if the message does not
+        contain the field or failed to decode. Fields that are absent from
+        every message are not included.
+    errors : dict
+        Dict of message numbers to :class:`iso8583.DecodeError`.
+        Errors do not carry partially decoded data: `doc_dec` and
+        `doc_enc` are empty. `s` holds the message that failed to decode.
+
+    Raises
+    ------
+    FramingError
+        An error decoding a length header or the last message is incomplete
+    ValueError
+        Unknown framing or invalid number of workers
+    OSError
+        An error reading the file
+
+    Notes
+    -----
+    The file is scanned once in the calling process to find frame
+    boundaries. Messages are decoded in the worker processes.
+    """
+    if framing not in _FRAMINGS:
+        raise ValueError(
+            f"Unknown framing {framing!r}, expecting one of {sorted(_FRAMINGS)}"
+        )
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1 or chunks_per_worker < 1:
+        raise ValueError("Number of workers and chunks per worker must be at least 1")
+
+    path = os.fspath(path)
+    spec = compile_spec(spec)
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            return {}, {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunks = _split(mm, framing, workers * chunks_per_worker)
+            if workers == 1:
+                # Decode in this process without touching worker globals
+                # so that concurrent calls from several threads are safe
+                header_len, decode_len, _ = _FRAMINGS[framing]
+                results = [
+                    _decode_frames(mm, spec, fields, header_len, decode_len, start, end)
+                    for start, end, _ in chunks
+                ]
+                return _merge(results, [count for _, _, count in chunks])
+
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(path, spec, framing, fields)
+    ) as executor:
+        # Results come back in chunk order regardless of completion order
+        results = list(
+            executor.map(
+                _decode_chunk,
+                [start for start, _, _ in chunks],
+                [end for _, end, _ in chunks],
+            )
+        )
+
+    return _merge(results, [count for _, _, count in chunks])
+
+
+#
+# Private interface
+#
+
+
+def _split(mm: mmap.mmap, framing: str, chunk_count: int) -> List[Tuple[int, int, int]]:
+    r"""Split framed data into chunks of about the same size.
+
+    Returns
+    -------
+    list of (int, int, int)
+        Chunk start offset, end offset and number of messages
+    """
+    header_len, decode_len, _ = _FRAMINGS[framing]
+    size = len(mm)
+    chunk_size = max(1, size // chunk_count)
+
+    chunks: List[Tuple[int, int, int]] = []
+    start = pos = count = 0
+    while pos < size:
+        data_pos = pos + header_len
+        header = mm[pos:data_pos]
+        if data_pos > size:
+            raise FramingError("Incomplete length header at end of file", header)
+        pos = data_pos + decode_len(header)
+        if pos > size:
+            raise FramingError("Incomplete message at end of file", header)
+        count += 1
+        if pos - start >= chunk_size:
+            chunks.append((start, pos, count))
+            start = pos
+            count = 0
+
+    if count:
+        chunks.append((start, pos, count))
+    return chunks
+
+
+# Worker process state set up by _init_worker()
+_worker_mm: Optional[mmap.mmap] = None
+_worker_spec: Optional[CompiledSpec] = None
+_worker_fields: Optional[Container[str]] = None
+_worker_header: Tuple[int, Callable[[bytes], int]] = _FRAMINGS["b2"][:2]
+
+
+def _init_worker(
+    path: str, spec: CompiledSpec, framing: str, fields: Optional[Container[str]]
+) -> None:
+    global _worker_mm, _worker_spec, _worker_fields, _worker_header
+    with open(path, "rb") as f:
+        # The mapping stays valid after the file is closed
+        _worker_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _worker_spec = spec
+    _worker_fields = fields
+    header_len, decode_len, _ = _FRAMINGS[framing]
+    _worker_header = (header_len, decode_len)
+
+
+def _decode_chunk(start: int, end: int) -> Tuple[ColumnsDict, Dict[int, DecodeError]]:
+    r"""Decode a chunk in a worker process set up by :func:`_init_worker`."""
+    assert _worker_mm is not None and _worker_spec is not None
+    header_len, decode_len = _worker_header
+    return _decode_frames(
+        _worker_mm, _worker_spec, _worker_fields, header_len, decode_len, start, end
+    )
+
+
+def _decode_frames(
+    mm: mmap.mmap,
+    spec: CompiledSpec,
+    fields: Optional[Container[str]],
+    header_len: int,
+    decode_len: Callable[[bytes], int],
+    start: int,
+    end: int,
+) -> Tuple[ColumnsDict, Dict[int, DecodeError]]:
+    r"""Decode messages between two frame boundaries into columns.
+
+    Message numbers in columns and errors start from 0 within the chunk.
+    """
+    columns: ColumnsDict = {}
+    errors: Dict[int, DecodeError] = {}
+    i = 0
+    pos = start
+    while pos < end:
+        data_pos = pos + header_len
+        pos = data_pos + decode_len(mm[pos:data_pos])
+        s = mm[data_pos:pos]
+        try:
+            doc_dec, _ = _decode(s, spec, fields)
+        except DecodeError as e:
+            # Partially decoded data is expensive to send between processes
+            errors[i] = DecodeError(e.msg, s, {}, {}, e.pos, e.field)
+        else:
+            for field_key, value in doc_dec.items():
+                column = columns.get(field_key)
+                if column is None:
+                    column = columns[field_key] = [None] * i
+                elif len(column) < i:
+                    column.extend([None] * (i - len(column)))
+                column.append(value)
+        i += 1
+
+    for column in columns.values():
+        if len(column) < i:
+            column.extend([None] * (i - len(column)))
+    return columns, errors
+
+
+def _merge(
+    results: List[Tuple[ColumnsDict, Dict[int, DecodeError]]], counts: List[int]
+) -> Tuple[ColumnsDict, Dict[int, DecodeError]]:
+    r"""Join chunk columns and errors in chunk order."""
+    columns: ColumnsDict = {}
+    errors: Dict[int, DecodeError] = {}
+    offset = 0
+    for (chunk_columns, chunk_errors), count in zip(results, counts):
+        for field_key, chunk_column in chunk_columns.items():
+            column = columns.get(field_key)
+            if column is None:
+                column = columns[field_key] = [None] * offset
+            elif len(column) < offset:
+                column.extend([None] * (offset - len(column)))
+            column += chunk_column
+        for i, e in chunk_errors.items():
+            errors[offset + i] = e
+        offset += count
+
+    for column in columns.values():
+        if len(column) < offset:
+            column.extend([None] * (offset - len(column)))
+    return columns, errors
@@ -95,6 +95,65 @@ Each field may define these additional properties as needed:
   Specify either **left_pad** or **right_pad**. If both are specified at
   the same time then **left_pad** takes precedence.
 
+Subfields
+---------
+Composite fields, such as private use fields 48 or 62, may define
+their subfields. :func:`iso8583.decode` decodes composite fields into
+strings as usual. :func:`iso8583.decode_subfields` decodes encoded field
+data into a dict of subfields on demand. :func:`iso8583.encode` accepts
+either a string or a dict of subfields.
+
+- **subfields** - a dict of subfield IDs to subfield specifications.
+  Subfield specifications have the same properties as field specifications,
+  including **subfields** for nested subfields.
+
+- **subfield_format** - subfield layout. Set to:
+
+  - ``fixed`` (default) for positional subfields that follow each other
+    in specification order. Trailing subfields may be omitted.
+  - ``tlv`` for subfields that start with a tag. The tag is followed by
+    subfield length and data as defined by the subfield specification.
+  - ``bitmap`` for subfields enabled by a subfield bitmap. Subfield ``p``
+    defines the bitmap, a fixed binary or hex string field. Subfields are
+    numbered ``1`` and up.
+
+- **subfield_tag_len** - tag length in bytes for ``tlv`` layout (default 2).
+
+- **subfield_tag_enc** - tag encoding type for ``tlv`` layout (default
+  ``ascii``). Set to ``b`` for binary tags that are represented by hex
+  strings, or any valid Python encoding.
+
+Field 48, ASCII subfields with 2-digit tags and 2-digit lengths::
+
+    specification["48"] = {
+        "data_enc": "ascii",
+        "len_enc": "ascii",
+        "len_type": 3,
+        "max_len": 999,
+        "desc": "Additional Data - Private",
+        "subfield_format": "tlv",
+        "subfields": {
+            "01": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 2, "max_len": 99},
+            "02": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 2, "max_len": 99},
+        },
+    }
+
+Field 62, subfields enabled by an 8-byte binary bitmap::
+
+    specification["62"] = {
+        "data_enc": "b",
+        "len_enc": "b",
+        "len_type": 1,
+        "max_len": 255,
+        "desc": "Custom Payment Service Fields",
+        "subfield_format": "bitmap",
+        "subfields": {
+            "p": {"data_enc": "b", "len_enc": "b", "len_type": 0, "max_len": 8},
+            "1": {"data_enc": "cp500", "len_enc": "b", "len_type": 0, "max_len": 1},
+            "2": {"data_enc": "b", "len_enc": "b", "len_type": 0, "max_len": 8},
+        },
+    }
+
 Sample Field Specifications
 ---------------------------
 Binary primary bitmap.
@@ -0,0 +1,264 @@
+r"""Decode ISO8583 messages from a continuous byte stream.
+
+ISO8583 messages sent over TCP are usually framed by a length header.
+:class:`StreamDecoder` accepts stream data in chunks of any size
+and produces decoded messages as soon as complete frames arrive.
+
+.. code-block:: python
+
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> decoder = iso8583.StreamDecoder(spec, framing="ascii4")
+    >>> list(decoder.feed(b"00320200400000000000000010123"))
+    []
+    >>> for doc_dec, doc_enc in decoder.feed(b"4567890"):
+    ...     doc_dec["2"]
+    '1234567890'
+
+Supported framing headers:
+
+- ``"b2"`` - 2-byte binary big-endian length (0-65535)
+- ``"b4"`` - 4-byte binary big-endian length (0-4294967295)
+- ``"ascii4"`` - 4-digit ASCII length (0-9999)
+- ``"bcd2"`` - 2-byte BCD length (0-9999)
+
+The length header does not include itself.
+"""
+
+from typing import Callable, Dict, Iterator, Tuple, Union
+
+from iso8583.compiler import compile_spec
+from iso8583.decoder import DecodedDict, EncodedDict, SpecDict, decode
+
+__all__ = ["StreamDecoder", "FramingError"]
+
+
+class FramingError(ValueError):
+    r"""Subclass of ValueError that describes an invalid length header.
+
+    The stream cannot be decoded past an invalid length header.
+
+    Attributes
+    ----------
+    msg : str
+        The unformatted error message
+    header : bytes
+        Length header that failed to decode
+    """
+
+    def __init__(self, msg: str, header: bytes):
+        errmsg = f"{msg}: header {header!r}"
+        ValueError.__init__(self, errmsg)
+        self.msg = msg
+        self.header = header
+
+    def __reduce__(self) -> Tuple[type, Tuple[str, bytes]]:
+        return self.__class__, (self.msg, self.header)
+
+
+class StreamDecoder:
+    r"""Incremental decoder of length-prefixed ISO8583 messages.
+
+    Parameters
+    ----------
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+        The specification is compiled once with :func:`iso8583.compile_spec`.
+    framing : str, optional
+        Length header format: ``"b2"`` (default), ``"b4"``, ``"ascii4"``
+        or ``"bcd2"``. See :mod:`iso8583.stream` module.
+
+    Attributes
+    ----------
+    spec : CompiledSpec
+        Compiled ISO8583 specification
+    framing : str
+        Length header format
+
+    Raises
+    ------
+    ValueError
+        Unknown framing
+
+    Notes
+    -----
+    Stream data is accumulated in a single buffer. Consumed frames are
+    discarded from the front of the buffer when it is extended.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> decoder = iso8583.StreamDecoder(spec, framing="b2")
+    >>> frame = b"\x00\x14" + b"08000000000000000000"
+    >>> [doc_dec["t"] for doc_dec, _ in decoder.feed(frame * 2 + frame[:3])]
+    ['0800', '0800']
+    >>> decoder.buffered
+    3
+    """
+
+    __slots__ = ("spec", "framing", "_header_len", "_decode_len", "_buf", "_pos")
+
+    def __init__(self, spec: SpecDict, framing: str = "b2") -> None:
+        try:
+            self._header_len, self._decode_len, _ = _FRAMINGS[framing]
+        except KeyError:
+            raise ValueError(
+                f"Unknown framing {framing!r}, expecting one of {sorted(_FRAMINGS)}"
+            ) from None
+        self.spec = compile_spec(spec)
+        self.framing = framing
+        self._buf = bytearray()
+        # Start of the first unprocessed frame in the buffer
+        self._pos = 0
+
+    @property
+    def buffered(self) -> int:
+        r"""Number of received bytes that do not form a complete frame yet."""
+        return len(self._buf) - self._pos
+
+    def feed(
+        self, chunk: Union[bytes, bytearray, memoryview]
+    ) -> Iterator[Tuple[DecodedDict, EncodedDict]]:
+        r"""Add stream data and iterate over complete messages.
+
+        Parameters
+        ----------
+        chunk : bytes, bytearray or memoryview
+            Stream data of any length
+
+        Yields
+        ------
+        doc_dec : dict
+            Dict containing decoded ISO8583 data
+        doc_enc : dict
+            Dict containing encoded ISO8583 data
+
+        Raises
+        ------
+        DecodeError
+            An error decoding ISO8583 message. The frame is discarded
+            and the following frames are produced by the next call
+            to :meth:`feed`.
+        FramingError
+            An error decoding length header. The decoder cannot proceed.
+
+        Notes
+        -----
+        The chunk is added immediately. Frames that are not iterated over
+        remain buffered and are produced by the next call to :meth:`feed`.
+        """
+        spec = self.spec
+        return (decode(s, spec) for s in self.frames(chunk))
+
+    def frames(self, chunk: Union[bytes, bytearray, memoryview]) -> Iterator[bytes]:
+        r"""Add stream data and iterate over complete frames without decoding them.
+
+        Parameters
+        ----------
+        chunk : bytes, bytearray or memoryview
+            Stream data of any length
+
+        Yields
+        ------
+        bytes
+            Encoded ISO8583 message without length header
+
+        Raises
+        ------
+        FramingError
+            An error decoding length header. The decoder cannot proceed.
+
+        Notes
+        -----
+        The chunk is added immediately. Frames that are not iterated over
+        remain buffered and are produced by the next call to :meth:`frames`
+        or :meth:`feed`.
+        """
+        buf = self._buf
+        if self._pos:
+            # Discard consumed frames instead of growing the buffer forever
+            del buf[: self._pos]
+            self._pos = 0
+        buf += chunk
+        return self._frames()
+
+    def _frames(self) -> Iterator[bytes]:
+        buf = self._buf
+        header_len = self._header_len
+        while True:
+            pos = self._pos
+            start = pos + header_len
+            if len(buf) < start:
+                return
+
+            # Slice a view to copy data once. Views are released
+            # before yielding so that the buffer can be resized.
+            with memoryview(buf) as view:
+                with view[pos:start] as header:
+                    end = start + self._decode_len(bytes(header))
+                if len(buf) < end:
+                    return
+                with view[start:end] as data:
+                    frame = bytes(data)
+
+            # Consume the frame before it is processed so that
+            # a decoding error does not stall the stream.
+            self._pos = end
+            yield frame
+
+
+#
+# Private interface
+#
+
+
+def _decode_len_binary(header: bytes) -> int:
+    return int.from_bytes(header, "big")
+
+
+def _decode_len_ascii(header: bytes) -> int:
+    if not header.isdigit():
+        raise FramingError("Failed to decode length header, non-numeric data", header)
+    return int(header)
+
+
+def _decode_len_bcd(header: bytes) -> int:
+    digits = header.hex()
+    if not digits.isdigit():
+        raise FramingError("Failed to decode length header, invalid BCD data", header)
+    return int(digits)
+
+
+def _encode_len_binary(header_len: int) -> Callable[[int], bytes]:
+    def encode_len(msg_len: int) -> bytes:
+        try:
+            return msg_len.to_bytes(header_len, "big")
+        except OverflowError:
+            raise ValueError(
+                f"Message is {msg_len} bytes, larger than maximum {(1 << header_len * 8) - 1}"
+            ) from None
+
+    return encode_len
+
+
+def _encode_len_ascii(msg_len: int) -> bytes:
+    if not 0 <= msg_len <= 9999:
+        raise ValueError(f"Message is {msg_len} bytes, larger than maximum 9999")
+    return b"%04d" % msg_len
+
+
+def _encode_len_bcd(msg_len: int) -> bytes:
+    if not 0 <= msg_len <= 9999:
+        raise ValueError(f"Message is {msg_len} bytes, larger than maximum 9999")
+    return bytes.fromhex(f"{msg_len:04d}")
+
+
+# Framing name: (header length, header decoder, header encoder)
+_FRAMINGS: Dict[str, Tuple[int, Callable[[bytes], int], Callable[[int], bytes]]] = {
+    "b2": (2, _decode_len_binary, _encode_len_binary(2)),
+    "b4": (4, _decode_len_binary, _encode_len_binary(4)),
+    "ascii4": (4, _decode_len_ascii, _encode_len_ascii),
+    "bcd2": (2, _decode_len_bcd, _encode_len_bcd),
+}
@@ -0,0 +1,343 @@
+r"""Decode and encode BER-TLV data such as ICC data in field 55.
+
+Specifications usually define field 55 as binary data. :func:`iso8583.decode`
+returns it as a hex string, while `doc_enc` holds the raw bytes.
+:func:`decode` parses the raw bytes in a single pass without converting
+them to hex first.
+
+.. code-block:: python
+
+    >>> import iso8583
+    >>> import iso8583.tlv
+    >>> from iso8583.specs import default as spec
+    >>> s = b"0100" + bytes.fromhex("0000000000000200") + b"009\x9f\x27\x01\x80\x9f\x36\x02\x00\x01"
+    >>> doc_dec, doc_enc = iso8583.decode(s, spec)
+    >>> doc_dec["55"]
+    '9F2701809F36020001'
+    >>> iso8583.tlv.decode(doc_enc["55"]["data"])
+    {'9F27': b'\x80', '9F36': b'\x00\x01'}
+
+Tags are uppercase hex strings. Values are bytes, or memoryview slices
+when the data is a memoryview. Values of constructed tags are dicts.
+
+:func:`encode` builds BER-TLV bytes from a dict of tags. Binary fields
+are encoded from hex strings.
+
+.. code-block:: python
+
+    >>> tags = {"9F27": b"\x80", "9F36": b"\x00\x01"}
+    >>> doc_dec = {"t": "0100", "55": iso8583.tlv.encode(tags).hex()}
+    >>> s, doc_enc = iso8583.encode(doc_dec, spec)
+    >>> doc_enc["55"]["data"]
+    b"\x9f'\x01\x80\x9f6\x02\x00\x01"
+
+:class:`TLV` finds tags on demand and parses only as much data as needed.
+"""
+
+from typing import Any, Dict, Iterator, Mapping, Tuple, Type, Union
+
+__all__ = ["TLV", "TLVError", "decode", "encode"]
+
+_Buffer = Union[bytes, bytearray, memoryview]
+TLVDict = Dict[str, Any]
+
+
+class TLVError(ValueError):
+    r"""Subclass of ValueError that describes BER-TLV decoding
+    or encoding error.
+
+    Attributes
+    ----------
+    msg : str
+        The unformatted error message
+    tag : str
+        The tag where parsing failed or an empty string
+        if the tag itself could not be parsed
+    pos : int
+        The start index where BER-TLV data failed parsing
+        or 0 when encoding
+    """
+
+    def __init__(self, msg: str, tag: str, pos: int):
+        errmsg = f"{msg}: tag {tag} pos {pos}" if tag else f"{msg}: pos {pos}"
+        ValueError.__init__(self, errmsg)
+        self.msg = msg
+        self.tag = tag
+        self.pos = pos
+
+    def __reduce__(self) -> Tuple[Type["TLVError"], Tuple[str, str, int]]:
+        return self.__class__, (self.msg, self.tag, self.pos)
+
+
+def decode(data: _Buffer, recursive: bool = True) -> TLVDict:
+    r"""Decode BER-TLV data.
+
+    Parameters
+    ----------
+    data : bytes, bytearray or memoryview
+        BER-TLV encoded data, e.g. ``doc_enc["55"]["data"]``
+    recursive : bool, optional
+        Decode values of constructed tags into dicts (default).
+        Otherwise, values of constructed tags are returned as is.
+
+    Returns
+    -------
+    dict
+        Dict of tags to values. Values are bytes or, when `data` is
+        a memoryview, memoryview slices of `data`.
+        Values of constructed tags are dicts when `recursive` is set.
+
+    Raises
+    ------
+    TLVError
+        An error decoding BER-TLV data
+
+    Notes
+    -----
+    Padding ``00`` bytes between data objects are skipped.
+    Only the first occurrence of a repeated tag is kept.
+
+    Examples
+    --------
+    >>> import iso8583.tlv
+    >>> iso8583.tlv.decode(b"\x70\x07\x5a\x02\x12\x34\x5f\x24\x00")
+    {'70': {'5A': b'\x124', '5F24': b''}}
+    >>> iso8583.tlv.decode(b"\x70\x07\x5a\x02\x12\x34\x5f\x24\x00", recursive=False)
+    {'70': b'Z\x02\x124_$\x00'}
+    """
+    if isinstance(data, bytearray):
+        data = bytes(data)
+    return _decode(data, 0, len(data), recursive)
+
+
+def encode(tags: Mapping[str, Union[_Buffer, Mapping[str, Any]]]) -> bytes:
+    r"""Encode a dict of tags into BER-TLV data.
+
+    Parameters
+    ----------
+    tags : dict
+        Dict of uppercase or lowercase hex tags to values.
+        Values are bytes-like objects or, for constructed tags,
+        dicts of nested tags.
+
+    Returns
+    -------
+    bytes
+        BER-TLV encoded data
+
+    Raises
+    ------
+    TLVError
+        An error encoding BER-TLV data
+
+    Notes
+    -----
+    Binary fields, such as field 55 in :data:`iso8583.specs.default`,
+    are encoded from hex strings: ``doc_dec["55"] = encode(tags).hex()``.
+
+    Examples
+    --------
+    >>> import iso8583.tlv
+    >>> iso8583.tlv.encode({"70": {"5A": b"\x12\x34"}, "9F02": bytes(6)})
+    b'p\x04Z\x02\x124\x9f\x02\x06\x00\x00\x00\x00\x00\x00'
+    """
+    out = bytearray()
+    _encode(tags, out)
+    return bytes(out)
+
+
+class TLV(Mapping[str, Any]):
+    r"""Read-only dict of BER-TLV tags that parses data on demand.
+
+    A lookup parses data objects only until the tag is found and
+    remembers their positions. Values are not copied until accessed.
+    Values of constructed tags are not decoded: wrap them with
+    another :class:`TLV` instance or :func:`decode` them.
+
+    Parameters
+    ----------
+    data : bytes, bytearray or memoryview
+        BER-TLV encoded data, e.g. ``doc_enc["55"]["data"]``
+
+    Raises
+    ------
+    TLVError
+        An error decoding BER-TLV data. The error is raised by the lookup
+        that reaches the malformed data object.
+
+    Examples
+    --------
+    >>> import iso8583.tlv
+    >>> tlv = iso8583.tlv.TLV(b"\x9f\x27\x01\x80\x9f\x26\x02\xab\xcd\x9f\x36\x02\x00\x01")
+    >>> tlv["9F26"]
+    b'\xab\xcd'
+    >>> "9F36" in tlv
+    True
+    >>> list(tlv)
+    ['9F27', '9F26', '9F36']
+    """
+
+    __slots__ = ("_data", "_pos", "_index")
+
+    def __init__(self, data: _Buffer) -> None:
+        if isinstance(data, bytearray):
+            data = bytes(data)
+        self._data = data
+        # Position of the first data object that is not indexed yet
+        self._pos = 0
+        self._index: Dict[str, Tuple[int, int]] = {}
+
+    def __getitem__(self, tag: str) -> Any:
+        bounds = self._index.get(tag)
+        if bounds is None:
+            bounds = self._scan(tag)
+            if bounds is None:
+                raise KeyError(tag)
+        return self._data[bounds[0] : bounds[1]]
+
+    def __iter__(self) -> Iterator[str]:
+        self._scan(None)
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        self._scan(None)
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._data!r})"
+
+    def _scan(self, tag: Union[str, None]) -> Union[Tuple[int, int], None]:
+        r"""Index data objects until `tag` is found or data ends."""
+        data = self._data
+        end = len(data)
+        index = self._index
+        pos = self._pos
+        try:
+            while pos < end:
+                if data[pos] == 0x00:
+                    pos += 1
+                    continue
+                t, start, pos = _read(data, pos, end)
+                bounds = index.setdefault(t, (start, pos))
+                if t == tag:
+                    return bounds
+        finally:
+            self._pos = pos
+        return None
+
+
+#
+# Private interface
+#
+
+_HEX = [f"{i:02X}" for i in range(256)]
+
+
+def _read(data: _Buffer, pos: int, end: int) -> Tuple[str, int, int]:
+    r"""Read tag and length of a data object.
+
+    Returns
+    -------
+    tuple(str, int, int)
+        Tag, start and end of the value
+    """
+    b = data[pos]
+    tag = _HEX[b]
+    i = pos + 1
+    if b & 0x1F == 0x1F:
+        # Subsequent tag bytes follow while bit 8 is set
+        while True:
+            if i >= end:
+                raise TLVError("Incomplete tag", "", pos)
+            b = data[i]
+            tag += _HEX[b]
+            i += 1
+            if not b & 0x80:
+                break
+
+    if i >= end:
+        raise TLVError("Missing length", tag, pos)
+    length = data[i]
+    i += 1
+    if length & 0x80:
+        count = length & 0x7F
+        if count == 0 or count > 4:
+            raise TLVError(f"Unsupported length form {length:02X}", tag, pos)
+        if i + count > end:
+            raise TLVError("Incomplete length", tag, pos)
+        length = int.from_bytes(data[i : i + count], "big")
+        i += count
+
+    if i + length > end:
+        raise TLVError(
+            f"Value is {end - i} bytes, expecting {length}",
+            tag,
+            pos,
+        )
+    return tag, i, i + length
+
+
+def _decode(data: _Buffer, pos: int, end: int, recursive: bool) -> TLVDict:
+    r"""Decode data objects between `pos` and `end`."""
+    tags: TLVDict = {}
+    while pos < end:
+        if data[pos] == 0x00:
+            pos += 1
+            continue
+        constructed = data[pos] & 0x20
+        tag, start, pos = _read(data, pos, end)
+        if tag in tags:
+            continue
+        if constructed and recursive:
+            tags[tag] = _decode(data, start, pos, True)
+        else:
+            tags[tag] = data[start:pos]
+    return tags
+
+
+def _encode(
+    tags: Mapping[str, Union[_Buffer, Mapping[str, Any]]], out: bytearray
+) -> None:
+    r"""Append data objects to `out`."""
+    for tag, value in tags.items():
+        try:
+            tag_bytes = bytes.fromhex(tag)
+        except (TypeError, ValueError):
+            raise TLVError("Tag must be a hex string", str(tag), 0) from None
+        if not _is_tag(tag_bytes):
+            raise TLVError("Invalid tag", tag, 0)
+
+        if isinstance(value, Mapping):
+            if not tag_bytes[0] & 0x20:
+                raise TLVError("Nested tags require a constructed tag", tag, 0)
+            nested = bytearray()
+            _encode(value, nested)
+            value = nested
+        elif not isinstance(value, (bytes, bytearray, memoryview)):
+            raise TLVError(
+                f"Value must be bytes or dict, not {value.__class__.__name__}",
+                tag,
+                0,
+            )
+
+        length = len(value)
+        out += tag_bytes
+        if length < 0x80:
+            out.append(length)
+        else:
+            count = (length.bit_length() + 7) // 8
+            if count > 4:
+                raise TLVError(f"Value is too long: {length} bytes", tag, 0)
+            out.append(0x80 | count)
+            out += length.to_bytes(count, "big")
+        out += value
+
+
+def _is_tag(tag: bytes) -> bool:
+    r"""Check that `tag` consists of exactly one BER tag."""
+    if not tag:
+        return False
+    if tag[0] & 0x1F != 0x1F:
+        return len(tag) == 1
+    # Multi-byte tag: every subsequent byte but the last has bit 8 set
+    return len(tag) > 1 and all(b & 0x80 for b in tag[1:-1]) and not tag[-1] & 0x80
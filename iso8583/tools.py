@@ -1,10 +1,35 @@
 import sys as _sys
-from typing import Any, Callable, Dict, Generator, Mapping, Optional, TextIO, Union
-
-__all__ = ["pp"]
+from types import MappingProxyType
+from typing import (
+    Any,
+    AnyStr,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Union,
+)
+
+from iso8583.compiler import CompiledField, _get_fields
+from iso8583.decoder import index
+
+__all__ = [
+    "pp",
+    "pformat",
+    "pp_lines",
+    "MaskRule",
+    "pci_mask_rules",
+    "mask",
+    "mask_bytes",
+]
 
 DecodedDict = Mapping[str, str]
 EncodedDict = Mapping[str, Mapping[str, bytes]]
+EncodedViewDict = Mapping[str, Mapping[str, memoryview]]
 SpecDict = Mapping[str, Mapping[str, Any]]
 
 
@@ -41,6 +66,9 @@ def pp(
     it's recommended to call it after :func:`iso8583.encode` or
     :func:`iso8583.decode`.
 
+    The output is built in full and written to the stream
+    with a single write() call.
+
     Examples
     --------
     >>> import iso8583
@@ -55,55 +83,320 @@ def pp(
     20  PAN Country Code              : '840'
     """
 
-    desc_width = int(desc_width)
-    line_width = int(line_width)
-
     if stream is None:
         stream = _sys.stdout
 
+    stream.write(pformat(doc, spec, desc_width, line_width))
+
+
+def pformat(
+    doc: Union[DecodedDict, EncodedDict],
+    spec: SpecDict,
+    desc_width: int = 30,
+    line_width: int = 80,
+) -> str:
+    r"""Format Python dict containing ISO8583 data the same way
+    :func:`iso8583.pp` prints it.
+
+    Parameters
+    ----------
+    doc : dict
+        Dict containing ISO8583 data
+    spec : dict
+        A Python dict defining ISO8583 specification.
+        See iso8583.specs module for examples.
+    desc_width : int, optional
+        Field description width (default 30).
+        Specify 0 to print no descriptions.
+    line_width : int, optional
+        Attempted maximum width of output line (default 80).
+
+    Returns
+    -------
+    str
+        Formatted ISO8583 data. Each line, including the last one,
+        ends with a newline.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> s = b"02004000000000000000101234567890"
+    >>> doc_dec, doc_enc = iso8583.decode(s, spec)
+    >>> iso8583.pformat(doc_enc, spec, desc_width=0)
+    "t  : b'0200'\np  : b'4000000000000000'\n2  : b'10' b'1234567890'\n"
+    """
+    return "".join(
+        [line + "\n" for line in pp_lines(doc, spec, desc_width, line_width)]
+    )
+
+
+def pp_lines(
+    doc: Union[DecodedDict, EncodedDict],
+    spec: SpecDict,
+    desc_width: int = 30,
+    line_width: int = 80,
+) -> Generator[str, None, None]:
+    r"""Generate lines of Python dict containing ISO8583 data
+    the same way :func:`iso8583.pp` prints them.
+
+    Parameters
+    ----------
+    doc : dict
+        Dict containing ISO8583 data
+    spec : dict
+        A Python dict defining ISO8583 specification.
+        See iso8583.specs module for examples.
+    desc_width : int, optional
+        Field description width (default 30).
+        Specify 0 to print no descriptions.
+    line_width : int, optional
+        Attempted maximum width of output line (default 80).
+
+    Yields
+    ------
+    str
+        Line of formatted ISO8583 data without a trailing newline.
+        Fields that do not fit into `line_width` span several lines.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> from iso8583.specs import default_ascii as spec
+    >>> s = b"02004000000000000000101234567890"
+    >>> doc_dec, doc_enc = iso8583.decode(s, spec)
+    >>> for line in iso8583.pp_lines(doc_dec, spec, desc_width=0, line_width=20):
+    ...     print(line)
+    t  : '0200'
+    p  : '4000000000000'
+         '000'
+    2  : '1234567890'
+    """
+
+    desc_width = int(desc_width)
+    line_width = int(line_width)
+
     if "h" in doc and spec["h"]["max_len"] > 0:
-        _pp_field(doc, spec, desc_width, stream, line_width, "h")
+        yield from _pp_field(doc, spec, desc_width, line_width, "h")
 
     if "t" in doc:
-        _pp_field(doc, spec, desc_width, stream, line_width, "t")
+        yield from _pp_field(doc, spec, desc_width, line_width, "t")
 
     if "p" in doc:
-        _pp_field(doc, spec, desc_width, stream, line_width, "p")
+        yield from _pp_field(doc, spec, desc_width, line_width, "p")
 
     for field_key in sorted(
         [k for k in doc.keys() if isinstance(k, str) and k.isnumeric()], key=int
     ):
-        _pp_field(doc, spec, desc_width, stream, line_width, field_key)
+        yield from _pp_field(doc, spec, desc_width, line_width, field_key)
+
+
+class MaskRule(NamedTuple):
+    r"""Masking rule of a single ISO8583 field.
+
+    Attributes
+    ----------
+    keep_first : int
+        Number of leading characters left unmasked (default 0)
+    keep_last : int
+        Number of trailing characters left unmasked (default 0)
+    drop : bool
+        Remove the field from a dict instead of masking it (default False).
+        Raw ISO8583 data cannot lose fields, so there the field data
+        is masked in full.
+    char : str
+        Mask character of decoded and text fields (default ``*``)
+
+    Notes
+    -----
+    Field data that is not longer than `keep_first` plus `keep_last`
+    is masked in full.
+
+    Binary fields are masked by hex digits of decoded data.
+    Masked digits of encoded binary data are set to ``F``.
+    """
+
+    keep_first: int = 0
+    keep_last: int = 0
+    drop: bool = False
+    char: str = "*"
+
+
+pci_mask_rules: Mapping[str, MaskRule] = MappingProxyType(
+    {
+        "2": MaskRule(6, 4),
+        "34": MaskRule(6, 4),
+        "35": MaskRule(),
+        "36": MaskRule(),
+        "45": MaskRule(),
+        "52": MaskRule(),
+    }
+)
+r"""Rules that mask primary account number (2), extended primary account
+number (34), track data (35, 36, 45) and PIN data (52).
+Add rules for private fields that carry CVV or other sensitive data."""
+
+
+def mask(
+    doc: Union[DecodedDict, EncodedDict, EncodedViewDict],
+    spec: SpecDict,
+    rules: Mapping[str, MaskRule] = pci_mask_rules,
+) -> Dict[str, Any]:
+    r"""Mask sensitive fields of Python dict containing ISO8583 data.
+
+    Parameters
+    ----------
+    doc : dict
+        Dict containing decoded or encoded ISO8583 data.
+        Encoded data may be memoryview as returned by :func:`iso8583.decode_view`.
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    rules : dict, optional
+        Dict of field IDs to :class:`MaskRule` (default :data:`pci_mask_rules`)
+
+    Returns
+    -------
+    dict
+        A shallow copy of `doc` with masked fields.
+        `doc` is not modified.
+
+    Examples
+    --------
+    >>> import iso8583
+    >>> import iso8583.tools
+    >>> from iso8583.specs import default_ascii as spec
+    >>> s = b"02004000000000000000161234567890123456"
+    >>> doc_dec, doc_enc = iso8583.decode(s, spec)
+    >>> iso8583.pp(iso8583.tools.mask(doc_dec, spec), spec)
+    t   Message Type                  : '0200'
+    p   Bitmap, Primary               : '4000000000000000'
+    2   Primary Account Number (PAN)  : '123456******3456'
+    >>> iso8583.tools.mask(doc_enc, spec)["2"]
+    {'len': b'16', 'data': b'123456******3456'}
+    """
+    fields_spec = _get_fields(spec)
+    masked: Dict[str, Any] = dict(doc)
+    for field_key, rule in rules.items():
+        doc_field = masked.get(field_key)
+        if doc_field is None:
+            continue
+
+        if rule.drop:
+            del masked[field_key]
+        elif isinstance(doc_field, Mapping):
+            doc_field = dict(doc_field)
+            data = doc_field.get("data")
+            if data is not None:
+                # Encoded data of decode_view() is a memoryview
+                doc_field["data"] = _mask_data(
+                    bytes(data),
+                    fields_spec[field_key],
+                    rule,
+                    bytes(doc_field.get("len", b"")),
+                )
+            masked[field_key] = doc_field
+        else:
+            masked[field_key] = _mask_str(doc_field, rule, rule.char)
+
+    return masked
+
+
+def mask_bytes(
+    s: Union[bytes, bytearray, memoryview],
+    spec: SpecDict,
+    rules: Mapping[str, MaskRule] = pci_mask_rules,
+) -> bytes:
+    r"""Mask sensitive fields of encoded ISO8583 data without decoding it.
+
+    Parameters
+    ----------
+    s : bytes, bytearray or memoryview
+        Encoded ISO8583 data
+    spec : dict or CompiledSpec
+        A Python dict defining ISO8583 specification.
+        See :mod:`iso8583.specs` module for examples.
+    rules : dict, optional
+        Dict of field IDs to :class:`MaskRule` (default :data:`pci_mask_rules`)
+
+    Returns
+    -------
+    bytes
+        Encoded ISO8583 data with masked field data.
+        Field lengths and bitmaps are not changed.
+
+    Raises
+    ------
+    DecodeError
+        An error locating ISO8583 fields
+    TypeError
+        `s` must be a bytes, bytearray or memoryview instance
+
+    Notes
+    -----
+    Fields are located with :func:`iso8583.index`.
+    Only fields with a rule are sliced and masked.
+    Rules with `drop` set mask field data in full.
+
+    Examples
+    --------
+    >>> import iso8583.tools
+    >>> from iso8583.specs import default_ascii as spec
+    >>> iso8583.tools.mask_bytes(b"02004000000000000000161234567890123456", spec)
+    b'0200400000000000000016123456******3456'
+    """
+    idx = index(s, spec)
+    fields_spec = _get_fields(spec)
+    masked: Optional[bytearray] = None
+    for i in range(0, len(idx), 4):
+        rule = rules.get(str(idx[i]))
+        if rule is None:
+            continue
+        if masked is None:
+            masked = bytearray(s)
+        len_idx, data_idx, data_len = idx[i + 1], idx[i + 2], idx[i + 3]
+        data_end = data_idx + data_len
+        if rule.drop:
+            rule = MaskRule(char=rule.char)
+        masked[data_idx:data_end] = _mask_data(
+            bytes(s[data_idx:data_end]),
+            fields_spec[str(idx[i])],
+            rule,
+            bytes(s[len_idx:data_idx]),
+        )
+    return bytes(s) if masked is None else bytes(masked)
+
+
+#
+# Private interface
+#
 
 
 def _pp_field(
     doc: Union[DecodedDict, EncodedDict],
     spec: SpecDict,
     desc_width: int,
-    stream: TextIO,
     line_width: int,
     field_key: str,
-) -> None:
+) -> Generator[str, None, None]:
     indent = 5
-    stream.write("{index:3s}".format(index=str(field_key)))
+    prefix = "{index:3s}".format(index=str(field_key))
 
     if desc_width > 0:
-        stream.write(
-            " {desc: <{desc_width}}".format(
-                desc=spec[field_key]["desc"][:desc_width],
-                desc_width=desc_width,
-            )
+        prefix += " {desc: <{desc_width}}".format(
+            desc=spec[field_key]["desc"][:desc_width],
+            desc_width=desc_width,
         )
         indent += desc_width + 1
 
-    stream.write(": ")
+    prefix += ": "
 
     doc_field = doc[field_key]
 
     if isinstance(doc_field, dict):
         field_length = doc_field.get("len", b"")
         if len(field_length) > 0:
-            stream.write("{} ".format(repr(field_length)))
+            prefix += "{} ".format(repr(field_length))
             indent += len(repr(field_length)) + 1
 
         obj = doc_field.get("data", b"")
@@ -114,43 +407,31 @@ def _pp_field(
     if len(rep) + indent > line_width:
         p = _dispatch.get(type(obj).__repr__, None)
         if p is not None:
-            p(obj, stream, indent, line_width)
-            stream.write("\n")
+            delim = prefix
+            for rep in p(obj, line_width - indent):
+                yield delim + rep
+                delim = " " * indent
             return
 
-    stream.write("{}\n".format(repr(obj)))
+    yield prefix + rep
 
 
-_dispatch: Dict[Any, Callable[[Any, TextIO, int, int], None]] = {}
+_dispatch: Dict[Any, Callable[[Any, int], Iterable[str]]] = {}
 
 
-def _pprint_str(obj: str, stream: TextIO, indent: int, width: int) -> None:
+def _pprint_str(obj: str, width: int) -> Iterable[str]:
     if len(obj) <= 1:
-        stream.write(repr(obj))
-        return
-
-    delim = ""
-    for rep in _wrap_str_repr(obj, width - indent):
-        stream.write(delim)
-        stream.write(rep)
-        if not delim:
-            delim = "\n" + " " * indent
+        return [repr(obj)]
+    return _wrap_str_repr(obj, width)
 
 
 _dispatch[str.__repr__] = _pprint_str
 
 
-def _pprint_bytes(obj: bytes, stream: TextIO, indent: int, width: int) -> None:
+def _pprint_bytes(obj: bytes, width: int) -> Iterable[str]:
     if len(obj) <= 1:
-        stream.write(repr(obj))
-        return
-
-    delim = ""
-    for rep in _wrap_bytes_repr(obj, width - indent):
-        stream.write(delim)
-        stream.write(rep)
-        if not delim:
-            delim = "\n" + " " * indent
+        return [repr(obj)]
+    return _wrap_bytes_repr(obj, width)
 
 
 _dispatch[bytes.__repr__] = _pprint_bytes
@@ -168,19 +449,98 @@ def _wrap_str_repr(obj: str, width: int) -> Generator[str, None, None]:
         yield repr(obj[i : i + width])
 
 
-def _wrap_bytes_repr(obj: bytes, width: int) -> Generator[str, None, None]:
-    current = b""
+# Width of each byte within repr(bytes): printable ASCII is shown as is,
+# backslash and tab, newline, carriage return as 2-character escapes
+# and the rest as \xhh.
+_BYTES_REPR_WIDTH = [
+    2 if b in b"\\\t\n\r" else 1 if 0x20 <= b < 0x7F else 4 for b in range(256)
+]
 
-    for i in range(0, len(obj)):
-        part = obj[i : i + 1]
-        candidate = current + part
 
-        if len(repr(candidate)) > width:
-            if current:
-                yield repr(current)
-            current = part
+def _wrap_bytes_repr(obj: bytes, width: int) -> Generator[str, None, None]:
+    # Grow each chunk while its repr fits into width.
+    # repr(bytes) is b'' quoted, or b"" quoted when the data contains
+    # single quotes and no double quotes. When the data contains both,
+    # single quotes are escaped and take 2 characters each.
+    start = 0
+    size = 3
+    squotes = 0
+    dquote = False
+
+    for i, b in enumerate(obj):
+        b_width = _BYTES_REPR_WIDTH[b]
+        b_squote = b == 0x27
+        b_dquote = b == 0x22
+        candidate_squotes = squotes + b_squote
+        candidate_dquote = dquote or b_dquote
+        candidate_size = size + b_width
+        if candidate_dquote:
+            candidate_size += candidate_squotes
+
+        if candidate_size > width and i > start:
+            yield repr(obj[start:i])
+            start = i
+            size = 3 + b_width
+            squotes = b_squote
+            dquote = b_dquote
         else:
-            current = candidate
+            size += b_width
+            squotes = candidate_squotes
+            dquote = candidate_dquote
+
+    if start < len(obj):
+        yield repr(obj[start:])
 
-    if current:
-        yield repr(current)
+
+#
+# Masking
+#
+
+
+def _mask_str(value: AnyStr, rule: MaskRule, char: AnyStr) -> AnyStr:
+    r"""Mask characters or bytes of `value` that `rule` does not keep."""
+    value_len = len(value)
+    masked_len = value_len - rule.keep_first - rule.keep_last
+    if masked_len <= 0:
+        return char * value_len
+    return (
+        value[: rule.keep_first]
+        + char * masked_len
+        + value[value_len - rule.keep_last :]
+    )
+
+
+def _mask_data(
+    data: bytes, field: CompiledField, rule: MaskRule, field_len: bytes
+) -> bytes:
+    r"""Mask encoded field data without changing its length.
+
+    Text data is masked by bytes with the mask character in field encoding.
+    Binary data is masked by hex digits. Pad digit of an odd
+    length field measured in nibbles is left as is.
+    """
+    if not field.binary:
+        try:
+            char = rule.char.encode(field.data_enc)
+        except (LookupError, UnicodeError):
+            char = b""
+        if len(char) != 1:
+            char = b"*"
+        return _mask_str(data, rule, char)
+
+    digits = data.hex().upper()
+    start = 0
+    end = len(digits)
+    if field.nibbles:
+        try:
+            enc_field_len = field.decode_len(field_len)
+        except Exception:
+            enc_field_len = end
+        if enc_field_len < end:
+            if field.left_pad and digits[:1] == field.left_pad.upper():
+                start = end - enc_field_len
+            else:
+                end = enc_field_len
+    return bytes.fromhex(
+        digits[:start] + _mask_str(digits[start:end], rule, "F") + digits[end:]
+    )
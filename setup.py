@@ -32,10 +32,11 @@ if __name__ == "__main__":
         long_description_content_type="text/x-rst",
         license="MIT",
         url="https://github.com/knovichikhin/pyiso8583",
-        packages=find_packages(exclude=["tests"]),
+        packages=find_packages(exclude=["tests", "benchmarks"]),
         package_data={"iso8583": ["py.typed"]},
         zip_safe=False,
         classifiers=classifiers,
         python_requires=">=3.8",
+        extras_require={"numpy": ["numpy"]},
         keywords="iso8583 8583 banking protocol library",
     )
@@ -0,0 +1,723 @@
+import asyncio
+import typing
+
+import iso8583
+import iso8583.aio
+import iso8583.specs
+import pytest
+
+spec = iso8583.specs.default_ascii
+
+
+def _port(server: asyncio.AbstractServer) -> int:
+    return server.sockets[0].getsockname()[1]  # type: ignore
+
+
+@pytest.mark.parametrize("framing", ["b2", "b4", "ascii4", "bcd2"])
+def test_loopback(framing: str) -> None:
+    """
+    Pipelined requests are answered by the loopback server
+    """
+
+    async def main() -> None:
+        server = await iso8583.aio.start_loopback_server(spec, framing=framing)
+        conn = await iso8583.aio.open_connection(
+            "127.0.0.1", _port(server), spec, framing
+        )
+        assert conn.framing == framing
+
+        for stan in range(100):
+            conn.send({"t": "0200", "2": "1234567890", "11": f"{stan:06d}"})
+        await conn.drain()
+
+        for stan in range(100):
+            doc_dec, doc_enc = await conn.receive()
+            assert doc_dec["t"] == "0210"
+            assert doc_dec["11"] == f"{stan:06d}"
+            assert doc_dec["39"] == "00"
+            assert doc_enc["39"]["data"] == b"00"
+
+        conn.close()
+        await conn.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_handler() -> None:
+    """
+    Handler reply is sent back. No reply is sent if handler returns None.
+    """
+
+    async def handler(
+        doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+    ) -> typing.Optional[typing.Mapping[str, str]]:
+        if doc_dec["t"] == "0800":
+            return None
+        await asyncio.sleep(0)
+        return {"t": "0810", "39": "00", "70": doc_dec["70"]}
+
+    async def main() -> None:
+        server = await iso8583.aio.start_server(handler, "127.0.0.1", 0, spec)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+
+        conn.send({"t": "0800", "70": "301"})
+        conn.send({"t": "0820", "70": "001"})
+        conn.close()
+
+        received = [doc_dec async for doc_dec, _ in conn]
+        assert received == []
+
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+        conn.send({"t": "0800", "70": "301"})
+        conn.send({"t": "0820", "70": "001"})
+        doc_dec, _ = await conn.receive()
+        assert doc_dec["t"] == "0810"
+        assert doc_dec["70"] == "001"
+
+        conn.close()
+        await conn.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_receive_errors() -> None:
+    """
+    Decoding error is raised by receive and does not break the connection.
+    Invalid length header closes the connection.
+    """
+
+    async def main() -> None:
+        peers: typing.List[asyncio.StreamWriter] = []
+
+        async def accept(
+            reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        ) -> None:
+            peers.append(writer)
+
+        server = await asyncio.start_server(accept, "127.0.0.1", 0)
+        conn = await iso8583.aio.open_connection(
+            "127.0.0.1", _port(server), spec, framing="ascii4"
+        )
+        while not peers:
+            await asyncio.sleep(0.01)
+        peer = peers[0]
+
+        ok = bytes(iso8583.encode({"t": "0800", "70": "301"}, spec)[0])
+        bad = b"0800400000000000000012"
+        peer.write(b"%04d" % len(bad) + bad + b"%04d" % len(ok) + ok)
+
+        with pytest.raises(iso8583.DecodeError, match="field 2 pos 22"):
+            await conn.receive()
+        doc_dec, _ = await conn.receive()
+        assert doc_dec["70"] == "301"
+
+        peer.write(b"00x0")
+        with pytest.raises(iso8583.FramingError):
+            await conn.receive()
+        with pytest.raises(iso8583.FramingError):
+            await conn.receive()
+
+        with pytest.raises(ConnectionError, match="Connection is closed"):
+            conn.send({"t": "0800", "70": "301"})
+
+        peer.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_receive_eof() -> None:
+    """
+    Receiving from a closed connection raises EOFError after
+    all received messages are consumed
+    """
+
+    async def main() -> None:
+        server = await iso8583.aio.start_loopback_server(spec)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+        conn.send({"t": "0800", "70": "301"})
+        doc_dec, _ = await conn.receive()
+        conn.send({"t": "0800", "70": "301"})
+        await asyncio.sleep(0.1)
+        conn.close()
+        await conn.wait_closed()
+
+        # Already received message is still available
+        doc_dec, _ = await conn.receive()
+        assert doc_dec["t"] == "0810"
+        with pytest.raises(EOFError):
+            await conn.receive()
+
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_receive_concurrent() -> None:
+    """
+    Concurrent receivers and drainers are all woken
+    """
+
+    async def main() -> None:
+        server = await iso8583.aio.start_loopback_server(spec)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+
+        receivers = [asyncio.ensure_future(conn.receive()) for _ in range(3)]
+        await asyncio.sleep(0)
+        # Cancelled receiver does not take a message from the others
+        receivers[0].cancel()
+        for stan in ("000001", "000002"):
+            conn.send({"t": "0200", "2": "1234567890", "11": stan})
+        received = await asyncio.wait_for(asyncio.gather(*receivers[1:]), 5)
+        assert [doc_dec["11"] for doc_dec, _ in received] == ["000001", "000002"]
+        assert receivers[0].cancelled()
+
+        conn.pause_writing()
+        drainers = [asyncio.ensure_future(conn.drain()) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert not any(d.done() for d in drainers)
+        conn.resume_writing()
+        await asyncio.wait_for(asyncio.gather(*drainers), 5)
+
+        conn.close()
+        await conn.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+class _Transport(asyncio.Transport):
+    def __init__(self) -> None:
+        super().__init__()
+        self.paused = False
+        self.pauses = 0
+
+    def is_closing(self) -> bool:
+        return False
+
+    def pause_reading(self) -> None:
+        self.paused = True
+        self.pauses += 1
+
+    def resume_reading(self) -> None:
+        self.paused = False
+
+
+def test_receive_queue_size() -> None:
+    """
+    Reading pauses when received messages pile up and resumes
+    when the queue drains to half
+    """
+
+    async def main() -> None:
+        conn = iso8583.aio.ISO8583Protocol(spec, queue_size=4)
+        transport = _Transport()
+        conn.connection_made(transport)
+
+        s = bytes(iso8583.encode({"t": "0800", "70": "301"}, spec)[0])
+        frame = len(s).to_bytes(2, "big") + s
+        conn.data_received(frame * 3)
+        assert not transport.paused
+        conn.data_received(frame * 2)
+        assert transport.paused
+
+        for _ in range(2):
+            await conn.receive()
+        assert transport.paused
+        await conn.receive()
+        assert not transport.paused
+        assert transport.pauses == 1
+
+    asyncio.run(main())
+
+
+def test_handler_exception() -> None:
+    """
+    Handler exceptions are reported to the event loop and handler
+    tasks count towards the queue size
+    """
+
+    async def handler(
+        doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+    ) -> typing.Optional[typing.Mapping[str, str]]:
+        await asyncio.sleep(0.01)
+        raise ValueError(doc_dec["70"])
+
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+        errors: typing.List[typing.Dict[str, typing.Any]] = []
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+        conn = iso8583.aio.ISO8583Protocol(spec, handler=handler, queue_size=2)
+        transport = _Transport()
+        conn.connection_made(transport)
+
+        s = bytes(iso8583.encode({"t": "0800", "70": "301"}, spec)[0])
+        conn.data_received((len(s).to_bytes(2, "big") + s) * 2)
+        assert transport.paused
+        await asyncio.sleep(0.1)
+        assert not transport.paused
+
+        assert len(errors) == 2
+        assert isinstance(errors[0]["exception"], ValueError)
+        assert errors[0]["protocol"] is conn
+
+    asyncio.run(main())
+
+
+def test_multiplexer() -> None:
+    """
+    Concurrent requests are matched to out of order responses
+    and the in-flight window is respected
+    """
+    max_in_flight = 0
+
+    async def handler(
+        doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+    ) -> typing.Optional[typing.Mapping[str, str]]:
+        # Reply in reverse order of STAN within a window
+        await asyncio.sleep((1000 - int(doc_dec["11"])) / 100000)
+        return {"t": "0210", "11": doc_dec["11"], "41": doc_dec["41"], "39": "00"}
+
+    async def main() -> None:
+        nonlocal max_in_flight
+        server = await iso8583.aio.start_loopback_server(spec, handler)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+        mux = iso8583.aio.Multiplexer(conn, window=50)
+        assert mux.window == 50
+
+        async def request(stan: int) -> str:
+            nonlocal max_in_flight
+            doc_dec = {"t": "0200", "11": f"{stan:06d}", "41": f"TERM{stan % 7:04d}"}
+            response = mux.request(doc_dec, mutate=False)
+            max_in_flight = max(max_in_flight, mux.in_flight)
+            doc_dec_r, doc_enc_r = await response
+            max_in_flight = max(max_in_flight, mux.in_flight)
+            assert doc_dec_r["41"] == doc_dec["41"]
+            assert doc_enc_r["39"]["data"] == b"00"
+            return doc_dec_r["11"]
+
+        stans = await asyncio.gather(*[request(stan) for stan in range(1000)])
+        assert stans == [f"{stan:06d}" for stan in range(1000)]
+        assert 1 < max_in_flight <= 50
+        assert mux.in_flight == 0
+
+        conn.close()
+        await conn.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_multiplexer_response_fields() -> None:
+    """
+    Response is matched by default key fields when it adds RRN
+    """
+
+    async def handler(
+        doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+    ) -> typing.Optional[typing.Mapping[str, str]]:
+        return {
+            "t": "0210",
+            "11": doc_dec["11"],
+            "37": "123456789012",
+            "41": doc_dec["41"],
+            "39": "00",
+        }
+
+    async def main() -> None:
+        server = await iso8583.aio.start_loopback_server(spec, handler)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+        mux = iso8583.aio.Multiplexer(conn, timeout=1)
+        doc_dec, _ = await mux.request({"t": "0200", "11": "000001", "41": "TERM0001"})
+        assert doc_dec["37"] == "123456789012"
+        assert mux.in_flight == 0
+
+        conn.close()
+        await conn.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_multiplexer_host_request() -> None:
+    """
+    Host request with the same key fields is not taken for the response
+    """
+
+    async def accept(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        header = await reader.readexactly(2)
+        doc_dec, _ = iso8583.decode(
+            await reader.readexactly(int.from_bytes(header, "big")), spec
+        )
+        for mti in ("0800", "0210"):
+            reply = {"t": mti, "11": doc_dec["11"], "41": doc_dec["41"], "70": "301"}
+            s = bytes(iso8583.encode(reply, spec)[0])
+            writer.write(len(s).to_bytes(2, "big") + s)
+        await writer.drain()
+
+    async def main() -> None:
+        server = await asyncio.start_server(accept, "127.0.0.1", 0)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+        mux = iso8583.aio.Multiplexer(conn, timeout=1)
+        doc_dec, _ = await mux.request({"t": "0200", "11": "000001", "41": "TERM0001"})
+        assert doc_dec["t"] == "0210"
+
+        # Host request is processed by the protocol
+        doc_dec, _ = await conn.receive()
+        assert doc_dec["t"] == "0800"
+        assert doc_dec["11"] == "000001"
+
+        conn.close()
+        await conn.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_multiplexer_custom_key() -> None:
+    async def main() -> None:
+        server = await iso8583.aio.start_loopback_server(spec)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+        mux = iso8583.aio.Multiplexer(
+            conn, key_fields=["37"], key=lambda d: d.get("37", "").strip()
+        )
+        doc_dec, _ = await mux.request({"t": "0100", "37": "ABC         "})
+        assert doc_dec["t"] == "0110"
+
+        with pytest.raises(ValueError, match="Protocol already has a multiplexer"):
+            iso8583.aio.Multiplexer(conn)
+
+        conn.close()
+        await conn.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+    with pytest.raises(ValueError, match="Window must be at least 1"):
+        iso8583.aio.Multiplexer(iso8583.aio.ISO8583Protocol(spec), window=0)
+
+
+def test_multiplexer_timeout() -> None:
+    """
+    Timed out request is removed from the pending table.
+    A late response is processed by the protocol as usual.
+    """
+
+    async def main() -> None:
+        release = asyncio.Event()
+
+        async def handler(
+            doc_dec: iso8583.decoder.DecodedDict,
+            doc_enc: iso8583.decoder.EncodedDict,
+        ) -> typing.Optional[typing.Mapping[str, str]]:
+            await release.wait()
+            return {"t": "0210", "11": doc_dec["11"], "39": "68"}
+
+        server = await iso8583.aio.start_loopback_server(spec, handler)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+        mux = iso8583.aio.Multiplexer(conn, key_fields=["11"], timeout=0.05)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await mux.request({"t": "0200", "11": "000001"})
+        assert mux.in_flight == 0
+
+        # Request with the same key in flight
+        pending = asyncio.ensure_future(
+            mux.request({"t": "0200", "11": "000002"}, timeout=None)
+        )
+        await asyncio.sleep(0.01)
+        with pytest.raises(ValueError, match="already in flight"):
+            await mux.request({"t": "0200", "11": "000002"})
+
+        release.set()
+        doc_dec, _ = await pending
+        assert doc_dec["11"] == "000002"
+
+        # Late response to the timed out request
+        doc_dec, _ = await conn.receive()
+        assert doc_dec["11"] == "000001"
+        assert doc_dec["39"] == "68"
+
+        conn.close()
+        await conn.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_multiplexer_connection_lost() -> None:
+    """
+    Requests in flight fail when the connection is lost
+    """
+
+    async def handler(
+        doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+    ) -> typing.Optional[typing.Mapping[str, str]]:
+        return None
+
+    async def main() -> None:
+        server = await iso8583.aio.start_loopback_server(spec, handler)
+        conn = await iso8583.aio.open_connection("127.0.0.1", _port(server), spec)
+        mux = iso8583.aio.Multiplexer(conn, key_fields=["11"])
+
+        pending = asyncio.ensure_future(mux.request({"t": "0200", "11": "000001"}))
+        await asyncio.sleep(0.01)
+        assert mux.in_flight == 1
+        conn.transport.abort()  # type: ignore
+
+        with pytest.raises(ConnectionError, match="Connection lost"):
+            await pending
+        assert mux.in_flight == 0
+
+        with pytest.raises(ConnectionError, match="Connection is closed"):
+            await mux.request({"t": "0200", "11": "000001"})
+        assert mux.in_flight == 0
+
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("strategy", ["round_robin", "least_in_flight"])
+def test_pool(strategy: str) -> None:
+    """
+    Requests are spread over connected links of all hosts
+    """
+    served: typing.List[str] = []
+
+    def make_handler(name: str) -> iso8583.aio.Handler:
+        async def handler(
+            doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+        ) -> typing.Optional[typing.Mapping[str, str]]:
+            served.append(name)
+            await asyncio.sleep(0.01)
+            return dict(doc_dec, t="0210", **{"39": "00"})
+
+        return handler
+
+    async def main() -> None:
+        server_a = await iso8583.aio.start_loopback_server(spec, make_handler("a"))
+        server_b = await iso8583.aio.start_loopback_server(spec, make_handler("b"))
+        hosts = [("127.0.0.1", _port(server_a)), ("127.0.0.1", _port(server_b))]
+        async with iso8583.aio.Pool(
+            hosts, spec, size=2, strategy=strategy, key_fields=["11"]
+        ) as pool:
+            assert len(pool.links) == 4
+            results = await asyncio.gather(
+                *(pool.request({"t": "0200", "11": f"{i:06d}"}) for i in range(8))
+            )
+            for i, (doc_dec, _) in enumerate(results):
+                assert doc_dec["11"] == f"{i:06d}"
+                assert doc_dec["39"] == "00"
+        assert pool.links == []
+        assert served.count("a") == 4
+        assert served.count("b") == 4
+
+        for server in (server_a, server_b):
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_pool_echo() -> None:
+    """
+    Idle links send network management echo requests
+    and answer echo requests from the host
+    """
+    echoes: typing.List[iso8583.decoder.DecodedDict] = []
+    peers: typing.List[iso8583.aio.ISO8583Protocol] = []
+
+    async def handler(
+        doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+    ) -> typing.Optional[typing.Mapping[str, str]]:
+        echoes.append(doc_dec)
+        return dict(doc_dec, t="0810", **{"39": "00"})
+
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+
+        def factory() -> iso8583.aio.ISO8583Protocol:
+            peer = iso8583.aio.ISO8583Protocol(spec, handler=handler)
+            peers.append(peer)
+            return peer
+
+        server = await loop.create_server(factory, "127.0.0.1", 0)
+        async with iso8583.aio.Pool(
+            [("127.0.0.1", _port(server))], spec, echo_interval=0.01
+        ) as pool:
+            await asyncio.sleep(0.1)
+            assert len(echoes) >= 2
+            assert all(e["t"] == "0800" and e["70"] == "301" for e in echoes)
+            assert len(set(e["11"] for e in echoes)) == len(echoes)
+            assert len(echoes[0]["7"]) == 10
+            assert len(pool.links) == 1
+
+            # Host-initiated echo is answered, other messages are dropped
+            peer_mux = iso8583.aio.Multiplexer(peers[0], key_fields=["11"])
+            doc_dec, _ = await peer_mux.request(
+                {"t": "0800", "11": "999999", "70": "301"}
+            )
+            assert doc_dec["t"] == "0810"
+            assert doc_dec["39"] == "00"
+            with pytest.raises(asyncio.TimeoutError):
+                await peer_mux.request({"t": "0200", "11": "999998"}, timeout=0.05)
+
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_pool_reconnect() -> None:
+    """
+    Lost and failed echo connections are reconnected.
+    Unavailable hosts are skipped.
+    """
+    answer = True
+
+    async def handler(
+        doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+    ) -> typing.Optional[typing.Mapping[str, str]]:
+        if not answer:
+            return None
+        return dict(doc_dec, t=doc_dec["t"][:2] + "10", **{"39": "00"})
+
+    async def main() -> None:
+        nonlocal answer
+        server = await iso8583.aio.start_loopback_server(spec, handler)
+        dead = await iso8583.aio.start_loopback_server(spec)
+        dead_port = _port(dead)
+        dead.close()
+        await dead.wait_closed()
+
+        hosts = [("127.0.0.1", dead_port), ("127.0.0.1", _port(server))]
+        async with iso8583.aio.Pool(
+            hosts,
+            spec,
+            echo_interval=0.02,
+            echo_timeout=0.02,
+            reconnect_delay=0.01,
+        ) as pool:
+            assert len(pool.links) == 1
+            link = pool.acquire()
+            assert pool.acquire() is link
+
+            # Lost connection
+            link.protocol.transport.abort()  # type: ignore
+            await asyncio.sleep(0.05)
+            assert len(pool.links) == 1
+            assert pool.links[0] is not link
+            # STAN beyond echo STANs used during the test
+            doc_dec, _ = await pool.request({"t": "0200", "11": "500001"})
+            assert doc_dec["39"] == "00"
+
+            # Failed echo
+            link = pool.links[0]
+            answer = False
+            await asyncio.sleep(0.1)
+            answer = True
+            await asyncio.sleep(0.1)
+            assert len(pool.links) == 1
+            assert pool.links[0] is not link
+
+        with pytest.raises(ConnectionError, match="No connected links"):
+            pool.acquire()
+
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_pool_echo_stan() -> None:
+    """
+    Echo requests skip STANs of requests in flight
+    and the link is kept
+    """
+    echoes: typing.List[iso8583.decoder.DecodedDict] = []
+
+    async def handler(
+        doc_dec: iso8583.decoder.DecodedDict, doc_enc: iso8583.decoder.EncodedDict
+    ) -> typing.Optional[typing.Mapping[str, str]]:
+        if doc_dec["t"] != "0800":
+            return None
+        echoes.append(doc_dec)
+        return dict(doc_dec, t="0810", **{"39": "00"})
+
+    async def main() -> None:
+        server = await iso8583.aio.start_loopback_server(spec, handler)
+        async with iso8583.aio.Pool(
+            [("127.0.0.1", _port(server))], spec, echo_interval=0.02
+        ) as pool:
+            link = pool.acquire()
+            # Unanswered requests that use the first echo STANs
+            requests = [
+                asyncio.ensure_future(
+                    pool.request({"t": "0200", "11": f"{stan:06d}"}, timeout=0.2)
+                )
+                for stan in (1, 2)
+            ]
+            await asyncio.sleep(0.1)
+            assert echoes
+            assert all(int(e["11"]) > 2 for e in echoes)
+            assert pool.links == [link]
+            for request in requests:
+                with pytest.raises(asyncio.TimeoutError):
+                    await request
+
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_pool_negative() -> None:
+    with pytest.raises(ValueError, match="Unknown strategy 'random'"):
+        iso8583.aio.Pool([], spec, strategy="random")
+    with pytest.raises(ValueError, match="Size must be at least 1"):
+        iso8583.aio.Pool([], spec, size=0)
+    with pytest.raises(ValueError, match="Unknown framing 'bogus'"):
+        iso8583.aio.Pool([], spec, framing="bogus")
+    with pytest.raises(TypeError, match="windw"):
+        iso8583.aio.Pool([], spec, windw=3)
+
+
+def test_pool_start_error() -> None:
+    """
+    Unexpected connection errors are raised by start
+    instead of leaving it waiting forever
+    """
+
+    async def main() -> None:
+        server = await iso8583.aio.start_loopback_server(spec)
+        pool = iso8583.aio.Pool([("127.0.0.1", _port(server))], spec, size=2, window=0)
+        with pytest.raises(ValueError, match="Window must be at least 1"):
+            await asyncio.wait_for(pool.start(), 1)
+        assert pool.links == []
+
+        # The pool is closed and can be started again
+        pool._mux_kwargs = {}
+        async with pool:
+            assert len(pool.links) == 2
+
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(main())
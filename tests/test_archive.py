@@ -0,0 +1,171 @@
+import os
+import pathlib
+import typing
+
+import iso8583
+import iso8583.archive
+import iso8583.specs
+import pytest
+
+spec = iso8583.specs.default_ascii
+
+
+def _messages(start: int, count: int) -> typing.List[bytes]:
+    return [
+        bytes(iso8583.encode({"t": "0200", "11": f"{i:06d}"}, spec)[0])
+        for i in range(start, start + count)
+    ]
+
+
+def _frames(messages: typing.List[bytes]) -> bytes:
+    return b"".join(len(s).to_bytes(2, "big") + s for s in messages)
+
+
+def test_message_log(tmp_path: pathlib.Path) -> None:
+    """
+    Messages are accessed by number and slice
+    """
+    path = tmp_path / "messages.log"
+    messages = _messages(0, 10)
+    path.write_bytes(_frames(messages))
+
+    with iso8583.archive.MessageLog(path, spec) as log:
+        assert len(log) == 10
+        for i in range(-10, 10):
+            assert log.frame(i) == messages[i]
+            assert log[i] == iso8583.decode(messages[i], spec)
+        assert [d["11"] for d, _ in log[2:8:3]] == ["000002", "000005"]
+        assert [d["11"] for d, _ in log[-2:]] == ["000008", "000009"]
+        assert log[20:] == []
+        assert [d["11"] for d, _ in log] == [f"{i:06d}" for i in range(10)]
+
+        with pytest.raises(IndexError):
+            log.frame(10)
+        with pytest.raises(IndexError):
+            log[-11]
+
+    with pytest.raises(ValueError, match="Log file is closed"):
+        log[0]
+
+
+def test_message_log_index(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Saved index is reused and extended when the log file grows
+    """
+    path = tmp_path / "messages.log"
+    index_path = tmp_path / "messages.log.idx"
+    path.write_bytes(_frames(_messages(0, 3)))
+
+    with iso8583.archive.MessageLog(path, spec) as log:
+        assert len(log) == 3
+    index = index_path.read_bytes()
+
+    # Saved index is loaded without scanning the log file
+    with monkeypatch.context() as m:
+
+        def scan(self: typing.Any, offsets: typing.Any) -> typing.Any:
+            raise AssertionError("log file is scanned")
+
+        m.setattr(iso8583.archive.MessageLog, "_scan", scan)
+        with iso8583.archive.MessageLog(path, spec) as log:
+            assert len(log) == 3
+    assert index_path.read_bytes() == index
+
+    # Appended messages are indexed. Incomplete message is not.
+    path.write_bytes(_frames(_messages(0, 3)))
+    with path.open("ab") as f:
+        f.write(_frames(_messages(3, 2)) + b"\x00\x30" + b"0200")
+    with iso8583.archive.MessageLog(path, spec) as log:
+        assert len(log) == 5
+        assert log[-1][0]["11"] == "000004"
+    assert index_path.read_bytes() != index
+
+    # Shorter log file is scanned again
+    path.write_bytes(_frames(_messages(10, 1)))
+    with iso8583.archive.MessageLog(path, spec) as log:
+        assert len(log) == 1
+        assert log[0][0]["11"] == "000010"
+
+    # Index of a different framing is not used
+    path.write_bytes(b"".join(b"%04d" % len(s) + s for s in _messages(0, 2)))
+    with iso8583.archive.MessageLog(path, spec, framing="ascii4") as log:
+        assert len(log) == 2
+
+    # Custom index location and corrupted index
+    custom = tmp_path / "custom.idx"
+    custom.write_bytes(b"garbage")
+    with iso8583.archive.MessageLog(
+        path, spec, framing="ascii4", index_path=custom
+    ) as log:
+        assert len(log) == 2
+    assert custom.read_bytes()[:8] == b"ISO8583\x02"
+
+
+def test_message_log_index_replaced(tmp_path: pathlib.Path) -> None:
+    """
+    Saved index is not used for a different log file, even a larger one
+    """
+    path = tmp_path / "messages.log"
+    path.write_bytes(_frames(_messages(0, 3)))
+    with iso8583.archive.MessageLog(path, spec) as log:
+        assert len(log) == 3
+
+    # Rotated log file has messages of different lengths
+    messages = [
+        bytes(iso8583.encode({"t": "0200", "2": "1" * n, "11": "000100"}, spec)[0])
+        for n in range(10, 16)
+    ]
+    path.write_bytes(_frames(messages))
+    with iso8583.archive.MessageLog(path, spec) as log:
+        assert len(log) == 6
+        assert log.frame(1) == messages[1]
+        assert log[5][0]["2"] == "1" * 15
+
+
+def test_message_log_index_read_only(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Index is kept in memory when it cannot be saved
+    """
+    path = tmp_path / "messages.log"
+    path.write_bytes(_frames(_messages(0, 3)))
+
+    def replace(src: typing.Any, dst: typing.Any) -> None:
+        raise PermissionError(13, "Permission denied", dst)
+
+    monkeypatch.setattr(os, "replace", replace)
+    with iso8583.archive.MessageLog(path, spec) as log:
+        assert len(log) == 3
+        assert log[2][0]["11"] == "000002"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["messages.log"]
+
+
+def test_message_log_empty(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "messages.log"
+    path.write_bytes(b"")
+    with iso8583.archive.MessageLog(path, spec) as log:
+        assert len(log) == 0
+        assert list(log) == []
+        assert log[:] == []
+
+
+def test_message_log_negative(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "messages.log"
+    path.write_bytes(b"0020" + b"0200400000000000000010123456789")
+
+    with iso8583.archive.MessageLog(path, spec, framing="ascii4") as log:
+        with pytest.raises(iso8583.DecodeError):
+            log[0]
+
+    path.write_bytes(b"00x0")
+    with pytest.raises(iso8583.FramingError):
+        iso8583.archive.MessageLog(path, spec, framing="ascii4", persist=False)
+
+    with pytest.raises(ValueError, match="Unknown framing 'b3'"):
+        iso8583.archive.MessageLog(path, spec, framing="b3")
+
+    with pytest.raises(FileNotFoundError):
+        iso8583.archive.MessageLog(tmp_path / "missing.log", spec)
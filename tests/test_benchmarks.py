@@ -0,0 +1,118 @@
+import json
+import pathlib
+import typing
+from io import StringIO
+
+import iso8583
+import pytest
+from benchmarks import profiles, runner
+
+
+@pytest.mark.parametrize("name", profiles.PROFILES)
+def test_profile(name: str) -> None:
+    """Profile message survives encoding and decoding"""
+    profile = profiles.get_profile(name)
+    assert profile.name == name
+    s, _ = iso8583.encode(profile.doc_dec, profile.spec)
+    doc_dec, _ = iso8583.decode(s, profile.spec)
+    assert doc_dec == profile.doc_dec
+
+
+def test_profile_unknown() -> None:
+    with pytest.raises(KeyError):
+        profiles.get_profile("spam")
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_run(compiled: bool) -> None:
+    results = runner.run(["default", "large"], number=1, repeat=1, compiled=compiled)
+    assert list(results) == ["default", "large"]
+    for ops in results.values():
+        assert list(ops) == runner.OPERATIONS
+        for result in ops.values():
+            assert set(result) == {"msgs_per_s", "ns_per_field", "alloc_bytes"}
+            assert all(v > 0 for v in result.values())
+
+
+def test_compare() -> None:
+    baseline = {
+        "default": {
+            "decode": {"msgs_per_s": 1000.0, "ns_per_field": 100.0, "alloc_bytes": 1.0},
+            "encode": {"msgs_per_s": 1000.0, "ns_per_field": 100.0, "alloc_bytes": 1.0},
+        }
+    }
+    results = {
+        "default": {
+            "decode": {"msgs_per_s": 800.0, "ns_per_field": 125.0, "alloc_bytes": 1.0},
+            "encode": {"msgs_per_s": 950.0, "ns_per_field": 105.0, "alloc_bytes": 1.0},
+            "pp": {"msgs_per_s": 10.0, "ns_per_field": 9999.0, "alloc_bytes": 1.0},
+        },
+        "bcd": {
+            "decode": {"msgs_per_s": 10.0, "ns_per_field": 9999.0, "alloc_bytes": 1.0},
+        },
+    }
+    assert runner.compare(results, baseline, 10) == [
+        "default decode: +25.0% ns/field (100.0 -> 125.0)"
+    ]
+    assert runner.compare(results, baseline, 2) == [
+        "default decode: +25.0% ns/field (100.0 -> 125.0)",
+        "default encode: +5.0% ns/field (100.0 -> 105.0)",
+    ]
+    assert runner.compare(results, baseline, 30) == []
+
+
+def test_main(tmp_path: pathlib.Path) -> None:
+    baseline = tmp_path / "baseline.json"
+    args = ["-p", "tertiary", "-o", "decode", "-n", "1", "-r", "1"]
+
+    out = StringIO()
+    assert runner.main(args + ["--save", str(baseline)], out) == 0
+    lines = out.getvalue().splitlines()
+    assert lines[0].split() == ["profile", "op", "msgs/s", "ns/field", "alloc", "B"]
+    assert lines[1].split()[:2] == ["tertiary", "decode"]
+    assert len(lines) == 2
+
+    doc = json.loads(baseline.read_text(encoding="utf-8"))
+    assert doc["iso8583"] == iso8583.__version__
+    assert doc["compiled"] is False
+    assert list(doc["results"]) == ["tertiary"]
+
+    # Baseline that is much faster than any real run
+    doc["results"]["tertiary"]["decode"]["ns_per_field"] = 0.001
+    baseline.write_text(json.dumps(doc), encoding="utf-8")
+    out = StringIO()
+    assert runner.main(args + ["--compare", str(baseline)], out) == 1
+    lines = out.getvalue().splitlines()
+    assert lines[0].split()[-1] == "change"
+    assert lines[2].startswith("Slower than baseline: tertiary decode: ")
+
+    # Baseline that is much slower than any real run
+    doc["results"]["tertiary"]["decode"]["ns_per_field"] = 1e12
+    baseline.write_text(json.dumps(doc), encoding="utf-8")
+    out = StringIO()
+    assert runner.main(args + ["--compare", str(baseline), "--compiled"], out) == 0
+    assert len(out.getvalue().splitlines()) == 2
+
+
+def test_main_versus_compiled() -> None:
+    args = ["-p", "tertiary", "-o", "decode", "-n", "1", "-r", "1"]
+    out = StringIO()
+    # Single timing runs are too noisy to compare
+    assert runner.main(args + ["--versus-compiled", "--threshold", "1e6"], out) == 0
+    lines = out.getvalue().splitlines()
+    assert lines[0].split()[-1] == "change"
+    assert lines[1].split()[:2] == ["tertiary", "decode"]
+    assert lines[1].endswith("%")
+    assert len(lines) == 2
+
+
+def test_main_versus_compiled_usage(capsys: typing.Any) -> None:
+    with pytest.raises(SystemExit):
+        runner.main(["--versus-compiled", "--compiled"])
+    assert "--versus-compiled cannot be used" in capsys.readouterr().err
+
+
+def test_main_usage(capsys: typing.Any) -> None:
+    with pytest.raises(SystemExit):
+        runner.main(["-p", "spam"])
+    assert "invalid choice: 'spam'" in capsys.readouterr().err
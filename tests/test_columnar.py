@@ -0,0 +1,265 @@
+import copy
+import typing
+
+import iso8583
+import iso8583.columnar
+import iso8583.specs
+import pytest
+
+
+def _messages(spec: typing.Mapping[str, typing.Any]) -> typing.List[bytes]:
+    docs: typing.List[typing.Dict[str, str]] = [
+        {"t": "0200", "2": "4444555566667777", "4": "000000001500", "11": "000001"},
+        {"t": "0200", "2": "1234567890", "11": "000002", "52": "AABBCCDDEEFF0011"},
+        {"t": "0800", "11": "000003", "70": "301"},
+        {"t": "0210", "11": "000004", "39": "00"},
+    ]
+    return [bytes(iso8583.encode(doc, spec)[0]) for doc in docs]
+
+
+@pytest.mark.parametrize("spec", [iso8583.specs.default_ascii, iso8583.specs.default])
+def test_to_columns(spec: typing.Mapping[str, typing.Any]) -> None:
+    """
+    Columns hold the same field data as decode
+    """
+    fields = ["t", "p", "1", "2", "4", "11", "39", "52", "70", "99", "x"]
+    messages = _messages(spec)
+    columns = iso8583.columnar.to_columns(messages, spec, fields)
+    assert list(columns) == fields
+
+    for field_key, column in columns.items():
+        assert column.key == field_key
+        assert column.to_list() == [
+            iso8583.decode(s, spec)[0].get(field_key) for s in messages
+        ]
+        assert column.present == bytes(
+            field_key in iso8583.decode(s, spec)[0] for s in messages
+        )
+
+    assert columns["t"].width == 4
+    assert columns["p"].width == 16
+    assert columns["4"].width == 12
+    assert columns["52"].width == 16
+    assert columns["4"].offsets.tolist() == []
+    assert columns["2"].width == 0
+    assert columns["2"].offsets.tolist() == [0, 16, 26, 26, 26]
+    assert columns["99"].to_list() == [None] * 4
+
+
+def test_to_columns_non_ascii() -> None:
+    """
+    Fixed field with multi-byte UTF-8 data is stored with offsets.
+    Nibble fields are decoded by the regular decoder.
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["41"]["data_enc"] = "latin-1"
+    spec["2"]["len_count"] = "nibbles"
+    spec["2"]["data_enc"] = "b"
+    spec["2"]["left_pad"] = "0"
+    messages = [
+        bytes(iso8583.encode({"t": "0200", "2": "123", "41": "TERM0001"}, spec)[0]),
+        bytes(iso8583.encode({"t": "0200", "2": "1234", "41": "TERM\xe9001"}, spec)[0]),
+    ]
+    columns = iso8583.columnar.to_columns(messages, spec, ["2", "41"])
+    assert columns["41"].width == 0
+    assert columns["41"].to_list() == ["TERM0001", "TERM\xe9001"]
+    assert columns["2"].to_list() == ["123", "1234"]
+
+    columns = iso8583.columnar.to_columns(messages[:1], spec, ["41"])
+    assert columns["41"].width == 8
+
+
+def test_to_columns_numpy() -> None:
+    np = pytest.importorskip("numpy")
+    spec = iso8583.specs.default_ascii
+    columns = iso8583.columnar.to_columns(_messages(spec), spec, ["2", "4", "11"])
+
+    amounts = columns["4"].to_numpy("int64")
+    assert amounts.dtype == np.int64
+    assert amounts.tolist() == [1500, 0, 0, 0]
+    assert columns["4"].to_numpy().tolist() == ["000000001500", "", "", ""]
+    assert columns["11"].to_numpy("int32").tolist() == [1, 2, 3, 4]
+    assert columns["2"].to_numpy().tolist() == [
+        "4444555566667777",
+        "1234567890",
+        "",
+        "",
+    ]
+    assert np.frombuffer(columns["2"].present, bool).tolist() == [
+        True,
+        True,
+        False,
+        False,
+    ]
+
+    empty = iso8583.columnar.to_columns([], spec, ["2", "4"])
+    assert empty["2"].to_numpy().tolist() == []
+    assert empty["4"].to_numpy().tolist() == []
+
+
+def test_to_columns_negative() -> None:
+    spec = iso8583.specs.default_ascii
+    messages = _messages(spec) + [b"0200400000000000000010123456789"]
+
+    with pytest.raises(
+        iso8583.DecodeError,
+        match="Field data is 9 bytes, expecting 10: field 2 pos 22",
+    ):
+        iso8583.columnar.to_columns(messages, spec, ["2"])
+
+    with pytest.raises(TypeError, match="not str"):
+        iso8583.columnar.to_columns(["0200"], spec, ["t"])  # type: ignore
+
+
+@pytest.mark.parametrize("spec", [iso8583.specs.default_ascii, iso8583.specs.default])
+def test_to_arrays(spec: typing.Mapping[str, typing.Any]) -> None:
+    """
+    Arrays hold the same field data as decode for mixed layouts
+    """
+    pytest.importorskip("numpy")
+    messages = _messages(spec) * 3
+    for i in range(40):
+        doc_dec = {
+            "t": "0200" if i % 2 else "0100",
+            "2": "4" * (12 + i % 5),
+            "4": f"{i:012d}",
+            "11": f"{i:06d}",
+            "41": f"TERM{i:04d}",
+            "52": f"{i:016X}",
+        }
+        if i % 3 == 0:
+            doc_dec["128"] = "ABCDEF0123456789"
+        messages.append(bytes(iso8583.encode(doc_dec, spec)[0]))
+
+    fields = ["t", "p", "1", "2", "4", "11", "39", "41", "52", "70", "128", "x"]
+    arrays = iso8583.columnar.to_arrays(messages, spec, fields)
+    assert list(arrays) == fields
+
+    decoded = [iso8583.decode(s, spec)[0] for s in messages]
+    for field_key, values in arrays.items():
+        assert values.tolist() == [doc_dec.get(field_key) for doc_dec in decoded]
+
+    assert arrays["4"].filled("0").astype("int64")[-3:].tolist() == [37, 38, 39]
+
+
+def test_to_arrays_slow_path() -> None:
+    """
+    Messages that cannot be decoded with vectorized operations
+    produce the same data as decode
+    """
+    pytest.importorskip("numpy")
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["2"]["len_count"] = "nibbles"
+    spec["2"]["data_enc"] = "b"
+    spec["2"]["left_pad"] = "0"
+    spec["41"]["data_enc"] = "latin-1"
+
+    docs: typing.List[typing.Dict[str, str]] = [
+        {"t": "0200", "2": "123"},
+        {"t": "0200", "2": "456"},
+        {"t": "0200", "41": "TERM\xe9001"},
+        {"t": "0200", "41": "TERM0001"},
+        {"t": "0200", "42": "MERCHANT0000001"},
+    ]
+    messages = [bytes(iso8583.encode(doc, spec)[0]) for doc in docs]
+    # Different field 11 lengths in the same group exceed the layout limit
+    spec["11"]["len_type"] = 2
+    spec["11"]["max_len"] = 99
+    for i in range(20):
+        messages.append(
+            bytes(iso8583.encode({"t": "0800", "11": "1" * (i + 1)}, spec)[0])
+        )
+
+    arrays = iso8583.columnar.to_arrays(messages, spec, ["2", "11", "41", "42"])
+    decoded = [iso8583.decode(s, spec)[0] for s in messages]
+    for field_key, values in arrays.items():
+        assert values.tolist() == [doc_dec.get(field_key) for doc_dec in decoded]
+
+
+def test_to_arrays_negative() -> None:
+    pytest.importorskip("numpy")
+    spec = iso8583.specs.default_ascii
+    messages = _messages(spec) + [b"0200400000000000000010123456789"]
+
+    with pytest.raises(
+        iso8583.DecodeError,
+        match="Field data is 9 bytes, expecting 10: field 2 pos 22",
+    ):
+        iso8583.columnar.to_arrays(messages, spec, ["2"])
+
+    # Invalid data is reported by the regular decoder
+    s = bytes(iso8583.encode({"t": "0200", "41": "TERM0001"}, spec)[0])
+    messages = [s, s.replace(b"TERM", b"TER\xff")]
+    with pytest.raises(
+        iso8583.DecodeError,
+        match="Failed to decode field, invalid data: field 41 pos 20",
+    ):
+        iso8583.columnar.to_arrays(messages, spec, ["41"])
+
+    with pytest.raises(TypeError, match="not str"):
+        iso8583.columnar.to_arrays(["0200"], spec, ["t"])  # type: ignore
+
+
+def test_to_arrays_mixed_layouts() -> None:
+    """
+    Messages of layouts that follow a layout decoded one by one
+    are still decoded
+    """
+    pytest.importorskip("numpy")
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["70"] = {
+        "data_enc": "b",
+        "len_enc": "ascii",
+        "len_type": 0,
+        "max_len": 4,
+        "len_count": "nibbles",
+        "desc": "Nibble field",
+    }
+    spec["71"] = {
+        "data_enc": "ascii",
+        "len_enc": "ascii",
+        "len_type": 0,
+        "max_len": 2,
+        "desc": "Text field",
+    }
+    docs = [
+        {"t": "0800", "4": "000000000100", "70": "0301"},
+        {"t": "0800", "4": "000000000200", "71": "AB"},
+        {"t": "0800", "4": "000000000300", "71": "CD"},
+    ]
+    messages = [bytes(iso8583.encode(doc, spec)[0]) for doc in docs]
+
+    fields = ["4", "70", "71"]
+    arrays = iso8583.columnar.to_arrays(messages, spec, fields)
+    columns = iso8583.columnar.to_columns(messages, spec, fields)
+    for key in fields:
+        assert arrays[key].tolist() == columns[key].to_list()
+    assert arrays["4"].tolist() == ["000000000100", "000000000200", "000000000300"]
+
+
+def test_to_arrays_order() -> None:
+    """
+    Invalid data of fields that are not requested is skipped
+    regardless of message order, the same way as by to_columns
+    """
+    pytest.importorskip("numpy")
+    spec = iso8583.specs.default_ascii
+    good = bytes(
+        iso8583.encode({"t": "0200", "11": "000001", "41": "TERM0001"}, spec)[0]
+    )
+    bad = good.replace(b"TERM", b"TER\xff")
+
+    for messages in ([good, bad], [bad, good], [bad, bad, good]):
+        arrays = iso8583.columnar.to_arrays(messages, spec, ["11"])
+        columns = iso8583.columnar.to_columns(messages, spec, ["11"])
+        assert arrays["11"].tolist() == columns["11"].to_list()
+
+    # Invalid field length is reported no matter which message comes first
+    short = good[:-1]
+    for messages in ([good, short], [short, good]):
+        with pytest.raises(
+            iso8583.DecodeError, match="Field data is 7 bytes, expecting 8: field 41"
+        ):
+            iso8583.columnar.to_arrays(messages, spec, ["11"])
+
+    assert iso8583.columnar.to_arrays([], spec, ["t"])["t"].tolist() == []
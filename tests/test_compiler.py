@@ -0,0 +1,279 @@
+import copy
+import pickle
+import typing
+from io import StringIO
+
+import iso8583
+import iso8583.specs
+import pytest
+
+
+def test_compile_spec_mapping() -> None:
+    """
+    Compiled spec is a read-only mapping with the same fields
+    """
+    spec = iso8583.compile_spec(iso8583.specs.default_ascii)
+    assert isinstance(spec, iso8583.CompiledSpec)
+    assert spec.keys() == iso8583.specs.default_ascii.keys()
+    assert spec["2"] == iso8583.specs.default_ascii["2"]
+    assert spec.fields["2"].key == "2"
+    assert spec.fields["2"].len_type == 2
+    assert spec.fields["2"].binary is False
+
+    with pytest.raises(TypeError):
+        spec["2"]["max_len"] = 1  # type: ignore
+
+    with pytest.raises(TypeError):
+        spec.fields["2"] = spec.fields["3"]  # type: ignore
+
+    with pytest.raises(AttributeError):
+        spec.fields["2"].max_len = 1  # type: ignore
+
+
+def test_compile_spec_idempotent() -> None:
+    """
+    Compiling an already compiled spec returns it unchanged
+    """
+    spec = iso8583.compile_spec(iso8583.specs.default)
+    assert iso8583.compile_spec(spec) is spec
+
+
+def test_compile_spec_snapshot() -> None:
+    """
+    Compiled spec is not affected by changes to the original spec
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    compiled = iso8583.compile_spec(spec)
+    spec["2"]["max_len"] = 2
+
+    s = b"02004000000000000000101234567890"
+    doc_dec, _ = iso8583.decode(s, compiled)
+    assert doc_dec["2"] == "1234567890"
+    assert compiled["2"]["max_len"] == 19
+
+    with pytest.raises(iso8583.DecodeError):
+        iso8583.decode(s, spec)
+
+
+def test_plain_spec_changes() -> None:
+    """
+    Fields of a plain spec are compiled once and recompiled when changed
+    """
+    spec: typing.Dict[str, typing.Any] = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["60"]["subfields"] = {
+        "1": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 2},
+        "2": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 2},
+    }
+    s = b"02004000000000000010101234567890004ABCD"
+
+    doc_dec, _ = iso8583.decode(s, spec)
+    assert doc_dec["2"] == "1234567890"
+    assert iso8583.decode(s, spec)[0] == doc_dec
+    assert iso8583.decode_subfields(b"ABCD", spec, "60")[0] == {"1": "AB", "2": "CD"}
+
+    # Changed property
+    spec["2"]["max_len"] = 2
+    with pytest.raises(iso8583.DecodeError):
+        iso8583.decode(s, spec)
+    spec["2"]["max_len"] = 19
+    assert iso8583.decode(s, spec)[0]["2"] == "1234567890"
+
+    # Replaced field specification
+    spec["2"] = dict(spec["2"], max_len=2)
+    with pytest.raises(iso8583.DecodeError):
+        iso8583.decode(s, spec)
+    spec["2"] = iso8583.specs.default_ascii["2"]
+
+    # Changed nested subfield property
+    spec["60"]["subfields"]["1"]["max_len"] = 1
+    assert iso8583.decode_subfields(b"ABC", spec, "60")[0] == {"1": "A", "2": "BC"}
+
+
+def test_compile_spec_pickle() -> None:
+    """
+    Compiled spec is recompiled when unpickled
+    """
+    compiled = iso8583.compile_spec(iso8583.specs.default)
+    unpickled = pickle.loads(pickle.dumps(compiled))
+    assert isinstance(unpickled, iso8583.CompiledSpec)
+    assert unpickled == compiled
+    assert unpickled.fields.keys() == compiled.fields.keys()
+
+    doc_dec = {"t": "0200", "2": "1234567890", "70": "301"}
+    s, _ = iso8583.encode(doc_dec, unpickled)
+    assert s == iso8583.encode(doc_dec, compiled)[0]
+
+
+def test_compile_spec_missing_property() -> None:
+    """
+    Mandatory field properties are required
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    del spec["2"]["len_enc"]
+    with pytest.raises(KeyError):
+        iso8583.compile_spec(spec)
+
+    # Length encoding is not required for fixed fields
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    del spec["3"]["len_enc"]
+    iso8583.compile_spec(spec)
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["spec"],
+    [
+        (iso8583.specs.default,),
+        (iso8583.specs.default_ascii,),
+    ],
+)
+# fmt: on
+def test_compile_spec_encode_decode(spec: typing.Dict[str, typing.Any]) -> None:
+    """
+    Compiled spec produces the same results as the original spec
+    """
+    compiled = iso8583.compile_spec(spec)
+    doc_dec = {
+        "t": "0200",
+        "2": "1234567890123456",
+        "4": "000000001000",
+        "35": "1234567890123456=2512",
+        "41": "TERM0001",
+        "55": "9F2608AABBCCDDEEFF0011",
+        "70": "301",
+    }
+
+    s, doc_enc = iso8583.encode(dict(doc_dec), spec)
+    s_c, doc_enc_c = iso8583.encode(dict(doc_dec), compiled)
+    assert s == s_c
+    assert doc_enc == doc_enc_c
+
+    assert iso8583.decode(s, spec) == iso8583.decode(s, compiled)
+
+    sio, sio_c = StringIO(), StringIO()
+    iso8583.pp(doc_enc, spec, stream=sio)
+    iso8583.pp(doc_enc, compiled, stream=sio_c)
+    assert sio.getvalue() == sio_c.getvalue()
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["len_enc", "len_type", "data", "expected_error"],
+    [
+        ("ascii", 2, b"0200400000000000000012", "Field data is 0 bytes, expecting 12: field 2 pos 22"),
+        ("ascii", 2, b"02004000000000000000xx", "Failed to decode field length, non-numeric data: field 2 pos 20"),
+        ("bcd", 1, b"02004000000000000000\xff", "Failed to decode field length, invalid BCD data: field 2 pos 20"),
+        ("invalid", 2, b"0200400000000000000012", "Failed to decode field length, unknown encoding specified: field 2 pos 20"),
+    ],
+)
+# fmt: on
+def test_compile_spec_decode_negative(
+    len_enc: str, len_type: int, data: bytes, expected_error: str
+) -> None:
+    """
+    Compiled spec reports the same errors as the original spec
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["2"]["len_enc"] = len_enc
+    spec["2"]["len_type"] = len_type
+
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.decode(data, spec)
+    assert e.value.args[0] == expected_error
+
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.decode(data, iso8583.compile_spec(spec))
+    assert e.value.args[0] == expected_error
+
+
+def test_compile_spec_encode_negative() -> None:
+    """
+    Compiled spec reports the same errors as the original spec
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["2"]["data_enc"] = "invalid"
+
+    for s in (spec, iso8583.compile_spec(spec)):
+        with pytest.raises(
+            iso8583.EncodeError,
+            match="Failed to encode field, unknown encoding specified: field 2",
+        ):
+            iso8583.encode({"t": "0200", "2": "1234"}, s)
+
+
+def test_compile_spec_layout_cache() -> None:
+    """
+    Layout cache produces the same results and counts hits and misses
+    """
+    spec = iso8583.specs.default_ascii
+    cached = iso8583.compile_spec(spec, layout_cache_size=16)
+    assert cached.cache_info() == iso8583.compiler.CacheInfo(0, 0, 16, 0)
+    assert iso8583.compile_spec(spec).cache_info() == (0, 0, 0, 0)
+
+    docs: typing.List[typing.Dict[str, str]] = [
+        {"t": "0200", "2": "1234567890", "4": "000000001500"},
+        {"t": "0800", "70": "301"},
+        {"t": "0200", "2": "1234567890", "128": "ABCDEF0123456789"},
+    ]
+    for _ in range(3):
+        for doc in docs:
+            s, doc_enc = iso8583.encode(dict(doc), spec)
+            assert iso8583.encode(dict(doc), cached) == (s, doc_enc)
+            assert iso8583.encode_fast(dict(doc), cached) == s
+            assert iso8583.decode(s, cached) == iso8583.decode(s, spec)
+            assert iso8583.decode_fast(s, cached) == iso8583.decode(s, spec)[0]
+
+    # Three encoded key sets, three primary and two secondary bitmaps
+    info = cached.cache_info()
+    assert info.maxsize == 16
+    assert info.currsize == 8
+    assert info.hits > info.misses > 0
+
+    cached.cache_clear()
+    assert cached.cache_info() == (0, 0, 16, 0)
+
+    # Cache size is preserved by pickle, cached layouts are not
+    cached.cache_clear()
+    iso8583.decode(iso8583.encode(dict(docs[0]), cached)[0], cached)
+    unpickled = pickle.loads(pickle.dumps(cached))
+    assert unpickled.cache_info() == (0, 0, 16, 0)
+
+
+def test_compile_spec_layout_cache_eviction() -> None:
+    spec = iso8583.compile_spec(iso8583.specs.default_ascii, layout_cache_size=2)
+    messages = [
+        iso8583.encode({"t": "0200", field_key: "11"}, spec)[0]
+        for field_key in ("39", "48", "62")
+    ]
+    assert spec.cache_info() == (0, 3, 2, 2)
+
+    # Least recently used layout is evicted
+    iso8583.decode(messages[2], spec)
+    iso8583.decode(messages[1], spec)
+    iso8583.decode(messages[0], spec)
+    assert spec.cache_info() == (0, 6, 2, 2)
+    iso8583.decode(messages[1], spec)
+    iso8583.decode(messages[0], spec)
+    assert spec.cache_info() == (2, 6, 2, 2)
+
+
+def test_compile_spec_layout_cache_errors() -> None:
+    """
+    Invalid bitmaps and keys are reported the same way and not cached
+    """
+    spec = iso8583.specs.default_ascii
+    cached = iso8583.compile_spec(spec, layout_cache_size=8)
+
+    for _ in range(2):
+        with pytest.raises(iso8583.DecodeError, match="non-hex data: field p pos 4"):
+            iso8583.decode(b"0200400000000000000X", cached)
+        with pytest.raises(iso8583.EncodeError, match="invalid fields"):
+            iso8583.encode({"t": "0200", "02": "1"}, cached)
+
+    assert cached.cache_info().currsize == 0
+
+    # Cached bitmap still reports missing field data
+    s = iso8583.encode({"t": "0200", "2": "1234567890"}, cached)[0]
+    iso8583.decode(s, cached)
+    with pytest.raises(iso8583.DecodeError, match="field 2 pos 20"):
+        iso8583.decode(s[:21], cached)
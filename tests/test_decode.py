@@ -527,6 +527,45 @@ def test_tertiary_bitmap_decoding_negative(
     assert e.value.args[0] == expected_error
 
 
+# fmt: off
+@pytest.mark.parametrize(
+    ["bitmaps", "expected_fields"],
+    [
+        ("0000000000000000", []),
+        ("FFFFFFFFFFFFFFFF" * 3, [f for f in range(2, 193) if f != 65]),
+        ("5555555555555555", [f for f in range(2, 65, 2)]),
+        ("AAAAAAAAAAAAAAAA" + "2AAAAAAAAAAAAAAA", [f for f in range(3, 128, 2) if f != 65]),
+        ("800000000000000180000000000000000000000000000001", [64, 192]),
+        ("0123456789ABCDEF", [8, 11, 15, 16, 18, 22, 24, 26, 27, 30, 31, 32, 33, 37, 40, 41, 43, 45, 47, 48, 49, 50, 53, 54, 56, 57, 58, 59, 61, 62, 63, 64]),
+    ],
+)
+# fmt: on
+def test_bitmap_field_order(bitmaps: str, expected_fields: typing.List[int]) -> None:
+    """
+    Fields enabled in bitmaps are decoded in ascending order
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    for f in range(2, 193):
+        spec[str(f)] = {
+            "data_enc": "ascii",
+            "len_enc": "ascii",
+            "len_type": 0,
+            "max_len": 1,
+            "desc": "",
+        }
+
+    s = b"0200" + bitmaps.encode() + b"x" * len(expected_fields)
+    doc_dec, doc_enc = iso8583.decode(s, spec)
+    expected_keys = [str(f) for f in expected_fields]
+    assert [k for k in doc_dec if k not in {"t", "p", "1"}] == expected_keys
+    assert [k for k in doc_enc if k not in {"t", "p", "1"}] == expected_keys
+    assert doc_dec.get("1", "") == bitmaps[16:]
+
+    # Whitespace in a text bitmap is skipped
+    doc_dec, _ = iso8583.decode(b"020000 00 00 00 0040x", spec)
+    assert doc_dec == {"t": "0200", "p": "00 00 00 00 0040", "42": "x"}
+
+
 # fmt: off
 @pytest.mark.parametrize(
     ["data", "data_enc", "len_type", "max_len", "len_enc", "expected_data"],
@@ -631,3 +670,404 @@ def test_field_decoding_negative(
     with pytest.raises(iso8583.DecodeError) as e:
         iso8583.decode(b"02004000000000000000" + data, spec=spec)
     assert e.value.args[0] == expected_error
+
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.decode_view(b"02004000000000000000" + data, spec=spec)
+    assert e.value.args[0] == expected_error
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["s_type"],
+    [(bytes,), (bytearray,), (memoryview,)],
+)
+# fmt: on
+def test_decode_view(s_type: typing.Callable[[bytes], typing.Any]) -> None:
+    """
+    decode_view returns the same data as decode but as views of the input
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["2"]["data_enc"] = "b"
+    spec["2"]["len_type"] = 2
+    spec["2"]["len_count"] = "nibbles"
+    spec["2"]["left_pad"] = "0"
+
+    raw = b"0200C000000000000000" b"0000000000200000" b"03\x01\x23" b"003210"
+    s = s_type(raw)
+
+    doc_dec, doc_enc = iso8583.decode(raw, spec)
+    doc_dec_v, doc_enc_v = iso8583.decode_view(s, spec)
+
+    assert (
+        doc_dec_v
+        == doc_dec
+        == {
+            "t": "0200",
+            "p": "C000000000000000",
+            "1": "0000000000200000",
+            "2": "123",
+            "107": "210",
+        }
+    )
+    assert doc_enc_v == doc_enc
+    for field in doc_enc_v.values():
+        assert isinstance(field["len"], memoryview)
+        assert isinstance(field["data"], memoryview)
+
+    assert doc_enc_v["2"]["data"].obj is s or isinstance(s, memoryview)
+
+
+def test_decode_view_negative() -> None:
+    """
+    decode_view errors carry the original data and no views
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    s = bytearray(b"020040000000000000001012345")
+
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.decode_view(s, spec)
+
+    assert e.value.s is s
+    assert e.value.doc_enc["2"] == {"len": b"10", "data": b"12345"}
+    assert type(e.value.doc_enc["2"]["data"]) is bytes
+    pickle.loads(pickle.dumps(e.value))
+
+    with pytest.raises(
+        TypeError,
+        match="Encoded ISO8583 data must be bytes, bytearray or memoryview, not str",
+    ):
+        iso8583.decode_view("spam", spec)  # type: ignore
+
+
+def test_decode_lazy() -> None:
+    """
+    decode_lazy decodes fields on first access
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["55"]["data_enc"] = "b"
+    s, _ = iso8583.encode(
+        {"t": "0200", "2": "1234567890", "41": "TERM0001", "55": "9F2608", "70": "301"},
+        spec,
+    )
+
+    doc_dec, _ = iso8583.decode(s, spec)
+    msg = iso8583.decode_lazy(s, spec)
+
+    assert isinstance(msg, iso8583.LazyMessage)
+    assert list(msg) == list(doc_dec)
+    assert len(msg) == len(doc_dec)
+    assert msg._pending.keys() == {"2", "41", "55", "70"}
+
+    assert msg["t"] == "0200"
+    assert msg["41"] == "TERM0001"
+    assert msg._pending.keys() == {"2", "55", "70"}
+    assert "55" in msg
+    assert msg._pending.keys() == {"2", "55", "70"}
+    assert msg.get("128") is None
+
+    assert dict(msg) == doc_dec
+    assert msg == doc_dec
+    assert not msg._pending
+
+    # Pickled as a regular dict
+    assert pickle.loads(pickle.dumps(msg)) == doc_dec
+
+
+def test_decode_lazy_encode() -> None:
+    """
+    LazyMessage can be modified and encoded
+    """
+    spec = iso8583.compile_spec(iso8583.specs.default_ascii)
+    s = b"02104010100000000000161234567890123456123456111"
+
+    msg = iso8583.decode_lazy(s, spec)
+    msg["39"] = "00"
+    del msg["12"]
+    msg["t"] = "0210"
+
+    s_new, _ = iso8583.encode(msg, spec)
+    assert s_new == b"02104000100002000000161234567890123456111" b"00"
+    assert msg["p"] == "4000100002000000"
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["data", "expected_error"],
+    [
+        (b"02004000000000000000" b"1", "Field length is 1 bytes wide, expecting 2: field 2 pos 20"),
+        (b"02004000000000000000" b"1012345", "Field data is 5 bytes, expecting 10: field 2 pos 22"),
+        (b"02004000000000000000" b"xx12345", "Failed to decode field length, non-numeric data: field 2 pos 20"),
+        (b"02004000000000000000" b"0212345", "Extra data after last field: field 2 pos 24"),
+        (b"0200400000000000000", "Field data is 15 bytes, expecting 16: field p pos 4"),
+    ]
+)
+# fmt: on
+def test_decode_lazy_negative(data: bytes, expected_error: str) -> None:
+    """
+    decode_lazy validates field boundaries immediately
+    """
+    spec = iso8583.specs.default_ascii
+
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.decode_lazy(data, spec)
+    assert e.value.args[0] == expected_error
+
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.decode(data, spec)
+    assert e.value.args[0] == expected_error
+
+
+def test_decode_lazy_negative_data() -> None:
+    """
+    decode_lazy reports invalid field data on access
+    """
+    spec = iso8583.specs.default_ascii
+    msg = iso8583.decode_lazy(b"02004000000000000000" b"02\xff\xff", spec)
+
+    with pytest.raises(iso8583.DecodeError) as e:
+        msg["2"]
+    assert e.value.args[0] == "Failed to decode field, invalid data: field 2 pos 22"
+    assert e.value.doc_enc == {"2": {"len": b"02", "data": b"\xff\xff"}}
+
+    # The field stays undecoded
+    with pytest.raises(iso8583.DecodeError):
+        msg["2"]
+
+    with pytest.raises(
+        TypeError, match="Encoded ISO8583 data must be bytes or bytearray, not str"
+    ):
+        iso8583.decode_lazy("spam", spec)  # type: ignore
+
+
+def test_index() -> None:
+    """
+    index locates fields without decoding them
+    """
+    spec = copy.deepcopy(iso8583.specs.default)
+    spec["h"]["max_len"] = 6
+    spec["h"]["len_type"] = 0
+    spec["2"]["data_enc"] = "b"
+    spec["2"]["len_enc"] = "bcd"
+    spec["2"]["len_type"] = 1
+    spec["2"]["len_count"] = "nibbles"
+    spec["2"]["left_pad"] = "0"
+
+    doc_dec = {
+        "h": "header",
+        "t": "0200",
+        "2": "123",
+        "41": "TERM0001",
+        "70": "301",
+        "150": "ABC",
+    }
+    spec["150"] = dict(spec["41"])
+    spec["150"]["max_len"] = 3
+    s, doc_enc = iso8583.encode(doc_dec, spec)
+
+    table = iso8583.index(s, spec)
+    assert table.typecode == "I"
+    rows = [tuple(table[i : i + 4]) for i in range(0, len(table), 4)]
+    assert [r[0] for r in rows] == [1, 2, 41, 70, 150]
+
+    for num, len_idx, data_idx, data_len in rows:
+        assert s[len_idx:data_idx] == doc_enc[str(num)]["len"]
+        assert s[data_idx : data_idx + data_len] == doc_enc[str(num)]["data"]
+
+    assert rows[0][3] == 16
+    assert iso8583.index(memoryview(s), spec) == table
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["data", "expected_error"],
+    [
+        (b"02004000000000000000" b"1", "Field length is 1 bytes wide, expecting 2: field 2 pos 20"),
+        (b"02004000000000000000" b"1012345", "Field data is 5 bytes, expecting 10: field 2 pos 22"),
+        (b"02004000000000000000" b"0212345", "Extra data after last field: field 2 pos 24"),
+        (b"02000000000000000000" b"0212345", "Extra data after last field: field p pos 20"),
+    ]
+)
+# fmt: on
+def test_index_negative(data: bytes, expected_error: str) -> None:
+    spec = iso8583.specs.default_ascii
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.index(data, spec)
+    assert e.value.args[0] == expected_error
+
+    with pytest.raises(
+        TypeError,
+        match="Encoded ISO8583 data must be bytes, bytearray or memoryview, not str",
+    ):
+        iso8583.index("spam", spec)  # type: ignore
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["fields", "expected_keys"],
+    [
+        ({"t", "2", "41"}, {"t", "2", "41"}),
+        ({"70"}, {"70"}),
+        ({"p", "1", "3"}, {"p", "1"}),
+        (set(), set()),
+        (["h", "t", "55"], {"h", "t", "55"}),
+    ]
+)
+# fmt: on
+def test_decode_fields(
+    fields: typing.Container[str], expected_keys: typing.Set[str]
+) -> None:
+    """
+    Only requested fields are decoded
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    spec["h"]["max_len"] = 2
+    spec["h"]["len_type"] = 0
+    doc_dec = {
+        "h": "hd",
+        "t": "0200",
+        "2": "1234567890",
+        "41": "TERM0001",
+        "55": "emv",
+        "70": "301",
+    }
+    s, doc_enc = iso8583.encode(doc_dec, spec)
+
+    doc_dec_f, doc_enc_f = iso8583.decode(s, spec, fields=fields)
+    assert doc_dec_f.keys() == doc_enc_f.keys() == expected_keys
+    for k in expected_keys:
+        assert doc_dec_f[k] == doc_dec[k]
+        assert doc_enc_f[k] == doc_enc[k]
+
+    doc_dec_v, doc_enc_v = iso8583.decode_view(s, spec, fields=fields)
+    assert doc_dec_v == doc_dec_f
+    assert doc_enc_v == doc_enc_f
+
+
+def test_decode_fields_negative() -> None:
+    """
+    Skipped fields are still validated. Invalid data is not.
+    """
+    spec = iso8583.specs.default_ascii
+    s = b"0200C0000000000000000000000000000000" b"02\xff\xff" b"0212345"
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.decode(s, spec, fields={"t"})
+    assert e.value.args[0] == "Extra data after last field: field 2 pos 40"
+
+    s = b"0200400000000000000002\xff\xff"
+    with pytest.raises(iso8583.DecodeError):
+        iso8583.decode(s, spec)
+    doc_dec, _ = iso8583.decode(s, spec, fields={"t"})
+    assert doc_dec == {"t": "0200"}
+
+
+def test_decode_fast() -> None:
+    """
+    Fast decode produces the same decoded data as regular decode
+    """
+    spec = copy.deepcopy(iso8583.specs.default)
+    spec["2"]["left_pad"] = "0"
+    spec["35"]["right_pad"] = "F"
+    doc_dec = {
+        "t": "0200",
+        "2": "123456789012345",
+        "4": "000000001000",
+        "35": "1234567890123456D251",
+        "41": "TERM0001",
+        "52": "AABBCCDDEEFF0011",
+        "55": "",
+        "70": "301",
+    }
+    s, _ = iso8583.encode(copy.deepcopy(doc_dec), spec)
+
+    for spec_ in (spec, iso8583.compile_spec(spec)):
+        assert iso8583.decode_fast(s, spec_) == iso8583.decode(s, spec_)[0]
+        assert iso8583.decode_fast(bytes(s), spec_) == iso8583.decode(s, spec_)[0]
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["data"],
+    [
+        (b"",),
+        (b"0200",),
+        (b"0200400000000000000012",),
+        (b"02004000000000000000xx",),
+        (b"0200400000000000000021123456789012345678901",),
+        (b"020040000000000000001012345678901",),
+        (b"020040000000000000001012345\xff7890",),
+        (b"0200C000000000000000101234567890",),
+    ],
+)
+# fmt: on
+def test_decode_fast_negative(data: bytes) -> None:
+    """
+    Fast decode reports the same errors as regular decode
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+
+    with pytest.raises(iso8583.DecodeError) as e:
+        iso8583.decode(data, spec)
+
+    with pytest.raises(iso8583.DecodeError) as e_fast:
+        iso8583.decode_fast(data, spec)
+
+    assert e_fast.value.args == e.value.args
+    assert e_fast.value.doc_dec == e.value.doc_dec
+    assert e_fast.value.doc_enc == e.value.doc_enc
+    assert e_fast.value.pos == e.value.pos
+    assert e_fast.value.field == e.value.field
+
+    with pytest.raises(TypeError):
+        iso8583.decode_fast(data.decode("latin-1"), spec)  # type: ignore
+
+
+def test_decode_many() -> None:
+    """
+    Batch decode produces the same results as decode in the original order
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    messages: typing.List[typing.Union[bytes, bytearray]] = [
+        b"02004010100000000000161234567890123456123456111",
+        bytearray(b"08000000000000000000"),
+        b"0200400000000000000010123456789",
+        b"02000000000000000000",
+    ]
+
+    results = list(
+        iso8583.decode_many(messages, spec, fields={"t", "2"}, return_exceptions=True)
+    )
+    assert len(results) == 4
+    assert results[0] == iso8583.decode(messages[0], spec, fields={"t", "2"})
+    assert results[1] == iso8583.decode(messages[1], spec, fields={"t", "2"})
+    assert results[3] == iso8583.decode(messages[3], spec, fields={"t", "2"})
+    assert isinstance(results[2], iso8583.DecodeError)
+    assert results[2].args[0] == "Field data is 9 bytes, expecting 10: field 2 pos 22"
+    assert results[2].s == messages[2]
+
+    # Specification is compiled once and not looked up again
+    it = iso8583.decode_many(messages[:2], spec)
+    spec["t"]["max_len"] = 2
+    assert [doc_dec["t"] for doc_dec, _ in it] == ["0200", "0800"]
+
+    assert list(iso8583.decode_many([], spec)) == []
+
+
+def test_decode_many_negative() -> None:
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    messages = [b"08000000000000000000", b"0800", b"08000000000000000000"]
+
+    it = iso8583.decode_many(messages, spec)
+    assert next(it)[0]["t"] == "0800"
+    with pytest.raises(
+        iso8583.DecodeError,
+        match="Field data is 0 bytes, expecting 16: field p pos 4",
+    ):
+        next(it)
+
+    with pytest.raises(TypeError, match="not str"):
+        list(iso8583.decode_many(["0800"], spec, return_exceptions=True))  # type: ignore
+
+    # Invalid specification is reported before iteration
+    del spec["t"]["len_type"]
+    with pytest.raises(KeyError):
+        iso8583.decode_many(messages, spec)
@@ -1,4 +1,5 @@
 import copy
+import types
 import pickle
 import typing
 
@@ -539,6 +540,73 @@ def test_bitmap_remove_unused_bitmaps() -> None:
     assert doc_dec.keys() == set(["t", "p", "2"])
 
 
+def test_bitmap_precomputed() -> None:
+    """
+    Precomputed bitmap produces the same result as dict keys
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    for f in range(129, 193):
+        spec[str(f)] = copy.deepcopy(spec["41"])
+
+    doc_dec = {
+        "t": "0200",
+        "2": "1234567890",
+        "64": "0" * 16,
+        "70": "301",
+        "130": "TERM0001",
+        "192": "TERM0002",
+    }
+    bitmap = 0
+    for f in (2, 64, 70, 130, 192):
+        bitmap |= 1 << (192 - f)
+
+    s, doc_enc = iso8583.encode(copy.deepcopy(doc_dec), spec)
+    s_b, doc_enc_b = iso8583.encode(copy.deepcopy(doc_dec), spec, bitmap=bitmap)
+    assert s == s_b
+    assert doc_enc == doc_enc_b
+
+    # Bits for fields 1 and 65 are calculated as needed
+    bitmap_ext = bitmap | 1 << 191 | 1 << 127
+    s_b, _ = iso8583.encode(copy.deepcopy(doc_dec), spec, bitmap=bitmap_ext)
+    assert s == s_b
+
+    # Fields not enabled in the bitmap are not encoded
+    s_b, doc_enc_b = iso8583.encode(copy.deepcopy(doc_dec), spec, bitmap=1 << 190)
+    assert s_b == b"02004000000000000000101234567890"
+    assert doc_enc_b.keys() == {"t", "p", "2"}
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["bitmap", "expected_error"],
+    [
+        (1 << 189, "Field data is required according to bitmap: field 3"),
+        (1 << 190 | 1, "Field data is required according to bitmap: field 192"),
+        (-1, "Bitmap must be a non-negative 192-bit integer, not -1: field p"),
+        (1 << 192, f"Bitmap must be a non-negative 192-bit integer, not {1 << 192}: field p"),
+        ("1", "Bitmap must be a non-negative 192-bit integer, not '1': field p"),
+    ],
+)
+# fmt: on
+def test_bitmap_precomputed_negative(bitmap: int, expected_error: str) -> None:
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    with pytest.raises(iso8583.EncodeError) as e:
+        iso8583.encode({"t": "0200", "2": "1234"}, spec, bitmap=bitmap)
+    assert e.value.args[0] == expected_error
+
+
+def test_bitmap_non_canonical_field_keys() -> None:
+    """
+    Numeric keys must match field numbers exactly
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    with pytest.raises(
+        iso8583.EncodeError,
+        match="Dictionary contains invalid fields .'02', 3.: field p",
+    ):
+        iso8583.encode({"t": "0200", "02": "1234", 3: "0", "0": ""}, spec)  # type: ignore
+
+
 # fmt: off
 @pytest.mark.parametrize(
     ["data_enc", "data", "len_type", "max_len", "expected_encoded_length", "expected_encoded_data"],
@@ -783,3 +851,214 @@ def test_field_length_encoding_negative(
     with pytest.raises(iso8583.EncodeError) as e:
         t = iso8583.encode(doc_dec, spec=spec)
     assert e.value.args[0] == expected_error
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["buf_type"],
+    [
+        (bytearray,),
+        (lambda b: memoryview(bytearray(b)),),
+        (lambda b: memoryview(bytearray(b)).cast("c"),),
+    ],
+)
+# fmt: on
+def test_encode_into(buf_type: typing.Callable[[bytes], typing.Any]) -> None:
+    """
+    Encode into a preallocated buffer
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    doc_dec = {"t": "0200", "2": "1234567890", "39": "00", "70": "301"}
+    s, doc_enc = iso8583.encode(copy.deepcopy(doc_dec), spec)
+
+    buf = buf_type(b"\xff" * 128)
+    n = iso8583.encode_into(copy.deepcopy(doc_dec), spec, buf)
+    assert n == len(s)
+    assert bytes(buf)[:n] == s
+    assert bytes(buf)[n:] == b"\xff" * (128 - n)
+
+    buf = buf_type(b"\xff" * 128)
+    n = iso8583.encode_into(copy.deepcopy(doc_dec), spec, buf, offset=10, prefix_len=4)
+    assert n == len(s)
+    assert bytes(buf)[:14] == b"\xff" * 14
+    assert bytes(buf)[14 : 14 + n] == s
+    assert bytes(buf)[14 + n :] == b"\xff" * (128 - 14 - n)
+
+    # Buffer is exactly large enough
+    buf = buf_type(b"\xff" * (len(s) + 2))
+    assert iso8583.encode_into(copy.deepcopy(doc_dec), spec, buf, 2) == len(s)
+    assert bytes(buf)[2:] == s
+
+
+def test_encode_into_negative() -> None:
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    doc_dec = {"t": "0200", "2": "1234567890", "39": "00"}
+
+    # Field 2 does not fit
+    buf = bytearray(b"\xff" * 40)
+    with pytest.raises(
+        iso8583.EncodeError,
+        match="Encoded data does not fit into buffer of 40 bytes at offset 10: field 2",
+    ):
+        iso8583.encode_into(doc_dec, spec, buf, offset=10)
+    assert buf == b"\xff" * 40
+
+    # Field 39 does not fit
+    with pytest.raises(
+        iso8583.EncodeError,
+        match="Encoded data does not fit into buffer of 40 bytes at offset 4: field 39",
+    ):
+        iso8583.encode_into(doc_dec, spec, buf, offset=4, prefix_len=4)
+    assert buf == b"\xff" * 40
+
+    with pytest.raises(TypeError, match="Buffer must be writable"):
+        iso8583.encode_into(doc_dec, spec, memoryview(b"\xff" * 40))
+
+    with pytest.raises(
+        TypeError, match="Buffer must be bytearray or memoryview, not bytes"
+    ):
+        iso8583.encode_into(doc_dec, spec, b"\xff" * 40)  # type: ignore
+
+    with pytest.raises(
+        ValueError, match="Offset and prefix length must not be negative"
+    ):
+        iso8583.encode_into(doc_dec, spec, buf, offset=-1)
+
+    with pytest.raises(TypeError, match="Decoded ISO8583 data must be dict, not list"):
+        iso8583.encode_into([], spec, buf)  # type: ignore
+
+
+def test_encode_fast() -> None:
+    """
+    Fast encode produces the same encoded data as regular encode
+    """
+    spec = copy.deepcopy(iso8583.specs.default)
+    spec["2"]["left_pad"] = "0"
+    spec["35"]["right_pad"] = "F"
+    doc_dec = {
+        "t": "0200",
+        "1": "ignored",
+        "2": "123456789012345",
+        "4": "000000001000",
+        "35": "1234567890123456D251",
+        "41": "TERM0001",
+        "52": "AABBCCDDEEFF0011",
+        "55": "",
+        "70": "301",
+    }
+
+    for spec_ in (spec, iso8583.compile_spec(spec)):
+        doc_dec_fast = copy.deepcopy(doc_dec)
+        doc_dec_regular = copy.deepcopy(doc_dec)
+        s, _ = iso8583.encode(doc_dec_regular, spec_)
+        assert iso8583.encode_fast(doc_dec_fast, spec_) == s
+        assert doc_dec_fast == doc_dec_regular
+
+    bitmap = 1 << (192 - 4) | 1 << (192 - 41)
+    s, _ = iso8583.encode(copy.deepcopy(doc_dec), spec, bitmap=bitmap)
+    assert iso8583.encode_fast(copy.deepcopy(doc_dec), spec, bitmap=bitmap) == s
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["doc_dec"],
+    [
+        ({},),
+        ({"t": "02"},),
+        ({"t": "0200", "193": ""},),
+        ({"t": "0200", "4": ""},),
+        ({"t": "0200", "2": "1" * 20},),
+        ({"t": "0200", "3": "12345"},),
+        ({"t": "0200", "2": "123Ā"},),
+        ({"t": "0200", "3": "123456", "52": "XX"},),
+        ({"t": "0200", "3": "123456", "52": 12},),
+    ],
+)
+# fmt: on
+def test_encode_fast_negative(doc_dec: typing.Dict[str, typing.Any]) -> None:
+    """
+    Fast encode reports the same errors as regular encode
+    """
+    spec = copy.deepcopy(iso8583.specs.default)
+    spec["2"]["data_enc"] = "ascii"
+
+    try:
+        iso8583.encode(copy.deepcopy(doc_dec), spec)
+    except Exception as e:
+        error = e
+    else:
+        raise AssertionError("encode did not raise")
+
+    with pytest.raises(error.__class__) as e_fast:
+        iso8583.encode_fast(copy.deepcopy(doc_dec), spec)
+
+    assert e_fast.value.args == error.args
+    if isinstance(error, iso8583.EncodeError):
+        assert isinstance(e_fast.value, iso8583.EncodeError)
+        assert e_fast.value.doc_dec == error.doc_dec
+        assert e_fast.value.doc_enc == error.doc_enc
+        assert e_fast.value.field == error.field
+
+    with pytest.raises(TypeError):
+        iso8583.encode_fast([], spec)  # type: ignore
+
+
+def test_encode_no_mutate() -> None:
+    """
+    Encoding does not modify read-only input when mutate is false
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    doc_dec = {
+        "t": "0200",
+        "p": "stale",
+        "1": "stale",
+        "2": "1234567890",
+        "65": "stale",
+        "70": "301",
+    }
+    template = types.MappingProxyType(copy.deepcopy(doc_dec))
+    s, doc_enc = iso8583.encode(copy.deepcopy(doc_dec), spec)
+
+    s_n, doc_enc_n = iso8583.encode(template, spec, mutate=False)
+    assert s_n == s
+    assert doc_enc_n == doc_enc
+    assert template == doc_dec
+
+    assert iso8583.encode_fast(template, spec, mutate=False) == s
+    assert template == doc_dec
+
+    buf = bytearray(len(s))
+    assert iso8583.encode_into(template, spec, buf, mutate=False) == len(s)
+    assert buf == s
+    assert template == doc_dec
+
+    bitmap = 1 << (192 - 2) | 1 << (192 - 70)
+    s_n, _ = iso8583.encode(template, spec, bitmap=bitmap, mutate=False)
+    assert s_n == s
+    assert template == doc_dec
+
+
+def test_encode_no_mutate_negative() -> None:
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    template = types.MappingProxyType({"t": "0200", "2": "1234567890", "3": "12"})
+
+    with pytest.raises(iso8583.EncodeError) as e:
+        iso8583.encode(template, spec, mutate=False)
+    assert e.value.args[0] == "Field data is 2 bytes, expecting 6: field 3"
+    assert e.value.doc_dec is template
+    assert e.value.doc_enc["p"]["data"] == b"6000000000000000"
+
+    with pytest.raises(iso8583.EncodeError) as e:
+        iso8583.encode_fast(template, spec, mutate=False)
+    assert e.value.args[0] == "Field data is 2 bytes, expecting 6: field 3"
+    assert e.value.doc_dec is template
+
+    with pytest.raises(
+        TypeError, match="Decoded ISO8583 data must be dict, not mappingproxy"
+    ):
+        iso8583.encode(template, spec)
+
+    with pytest.raises(
+        TypeError, match="Decoded ISO8583 data must be a mapping, not list"
+    ):
+        iso8583.encode([], spec, mutate=False)  # type: ignore
@@ -0,0 +1,138 @@
+import pathlib
+import pickle
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+import iso8583
+import iso8583.parallel
+import iso8583.specs
+import pytest
+
+spec = iso8583.specs.default_ascii
+
+
+def _write(path: pathlib.Path, messages: typing.List[bytes]) -> None:
+    path.write_bytes(b"".join(len(s).to_bytes(2, "big") + s for s in messages))
+
+
+def _messages(count: int) -> typing.List[bytes]:
+    messages = []
+    for i in range(count):
+        doc_dec = {"t": "0200", "11": f"{i:06d}"}
+        if i % 3 == 0:
+            doc_dec["2"] = "1234567890"
+        if i % 7 == 0:
+            doc_dec["70"] = "301"
+        messages.append(bytes(iso8583.encode(doc_dec, spec)[0]))
+    return messages
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_decode_file(tmp_path: pathlib.Path, workers: int) -> None:
+    """
+    Columns hold a value for every message in file order
+    """
+    messages = _messages(100)
+    messages[10] = b"0200"
+    messages[55] = messages[55] + b"1"
+    path = tmp_path / "archive.bin"
+    _write(path, messages)
+
+    columns, errors = iso8583.parallel.decode_file(path, spec, workers=workers)
+
+    assert sorted(errors) == [10, 55]
+    assert errors[10].args[0] == "Field data is 0 bytes, expecting 16: field p pos 4"
+    assert errors[10].s == b"0200"
+    assert errors[10].doc_dec == {}
+    assert errors[10].doc_enc == {}
+    assert errors[55].field == "11"
+
+    assert sorted(columns) == ["1", "11", "2", "70", "p", "t"]
+    for field_key, column in columns.items():
+        assert len(column) == 100
+        for i, value in enumerate(column):
+            if i in errors:
+                assert value is None
+            else:
+                assert value == iso8583.decode(messages[i], spec)[0].get(field_key)
+
+    # Selected fields
+    columns, errors = iso8583.parallel.decode_file(
+        str(path), spec, workers=workers, fields={"11"}, chunks_per_worker=1
+    )
+    assert list(columns) == ["11"]
+    assert columns["11"][9] == "000009"
+    assert columns["11"][10] is None
+    assert sorted(errors) == [10, 55]
+
+    # Errors are pickled without partial data
+    assert len(pickle.dumps(errors[55])) < 200
+
+
+def test_decode_file_threads(tmp_path: pathlib.Path) -> None:
+    """
+    In-process decoding is safe to run from several threads at once
+    """
+    paths = []
+    for n in range(4):
+        path = tmp_path / f"archive{n}.bin"
+        messages = [
+            bytes(iso8583.encode({"t": "0200", "11": f"{n}{i:05d}"}, spec)[0])
+            for i in range(500)
+        ]
+        _write(path, messages)
+        paths.append(path)
+
+    def decode(path: pathlib.Path) -> typing.List[typing.Any]:
+        columns, errors = iso8583.parallel.decode_file(
+            path, spec, workers=1, chunks_per_worker=50
+        )
+        assert errors == {}
+        return columns["11"]
+
+    with ThreadPoolExecutor(4) as executor:
+        for _ in range(5):
+            results = list(executor.map(decode, paths))
+            for n, column in enumerate(results):
+                assert column == [f"{n}{i:05d}" for i in range(500)]
+
+
+def test_decode_file_framing(tmp_path: pathlib.Path) -> None:
+    messages = _messages(5)
+    path = tmp_path / "archive.bin"
+    path.write_bytes(b"".join(b"%04d" % len(s) + s for s in messages))
+
+    columns, errors = iso8583.parallel.decode_file(path, spec, framing="ascii4")
+    assert columns["11"] == ["000000", "000001", "000002", "000003", "000004"]
+    assert errors == {}
+
+
+def test_decode_file_empty(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "archive.bin"
+    path.write_bytes(b"")
+    assert iso8583.parallel.decode_file(path, spec) == ({}, {})
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["data", "error"],
+    [
+        (b"\x00", "Incomplete length header at end of file: header b'\\\\x00'"),
+        (b"\x00\x050200", "Incomplete message at end of file: header b'\\\\x00\\\\x05'"),
+    ],
+)
+# fmt: on
+def test_decode_file_negative(tmp_path: pathlib.Path, data: bytes, error: str) -> None:
+    path = tmp_path / "archive.bin"
+    _write(path, _messages(2))
+    with path.open("ab") as f:
+        f.write(data)
+
+    with pytest.raises(iso8583.FramingError, match=error):
+        iso8583.parallel.decode_file(path, spec, workers=1)
+
+    with pytest.raises(ValueError, match="Unknown framing 'b3'"):
+        iso8583.parallel.decode_file(path, spec, framing="b3")
+
+    with pytest.raises(ValueError, match="must be at least 1"):
+        iso8583.parallel.decode_file(path, spec, workers=0)
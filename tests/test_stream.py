@@ -0,0 +1,135 @@
+import copy
+import pickle
+import typing
+
+import iso8583
+import iso8583.specs
+import pytest
+
+
+def _messages() -> typing.List[bytes]:
+    spec = iso8583.specs.default_ascii
+    return [
+        bytes(iso8583.encode({"t": "0200", "2": "1234567890"}, spec)[0]),
+        bytes(iso8583.encode({"t": "0210", "39": "00", "70": "301"}, spec)[0]),
+        bytes(iso8583.encode({"t": "0800", "70": "301"}, spec)[0]),
+    ]
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["framing", "header"],
+    [
+        ("b2", lambda n: n.to_bytes(2, "big")),
+        ("b4", lambda n: n.to_bytes(4, "big")),
+        ("ascii4", lambda n: b"%04d" % n),
+        ("bcd2", lambda n: bytes.fromhex(f"{n:04d}")),
+    ],
+)
+# fmt: on
+def test_stream_decoder(framing: str, header: typing.Callable[[int], bytes]) -> None:
+    """
+    Messages are produced as soon as complete frames arrive
+    regardless of how the stream is split into chunks
+    """
+    spec = iso8583.specs.default_ascii
+    messages = _messages()
+    stream = b"".join(header(len(m)) + m for m in messages * 10)
+    expected = [iso8583.decode(m, spec) for m in messages * 10]
+
+    for chunk_size in (1, 2, 3, 7, 64, len(stream)):
+        decoder = iso8583.StreamDecoder(spec, framing=framing)
+        decoded: typing.List[typing.Any] = []
+        for i in range(0, len(stream), chunk_size):
+            decoded.extend(decoder.feed(stream[i : i + chunk_size]))
+        assert decoded == expected
+        assert decoder.buffered == 0
+
+
+def test_stream_decoder_buffer() -> None:
+    """
+    Frames that are not iterated over remain buffered
+    """
+    spec = iso8583.specs.default_ascii
+    m1, m2, m3 = _messages()
+    decoder = iso8583.StreamDecoder(spec, framing="b2")
+    assert decoder.spec is not spec
+    assert decoder.framing == "b2"
+
+    frames = decoder.feed(len(m1).to_bytes(2, "big") + m1)
+    assert decoder.buffered == 2 + len(m1)
+
+    # Stream data is added even if the messages are not iterated over
+    decoder.feed(memoryview(len(m2).to_bytes(2, "big") + m2))
+    assert decoder.buffered == 4 + len(m1) + len(m2)
+    assert next(frames)[0]["t"] == "0200"
+    assert decoder.buffered == 2 + len(m2)
+
+    decoded = list(decoder.feed(bytearray(len(m3).to_bytes(2, "big") + m3[:5])))
+    assert [d["t"] for d, _ in decoded] == ["0210"]
+    assert decoder.buffered == 7
+
+    decoded = list(decoder.feed(m3[5:]))
+    assert [d["t"] for d, _ in decoded] == ["0800"]
+    assert decoder.buffered == 0
+
+    # Zero-length chunk
+    assert list(decoder.feed(b"")) == []
+
+
+def test_stream_decoder_decode_error() -> None:
+    """
+    Decoding error discards the frame but not the stream
+    """
+    spec = copy.deepcopy(iso8583.specs.default_ascii)
+    m1, m2, _ = _messages()
+    bad = b"0200400000000000000012"
+    decoder = iso8583.StreamDecoder(spec, framing="ascii4")
+
+    frames = decoder.feed(b"".join(b"%04d" % len(m) + m for m in (m1, bad, m2)))
+    assert next(frames)[0]["t"] == "0200"
+    with pytest.raises(
+        iso8583.DecodeError, match="Field data is 0 bytes, expecting 12: field 2 pos 22"
+    ):
+        next(frames)
+
+    # Remaining frames are produced by the next feed
+    assert [d["t"] for d, _ in decoder.feed(b"")] == ["0210"]
+
+    # Empty frame is not a valid message
+    with pytest.raises(iso8583.DecodeError):
+        list(decoder.feed(b"0000"))
+    assert decoder.buffered == 0
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["framing", "data", "expected_error"],
+    [
+        ("ascii4", b"00x1", "Failed to decode length header, non-numeric data: header b'00x1'"),
+        ("ascii4", b"-001", "Failed to decode length header, non-numeric data: header b'-001'"),
+        ("bcd2", b"\x00\x1f", "Failed to decode length header, invalid BCD data: header b'\\x00\\x1f'"),
+    ],
+)
+# fmt: on
+def test_stream_decoder_framing_error(
+    framing: str, data: bytes, expected_error: str
+) -> None:
+    decoder = iso8583.StreamDecoder(iso8583.specs.default_ascii, framing=framing)
+    with pytest.raises(iso8583.FramingError) as e:
+        list(decoder.feed(data))
+    assert e.value.args[0] == expected_error
+    assert e.value.header == data
+
+    e_unpickled = pickle.loads(pickle.dumps(e.value))
+    assert e_unpickled.args == e.value.args
+    assert e_unpickled.header == e.value.header
+
+    # Decoder cannot proceed past an invalid header
+    with pytest.raises(iso8583.FramingError):
+        list(decoder.feed(b""))
+
+
+def test_stream_decoder_unknown_framing() -> None:
+    with pytest.raises(ValueError, match="Unknown framing 'b3'"):
+        iso8583.StreamDecoder(iso8583.specs.default_ascii, framing="b3")
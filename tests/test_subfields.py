@@ -0,0 +1,291 @@
+import copy
+import pickle
+import typing
+
+import iso8583
+import iso8583.specs
+import pytest
+
+spec: typing.Dict[str, typing.Any] = copy.deepcopy(iso8583.specs.default_ascii)
+
+# Positional subfields. Trailing subfields are optional.
+spec["60"]["subfields"] = {
+    "1": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 2},
+    "2": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 2, "max_len": 10},
+    "3": {"data_enc": "b", "len_enc": "ascii", "len_type": 0, "max_len": 2},
+}
+
+# Tag, length, value subfields with a nested positional subfield
+spec["48"]["subfield_format"] = "tlv"
+spec["48"]["subfields"] = {
+    "01": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 2, "max_len": 10},
+    "02": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 2, "max_len": 10},
+    "03": {
+        "data_enc": "ascii",
+        "len_enc": "ascii",
+        "len_type": 2,
+        "max_len": 10,
+        "subfields": {
+            "a": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 1},
+            "b": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 1, "max_len": 9},
+        },
+    },
+}
+
+# Bitmap subfields
+spec["62"]["data_enc"] = "latin-1"
+spec["62"]["subfield_format"] = "bitmap"
+spec["62"]["subfields"] = {
+    "p": {"data_enc": "b", "len_enc": "ascii", "len_type": 0, "max_len": 2},
+    "1": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 1},
+    "2": {"data_enc": "ascii", "len_enc": "ascii", "len_type": 0, "max_len": 15},
+    "16": {"data_enc": "ascii", "len_enc": "b", "len_type": 1, "max_len": 20},
+}
+
+# Binary tags
+spec["63"]["data_enc"] = "b"
+spec["63"]["subfield_format"] = "tlv"
+spec["63"]["subfield_tag_len"] = 1
+spec["63"]["subfield_tag_enc"] = "b"
+spec["63"]["subfields"] = {
+    "9F": {"data_enc": "b", "len_enc": "b", "len_type": 1, "max_len": 8},
+}
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["field_key", "doc_dec", "data"],
+    [
+        ("60", {"1": "AB", "2": "XYZ", "3": "1234"}, b"AB03XYZ\x12\x34"),
+        ("60", {"1": "AB", "2": ""}, b"AB00"),
+        ("60", {"1": "AB"}, b"AB"),
+        ("60", {}, b""),
+        ("48", {"02": "B", "01": "A"}, b"0201B0101A"),
+        ("48", {"03": {"a": "X", "b": "YZ"}}, b"0304X2YZ"),
+        ("48", {"03": {"a": "X"}}, b"0301X"),
+        ("48", {}, b""),
+        ("62", {"1": "Y", "16": "Z"}, b"\x80\x01Y\x01Z"),
+        ("62", {"2": "0" * 15}, b"\x40\x00" + b"0" * 15),
+        ("62", {}, b"\x00\x00"),
+        ("63", {"9F": "1234"}, b"\x9f\x02\x12\x34"),
+    ],
+)
+# fmt: on
+def test_subfields(
+    field_key: str, doc_dec: typing.Dict[str, typing.Any], data: bytes
+) -> None:
+    """
+    Subfields are encoded and decoded in all layouts
+    """
+    s, doc_enc = iso8583.encode_subfields(doc_dec, spec, field_key)
+    assert s == data
+    decoded, encoded = iso8583.decode_subfields(s, spec, field_key)
+    assert encoded == doc_enc
+    # Decoded bitmap subfields include the bitmap
+    decoded.pop("p", None)
+    assert decoded == doc_dec
+
+
+def test_subfields_bitmap_decoded() -> None:
+    """
+    Decoded bitmap subfields include the bitmap
+    """
+    doc_dec, doc_enc = iso8583.decode_subfields(b"\x80\x01Y\x01Z", spec, "62")
+    assert doc_dec == {"p": "8001", "1": "Y", "16": "Z"}
+    assert doc_enc == {
+        "p": {"len": b"", "data": b"\x80\x01"},
+        "1": {"len": b"", "data": b"Y"},
+        "16": {"len": b"\x01", "data": b"Z"},
+    }
+
+    # Bitmap in decoded subfields is ignored
+    s, _ = iso8583.encode_subfields(doc_dec, spec, "62")
+    assert s == b"\x80\x01Y\x01Z"
+    assert doc_dec["p"] == "8001"
+    s, _ = iso8583.encode_subfields({"p": "FFFF", "1": "Y"}, spec, "62")
+    assert s == b"\x80\x00Y"
+
+
+def test_subfields_message() -> None:
+    """
+    Encode accepts subfields, decode leaves composite fields as strings
+    """
+    doc_dec: typing.Dict[str, typing.Any] = {
+        "t": "0100",
+        "48": {"01": "A", "03": {"a": "X", "b": "YZ"}},
+        "62": {"1": "Y", "16": "Z"},
+        "63": {"9F": "1234"},
+    }
+    s, doc_enc = iso8583.encode(doc_dec, spec)
+    assert s == (
+        b"01000000000000010006"
+        b"0130101A0304X2YZ"
+        b"005\x80\x01Y\x01Z"
+        b"004\x9f\x02\x12\x34"
+    )
+    assert doc_dec["48"] == {"01": "A", "03": {"a": "X", "b": "YZ"}}
+    assert doc_enc["48"] == {"len": b"013", "data": b"0101A0304X2YZ"}
+
+    doc_dec_fast = {k: v for k, v in doc_dec.items() if k != "p"}
+    assert iso8583.encode_fast(doc_dec_fast, spec) == s
+
+    decoded, encoded = iso8583.decode(bytes(s), spec)
+    assert decoded["48"] == "0101A0304X2YZ"
+    assert decoded["63"] == "9F021234"
+    assert iso8583.decode_subfields(encoded["48"]["data"], spec, "48")[0] == {
+        "01": "A",
+        "03": {"a": "X", "b": "YZ"},
+    }
+    assert iso8583.decode_subfields(encoded["62"]["data"], spec, "62")[0] == {
+        "p": "8001",
+        "1": "Y",
+        "16": "Z",
+    }
+
+    # Decoded string is still accepted
+    assert iso8583.encode(decoded, spec)[0] == s
+
+
+def test_subfields_view() -> None:
+    """
+    Memoryview data produces memoryview encoded subfields
+    """
+    s = b"0201B0304X2YZ"
+    _, doc_enc = iso8583.decode_subfields(memoryview(s), spec, "48")
+    assert isinstance(doc_enc["02"]["data"], memoryview)
+    assert doc_enc["02"]["data"].obj is s
+    _, doc_enc = iso8583.decode_subfields(bytearray(s), spec, "48")
+    assert isinstance(doc_enc["02"]["data"], bytes)
+
+
+def test_subfields_compiled() -> None:
+    """
+    Compiled specification compiles subfields once and can be pickled
+    """
+    compiled = iso8583.compile_spec(spec)
+    subfields = compiled.fields["48"].subfields
+    assert subfields is not None
+    assert subfields.format == "tlv"
+    assert subfields.tag_len == 2
+    assert subfields.tag_enc == "ascii"
+    assert list(subfields.fields) == ["01", "02", "03"]
+    assert subfields.fields["03"].subfields is not None
+    assert subfields.fields["03"].subfields.format == "fixed"
+    assert compiled.fields["2"].subfields is None
+
+    compiled = pickle.loads(pickle.dumps(compiled))
+    doc_dec = {"01": "A", "03": {"a": "X", "b": "YZ"}}
+    s, _ = iso8583.encode_subfields(doc_dec, compiled, "48")
+    assert iso8583.decode_subfields(s, compiled, "48")[0] == doc_dec
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["field_key", "data", "expected"],
+    [
+        ("60", b"A", "Field data is 1 bytes, expecting 2: field 60.1 pos 0"),
+        ("60", b"AB0", "Field length is 1 bytes wide, expecting 2: field 60.2 pos 2"),
+        ("60", b"AB01", "Field data is 0 bytes, expecting 1: field 60.2 pos 4"),
+        ("60", b"AB00\x12\x34\x56", "Extra data after last field: field 60.3 pos 6"),
+        ("48", b"0", "Tag is 1 bytes, expecting 2: field 48 pos 0"),
+        ("48", b"0101A\xff\xff", "Failed to decode tag, invalid data: field 48 pos 5"),
+        ("48", b"0101A99", "Field is not defined in specification: field 48.99 pos 5"),
+        ("48", b"0101A0301", "Field data is 0 bytes, expecting 1: field 48.03 pos 9"),
+        ("48", b"0101A0303X2Y", "Field data is 1 bytes, expecting 2: field 48.03.b pos 11"),
+        ("48", b"0101A0303XYZ", "Failed to decode field length, non-numeric data: field 48.03.b pos 10"),
+        ("62", b"\x80", "Field data is 1 bytes, expecting 2: field 62.p pos 0"),
+        ("62", b"\x80\x00", "Field data is 0 bytes, expecting 1: field 62.1 pos 2"),
+        ("62", b"\x00\x02", "Field is not defined in specification: field 62.15 pos 2"),
+        ("62", b"\x00\x00Y", "Extra data after last field: field 62.p pos 2"),
+        ("63", b"\x9e\x00", "Field is not defined in specification: field 63.9E pos 0"),
+    ],
+)
+# fmt: on
+def test_decode_subfields_negative(field_key: str, data: bytes, expected: str) -> None:
+    with pytest.raises(iso8583.DecodeError, match=expected):
+        iso8583.decode_subfields(data, spec, field_key)
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["field_key", "doc_dec", "expected"],
+    [
+        ("60", {"1": "A"}, "Field data is 1 bytes, expecting 2: field 60.1"),
+        ("60", {"1": "AB", "3": "1234"}, "Field data is required according to specifications: field 60.2"),
+        ("60", {"4": "AB"}, r"Dictionary contains invalid fields \['4'\]: field 60"),
+        ("48", {"04": "A"}, r"Dictionary contains invalid fields \['04'\]: field 48"),
+        ("48", {"01": "A" * 11}, "Field data is 11 bytes, larger than maximum 10: field 48.01"),
+        ("48", {"03": {"a": "X", "b": "Y" * 10}}, "Field data is 10 bytes, larger than maximum 9: field 48.03.b"),
+        ("48", {"03": {"c": "X"}}, r"Dictionary contains invalid fields \['c'\]: field 48.03"),
+        ("62", {"3": "Y"}, r"Dictionary contains invalid fields \['3'\]: field 62"),
+        ("62", {"1": "YY"}, "Field data is 2 bytes, expecting 1: field 62.1"),
+        ("62", {"16": "Z" * 21}, "Field data is 21 bytes, larger than maximum 20: field 62.16"),
+        ("63", {"9F": "XY"}, "Failed to encode field, non-hex data: field 63.9F"),
+    ],
+)
+# fmt: on
+def test_encode_subfields_negative(
+    field_key: str, doc_dec: typing.Dict[str, typing.Any], expected: str
+) -> None:
+    with pytest.raises(iso8583.EncodeError, match=expected):
+        iso8583.encode_subfields(doc_dec, spec, field_key)
+
+
+def test_encode_subfields_message_negative() -> None:
+    """
+    Subfield errors refer to the subfield within the message
+    """
+    doc_dec: typing.Dict[str, typing.Any] = {"t": "0100", "48": {"03": {"a": "XY"}}}
+    with pytest.raises(
+        iso8583.EncodeError, match="Field data is 2 bytes, expecting 1: field 48.03.a"
+    ) as e:
+        iso8583.encode(doc_dec, spec)
+    assert e.value.doc_dec is doc_dec
+
+    doc_dec = {"t": "0100", "48": {"01": "A" * 10, "02": "B" * 10, "03": "C" * 10}}
+    spec_48 = copy.deepcopy(spec)
+    spec_48["48"]["max_len"] = 30
+    with pytest.raises(
+        iso8583.EncodeError,
+        match="Field data is 42 bytes, larger than maximum 30: field 48",
+    ):
+        iso8583.encode(doc_dec, spec_48)
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["subfield_spec", "decode_expected", "encode_expected"],
+    [
+        ({"subfield_format": "xml"}, "Unknown subfield format 'xml': field 48 pos 0", "Unknown subfield format 'xml': field 48"),
+        ({"subfield_format": "bitmap"}, "Field is not defined in specification: field 48.p pos 0", "Field is not defined in specification: field 48.p"),
+        ({"subfield_format": "tlv", "subfield_tag_enc": "invalid"}, "Failed to decode tag, unknown encoding specified: field 48 pos 0", "Failed to encode tag, unknown encoding specified: field 48.01"),
+        ({"subfield_format": "tlv", "subfield_tag_len": 3}, "Field is not defined in specification: field 48.010 pos 0", "Tag is 2 bytes, expecting 3: field 48.01"),
+        ({"subfield_format": "tlv", "subfield_tag_enc": "b"}, "Field is not defined in specification: field 48.3031 pos 0", "Tag is 1 bytes, expecting 2: field 48.01"),
+    ],
+)
+# fmt: on
+def test_subfields_spec_negative(
+    subfield_spec: typing.Dict[str, typing.Any],
+    decode_expected: str,
+    encode_expected: str,
+) -> None:
+    bad_spec = copy.deepcopy(spec)
+    bad_spec["48"].update(subfield_spec)
+
+    with pytest.raises(iso8583.DecodeError, match=decode_expected):
+        iso8583.decode_subfields(b"01011", bad_spec, "48")
+    with pytest.raises(iso8583.EncodeError, match=encode_expected):
+        iso8583.encode_subfields({"01": "1"}, bad_spec, "48")
+
+
+def test_subfields_type_negative() -> None:
+    with pytest.raises(ValueError, match="Field 2 has no subfields"):
+        iso8583.decode_subfields(b"", spec, "2")
+    with pytest.raises(ValueError, match="Field 2 has no subfields"):
+        iso8583.encode_subfields({}, spec, "2")
+    with pytest.raises(KeyError):
+        iso8583.decode_subfields(b"", spec, "200")
+    with pytest.raises(TypeError, match="Encoded field data must be bytes"):
+        iso8583.decode_subfields("0101A", spec, "48")  # type: ignore[arg-type]
+    with pytest.raises(TypeError, match="Decoded subfields must be a mapping"):
+        iso8583.encode_subfields("0101A", spec, "48")  # type: ignore[arg-type]
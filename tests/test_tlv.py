@@ -0,0 +1,178 @@
+import pickle
+import typing
+
+import iso8583
+import iso8583.specs
+import iso8583.tlv
+import pytest
+
+# Generate AC response template with cryptogram information data,
+# application transaction counter and application cryptogram
+_template = bytes.fromhex("770F9F2701809F360200019F2603AABBCC")
+
+
+def test_decode() -> None:
+    """
+    Nested, multi-byte tags and padding are decoded
+    """
+    data = b"\x00" + _template + b"\x00\x00" + bytes.fromhex("9F1A020840")
+    assert iso8583.tlv.decode(data) == {
+        "77": {"9F27": b"\x80", "9F36": b"\x00\x01", "9F26": b"\xaa\xbb\xcc"},
+        "9F1A": b"\x08\x40",
+    }
+    assert iso8583.tlv.decode(data, recursive=False) == {
+        "77": _template[2:],
+        "9F1A": b"\x08\x40",
+    }
+    assert iso8583.tlv.decode(b"") == {}
+
+
+def test_decode_view() -> None:
+    """
+    Memoryview data produces memoryview values without copying
+    """
+    data = memoryview(_template)
+    tags = iso8583.tlv.decode(data)
+    value = tags["77"]["9F26"]
+    assert isinstance(value, memoryview)
+    assert value.obj is _template
+    assert value.tobytes() == b"\xaa\xbb\xcc"
+
+    tags = iso8583.tlv.decode(bytearray(_template))
+    assert isinstance(tags["77"]["9F26"], bytes)
+
+
+def test_decode_field_55() -> None:
+    """
+    Field 55 is decoded from encoded data
+    """
+    spec = iso8583.specs.default
+    s, _ = iso8583.encode({"t": "0100", "55": _template.hex()}, spec)
+    doc_dec, doc_enc = iso8583.decode(s, spec)
+    assert iso8583.tlv.decode(doc_enc["55"]["data"]) == iso8583.tlv.decode(
+        bytes.fromhex(doc_dec["55"])
+    )
+    assert iso8583.tlv.TLV(doc_enc["55"]["data"])["77"] == _template[2:]
+
+
+@pytest.mark.parametrize(
+    ["length", "encoded_length"],
+    [
+        (0, b"\x00"),
+        (127, b"\x7f"),
+        (128, b"\x81\x80"),
+        (255, b"\x81\xff"),
+        (256, b"\x82\x01\x00"),
+        (65536, b"\x83\x01\x00\x00"),
+    ],
+)
+def test_length(length: int, encoded_length: bytes) -> None:
+    """
+    Short and long length forms
+    """
+    value = bytes(range(256)) * (length // 256) + bytes(range(length % 256))
+    data = iso8583.tlv.encode({"DF01": value})
+    assert data == b"\xdf\x01" + encoded_length + value
+    assert iso8583.tlv.decode(data) == {"DF01": value}
+
+
+def test_encode() -> None:
+    """
+    Encoding reverses decoding
+    """
+    tags = iso8583.tlv.decode(_template)
+    assert iso8583.tlv.encode(tags) == _template
+    assert iso8583.tlv.encode({"77": _template[2:]}) == _template
+    assert iso8583.tlv.encode({"9f7f": memoryview(b"\x01")}) == b"\x9f\x7f\x01\x01"
+    assert iso8583.tlv.encode({"5F9F01": bytearray(b"\x01")}) == b"\x5f\x9f\x01\x01\x01"
+    assert iso8583.tlv.encode({}) == b""
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["data", "expected"],
+    [
+        ("9F", "Incomplete tag: pos 0"),
+        ("5A0112009F81", "Incomplete tag: pos 4"),
+        ("5A", "Missing length: tag 5A pos 0"),
+        ("9F2680", "Unsupported length form 80: tag 9F26 pos 0"),
+        ("9F2685", "Unsupported length form 85: tag 9F26 pos 0"),
+        ("9F268201", "Incomplete length: tag 9F26 pos 0"),
+        ("9F260201", "Value is 1 bytes, expecting 2: tag 9F26 pos 0"),
+        ("770A9F260201", "Value is 4 bytes, expecting 10: tag 77 pos 0"),
+        ("77039F2602", "Value is 0 bytes, expecting 2: tag 9F26 pos 2"),
+    ],
+)
+# fmt: on
+def test_decode_negative(data: str, expected: str) -> None:
+    with pytest.raises(iso8583.tlv.TLVError, match=expected):
+        iso8583.tlv.decode(bytes.fromhex(data))
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["tags", "expected"],
+    [
+        ({"9": b""}, "Tag must be a hex string: tag 9 pos 0"),
+        ({"ZZ": b""}, "Tag must be a hex string: tag ZZ pos 0"),
+        ({"": b""}, "Invalid tag: pos 0"),
+        ({"9F": b""}, "Invalid tag: tag 9F pos 0"),
+        ({"5A01": b""}, "Invalid tag: tag 5A01 pos 0"),
+        ({"9F81": b""}, "Invalid tag: tag 9F81 pos 0"),
+        ({"9F2601": b""}, "Invalid tag: tag 9F2601 pos 0"),
+        ({"5A": {"5A": b""}}, "Nested tags require a constructed tag: tag 5A pos 0"),
+        ({"77": {"5A": "12"}}, "Value must be bytes or dict, not str: tag 5A pos 0"),
+        ({"5A": 12}, "Value must be bytes or dict, not int: tag 5A pos 0"),
+    ],
+)
+# fmt: on
+def test_encode_negative(tags: typing.Dict[str, typing.Any], expected: str) -> None:
+    with pytest.raises(iso8583.tlv.TLVError, match=expected):
+        iso8583.tlv.encode(tags)
+
+
+def test_tlv_lazy() -> None:
+    """
+    Tags are indexed only up to the requested tag
+    """
+    # The last data object is malformed and is not reached by earlier lookups
+    data = _template[2:] + b"\x5a\x05"
+    tlv = iso8583.tlv.TLV(data)
+    assert tlv["9F27"] == b"\x80"
+    assert tlv["9F36"] == b"\x00\x01"
+    assert tlv["9F27"] == b"\x80"
+    assert tlv.get("9F26") == b"\xaa\xbb\xcc"
+
+    with pytest.raises(iso8583.tlv.TLVError, match="Value is 0 bytes, expecting 5"):
+        tlv["5A"]
+    with pytest.raises(iso8583.tlv.TLVError, match="Value is 0 bytes, expecting 5"):
+        len(tlv)
+
+
+def test_tlv_mapping() -> None:
+    """
+    TLV behaves like a read-only dict
+    """
+    tlv = iso8583.tlv.TLV(bytearray(b"\x00" + _template))
+    assert "9F26" not in tlv
+    assert tlv.get("9F26") is None
+    with pytest.raises(KeyError):
+        tlv["9F26"]
+    assert len(tlv) == 1
+    assert list(tlv) == ["77"]
+    assert dict(iso8583.tlv.TLV(tlv["77"])) == {
+        "9F27": b"\x80",
+        "9F36": b"\x00\x01",
+        "9F26": b"\xaa\xbb\xcc",
+    }
+
+    view = memoryview(_template)
+    assert iso8583.tlv.TLV(view)["77"].obj is _template
+    assert repr(iso8583.tlv.TLV(b"\x5a\x00")) == r"TLV(b'Z\x00')"
+    assert len(iso8583.tlv.TLV(b"")) == 0
+
+
+def test_tlv_error_pickle() -> None:
+    e = iso8583.tlv.TLVError("Incomplete tag", "", 3)
+    e2 = pickle.loads(pickle.dumps(e))
+    assert (e2.msg, e2.tag, e2.pos, str(e2)) == (e.msg, e.tag, e.pos, str(e))
@@ -1,9 +1,12 @@
+import ast
 import copy
 from io import StringIO
 
 import iso8583
 import iso8583.specs
+import iso8583.tools
 import typing
+import pytest
 from iso8583.tools import _wrap_bytes_repr, _wrap_str_repr
 
 
@@ -781,3 +784,224 @@ def test_pp_no_yield_on_empty_string(capsys: typing.Any) -> None:
 
     captured = capsys.readouterr()
     assert captured.out == ""
+
+
+def test_pformat() -> None:
+    """pformat and pp_lines produce the same output as pp"""
+    spec = copy.deepcopy(iso8583.specs.default)
+    doc_dec = {"t": "0200", "2": "12345678", "55": "9F2701" * 80, "123": "'\"" * 40}
+    _, doc_enc = iso8583.encode(doc_dec, spec)
+
+    for doc in (doc_dec, doc_enc):
+        for desc_width, line_width in ((30, 80), (0, 40), (-99, -99), (10, 1000)):
+            sio = StringIO()
+            iso8583.pp(
+                doc, spec, desc_width=desc_width, stream=sio, line_width=line_width
+            )
+            s = iso8583.pformat(doc, spec, desc_width=desc_width, line_width=line_width)
+            assert s == sio.getvalue()
+            lines = list(iso8583.pp_lines(doc, spec, desc_width, line_width))
+            assert lines == s.split("\n")[:-1]
+
+    assert iso8583.pformat({}, spec) == ""
+    assert list(iso8583.pp_lines({}, spec)) == []
+
+
+class _CountingStream(StringIO):
+    writes = 0
+
+    def write(self, s: str) -> int:
+        self.writes += 1
+        return super().write(s)
+
+
+def test_pp_single_write() -> None:
+    """pp writes all output to the stream at once"""
+    spec = iso8583.specs.default_ascii
+    doc_dec = {"t": "0200", "2": "1234567890123456", "127": "1" * 999}
+    _, doc_enc = iso8583.encode(doc_dec, spec)
+    sio = _CountingStream()
+    iso8583.pp(doc_enc, spec, stream=sio)
+    assert sio.writes == 1
+    assert sio.getvalue() == iso8583.pformat(doc_enc, spec)
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["data", "width"],
+    [
+        (bytes(range(256)), 10),
+        (bytes(range(256)), 80),
+        (b"'" * 20 + b'"' + b"'" * 20, 12),
+        (b"'" * 20 + b"A" * 20, 12),
+        (b'"' * 20 + b"'" * 20, 12),
+        (b"A\\\t\n\r\x00'\"" * 10, 7),
+        (b"AB", 1),
+        (b"\xff\xff\xff", -1),
+    ],
+)
+# fmt: on
+def test_wrap_bytes_repr(data: bytes, width: int) -> None:
+    """Each chunk is as long as possible without exceeding width"""
+    chunks = [ast.literal_eval(rep) for rep in _wrap_bytes_repr(data, width)]
+    assert b"".join(chunks) == data
+    assert all(len(c) > 0 for c in chunks)
+    for rep, chunk in zip(_wrap_bytes_repr(data, width), chunks):
+        assert rep == repr(chunk)
+        assert len(rep) <= width or len(chunk) == 1
+    for chunk, next_chunk in zip(chunks, chunks[1:]):
+        assert len(repr(chunk + next_chunk[:1])) > width
+
+
+def test_mask() -> None:
+    """Decoded and encoded dicts are masked without modifying them"""
+    spec = iso8583.specs.default_ascii
+    doc_dec = {
+        "t": "0200",
+        "2": "4111111111111111",
+        "35": "4111111111111111=2512",
+        "52": "ABCDEF0123456789",
+    }
+    _, doc_enc = iso8583.encode(doc_dec, spec)
+    enc_f2 = dict(doc_enc["2"])
+
+    masked = iso8583.tools.mask(doc_dec, spec)
+    assert masked["2"] == "411111******1111"
+    assert masked["35"] == "*" * 21
+    assert masked["52"] == "*" * 16
+    assert masked["t"] == "0200"
+    assert masked["p"] == doc_dec["p"]
+    assert doc_dec["2"] == "4111111111111111"
+
+    masked_enc = iso8583.tools.mask(doc_enc, spec)
+    assert masked_enc["2"] == {"len": b"16", "data": b"411111******1111"}
+    assert masked_enc["35"] == {"len": b"21", "data": b"*" * 21}
+    assert masked_enc["52"] == {"len": b"", "data": b"*" * 16}
+    assert masked_enc["t"] is doc_enc["t"]
+    assert doc_enc["2"] == enc_f2
+
+    rules = {
+        "2": iso8583.tools.MaskRule(drop=True),
+        "35": iso8583.tools.MaskRule(4, 0, char="#"),
+    }
+    for doc in (
+        iso8583.tools.mask(doc_dec, spec, rules),
+        iso8583.tools.mask(doc_enc, spec, rules),
+    ):
+        assert "2" not in doc
+        assert "52" in doc
+    assert iso8583.tools.mask(doc_dec, spec, rules)["35"] == "4111" + "#" * 17
+    assert iso8583.tools.mask(doc_enc, spec, rules)["35"]["data"] == b"4111" + b"#" * 17
+
+
+@pytest.mark.parametrize("spec", [iso8583.specs.default_ascii, iso8583.specs.default])
+def test_mask_view(spec: typing.Mapping[str, typing.Any]) -> None:
+    """Memoryview data of decode_view() is masked the same way as bytes"""
+    s, _ = iso8583.encode(
+        {"t": "0200", "2": "4111111111111111", "52": "ABCDEF0123456789"}, spec
+    )
+    _, doc_enc = iso8583.decode(bytes(s), spec)
+    _, doc_view = iso8583.decode_view(bytes(s), spec)
+    assert isinstance(doc_view["2"]["data"], memoryview)
+
+    masked = iso8583.tools.mask(doc_view, spec)
+    assert masked == iso8583.tools.mask(doc_enc, spec)
+    assert isinstance(masked["2"]["data"], bytes)
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["value", "keep_first", "keep_last", "expected"],
+    [
+        ("4111111111111111", 6, 4, "411111******1111"),
+        ("41111111111", 6, 4, "411111*1111"),
+        ("4111111111", 6, 4, "**********"),
+        ("411111111", 6, 4, "*********"),
+        ("4111111111", 0, 0, "**********"),
+        ("4111111111", 2, 0, "41********"),
+        ("4111111111", 0, 2, "********11"),
+        ("", 6, 4, ""),
+    ],
+)
+# fmt: on
+def test_mask_rule(value: str, keep_first: int, keep_last: int, expected: str) -> None:
+    """Data no longer than kept characters is masked in full"""
+    spec = iso8583.specs.default_ascii
+    rules = {"2": iso8583.tools.MaskRule(keep_first, keep_last)}
+    s, doc_enc = iso8583.encode({"t": "0200", "2": value}, spec)
+    assert iso8583.tools.mask({"2": value}, spec, rules)["2"] == expected
+    assert iso8583.tools.mask(doc_enc, spec, rules)["2"]["data"] == expected.encode()
+    assert iso8583.tools.mask_bytes(s, spec, rules) == s.replace(
+        value.encode(), expected.encode()
+    )
+
+
+def test_mask_bytes() -> None:
+    """Raw data is masked the same way as encoded dict"""
+    spec = copy.deepcopy(iso8583.specs.default)
+    spec["2"]["data_enc"] = "cp500"
+    doc_dec = {
+        "t": "0200",
+        "2": "4111111111111111",
+        "4": "000000001000",
+        "35": "4111111111111111=2512",
+        "52": "ABCDEF0123456789",
+    }
+    s, _ = iso8583.encode(doc_dec, spec)
+
+    masked = iso8583.tools.mask_bytes(s, spec)
+    assert isinstance(masked, bytes)
+    assert len(masked) == len(s)
+    doc_dec_masked, doc_enc_masked = iso8583.decode(masked, spec)
+    assert doc_dec_masked["2"] == "411111******1111"
+    assert doc_enc_masked["2"]["data"] == "411111******1111".encode("cp500")
+    assert doc_dec_masked["4"] == "000000001000"
+    assert doc_dec_masked["35"] == "*" * 21
+    assert doc_dec_masked["52"] == "F" * 16
+
+    _, doc_enc = iso8583.decode(s, spec)
+    _, doc_enc_masked = iso8583.decode(
+        iso8583.tools.mask_bytes(memoryview(s), spec), spec
+    )
+    assert doc_enc_masked == iso8583.tools.mask(doc_enc, spec)
+
+    # Drop rule masks raw data in full
+    rules = {"2": iso8583.tools.MaskRule(6, 4, drop=True)}
+    doc_dec_masked, _ = iso8583.decode(
+        iso8583.tools.mask_bytes(bytearray(s), spec, rules), spec
+    )
+    assert doc_dec_masked["2"] == "****************"
+    assert doc_dec_masked["35"] == doc_dec["35"]
+
+    # Data without masked fields is returned as is
+    assert iso8583.tools.mask_bytes(s, spec, {"3": iso8583.tools.MaskRule()}) == s
+
+    with pytest.raises(iso8583.DecodeError, match="Extra data after last field"):
+        iso8583.tools.mask_bytes(s + b"1", spec)
+
+
+# fmt: off
+@pytest.mark.parametrize(
+    ["pan", "left_pad", "right_pad", "expected_enc", "expected_dec"],
+    [
+        ("4111111111111", "0", "",  b"\x04\x11\x11\x1f\xff\x11\x11", "411111FFF1111"),
+        ("4111111111111", "",  "F", b"\x41\x11\x11\xff\xf1\x11\x1f", "411111FFF1111"),
+        ("411111111111",  "0", "",  b"\x41\x11\x11\xff\x11\x11",     "411111FF1111"),
+    ],
+)
+# fmt: on
+def test_mask_nibbles(
+    pan: str, left_pad: str, right_pad: str, expected_enc: bytes, expected_dec: str
+) -> None:
+    """Pad digit of BCD field is not masked"""
+    spec = copy.deepcopy(iso8583.specs.default)
+    spec["2"]["data_enc"] = "b"
+    spec["2"]["len_count"] = "nibbles"
+    spec["2"]["left_pad"] = left_pad
+    spec["2"]["right_pad"] = right_pad
+    s, doc_enc = iso8583.encode({"t": "0200", "2": pan}, spec)
+
+    assert iso8583.tools.mask(doc_enc, spec)["2"]["data"] == expected_enc
+    doc_dec, _ = iso8583.decode(iso8583.tools.mask_bytes(s, spec), spec)
+    assert doc_dec["2"] == expected_dec
+    assert iso8583.tools.mask({"2": pan}, spec)["2"] == expected_dec.replace("F", "*")